@@ -1,9 +1,10 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from src.data_store import sync_data, load_local_data
-from src.enrichment.asset_metadata import AssetEnricher
-from src.analysis.metrics import EventStudy
+from src.data_store import sync_data, load_local_data, query_trades, aggregate_trades, distinct_values
+from src.analysis.leaderboard import default_leaderboard, load_trades
+from src.analysis.metrics import HORIZONS
+from src.pipeline import refresh_derived
 
 st.set_page_config(
     page_title="Capitol Shill",
@@ -12,8 +13,11 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+# The log table tops out here; the filters narrow it down
+LOG_ROWS = 5000
 
-# Cache this so we don't re-enrich on every UI click
+
+# Cache this so we don't re-check the store on every UI click
 @st.cache_data(ttl=3600)
 def get_data_pipeline():
     # 1. Sync Data (Scrape & Append)
@@ -25,24 +29,15 @@ def get_data_pipeline():
         df = load_local_data()
 
     if df.empty:
-        return pd.DataFrame()
-
-    # 2. Enrich (Yahoo Finance)
-    # We only enrich rows that are missing sectors (saves time)
-    if 'sector' not in df.columns or df['sector'].isnull().any():
-        enricher = AssetEnricher()
-        df = enricher.enrich_dataframe(df)
+        return 0
 
-    # 3. Analyze (Calculate CAR - Cumulative Abnormal Returns)
-    # This fetches market data to see if trades beat the market
-    if 'car_30d' not in df.columns:
-        # We only run this if the column is missing to save time on re-runs
-        # (Though st.cache_data handles the big caching)
-        analyzer = EventStudy()
-        with st.spinner("Crunching market numbers (Calculating Alpha)..."):
-            df = analyzer.analyze_batch(df)
+    # 2. Enrich (Yahoo Finance) + 3. Analyze (Calculate CAR)
+    # Results are stored per trade, so only trades never seen before (or computed by an older
+    # version of the code) cost any network. The UI joins the stored results in SQL
+    with st.spinner("Crunching market numbers (Calculating Alpha)..."):
+        refresh_derived(df)
 
-    return df
+    return len(df)
 
 
 def main():
@@ -53,15 +48,15 @@ def main():
 
     # Load Data
     with st.spinner('Fetching data.'):
-        df = get_data_pipeline()
+        total_records = get_data_pipeline()
 
-    if df.empty:
+    if not total_records:
         st.error("Error: Run the scraper manually or check connection.")
         st.stop()
 
     # --- Header Metrics ---
     # Determine freshness
-    last_trade = df['transaction_date'].max()
+    last_trade = aggregate_trades(['last_trade'])['last_trade'][0]
     is_fresh = (pd.Timestamp.now() - last_trade).days < 7
     status_color = "green" if is_fresh else "red"
     status_text = "Fresh 🟢" if is_fresh else "Stale 🔴"
@@ -69,66 +64,50 @@ def main():
     c1, c2, c3 = st.columns(3)
     c1.metric("Database Status", status_text)
     c2.metric("Last Trade Date", last_trade.strftime('%Y-%m-%d'))
-    c3.metric("Total Records", len(df))
+    c3.metric("Total Records", total_records)
 
     # --- Filters ---
     st.sidebar.header("Filter Trades")
 
     # Senator filter
-    all_senators = sorted(df['senator'].dropna().unique().tolist())
+    all_senators = distinct_values('senator')
     selected_senators = st.sidebar.multiselect("Senator", all_senators)
 
     # Sector filters
-    if 'sector' in df.columns:
-        # Filter out 'Unknown' or nans for the dropdown
-        clean_sectors = [str(s) for s in df['sector'].unique() if s and str(s) != 'nan']
-        all_sectors = sorted(clean_sectors)
-        selected_sectors = st.sidebar.multiselect("Sector", all_sectors)
-    else:
-        selected_sectors = []
-
+    # Filter out 'Unknown' or nans for the dropdown
+    all_sectors = [s for s in distinct_values('sector') if s and s != 'nan']
+    selected_sectors = st.sidebar.multiselect("Sector", all_sectors)
 
     # Ticker filter
-    all_tickers = sorted(df['ticker'].dropna().unique().tolist())
+    all_tickers = distinct_values('ticker')
     selected_ticker = st.sidebar.selectbox("Specific Ticker", ["All"] + all_tickers)
 
     # Apply filters
-    filtered_df = df.copy()
-
-    # Updated Filter Logic — Change starts here
-    if not selected_senators and not selected_sectors:
-        filtered_df = df.copy()  # show all rows if both empty
-    else:
-        if selected_senators:
-            filtered_df = filtered_df[filtered_df['senator'].isin(selected_senators)]
-        if selected_sectors:
-            filtered_df = filtered_df[filtered_df['sector'].isin(selected_sectors)]
-
-    if selected_ticker != "All":
-        filtered_df = filtered_df[filtered_df['ticker'] == selected_ticker]
+    # Empty selections mean "everything"; SQL only sends back the matching rows
+    filters = dict(
+        senators=selected_senators,
+        sectors=selected_sectors,
+        tickers=[selected_ticker] if selected_ticker != "All" else None,
+    )
 
     # --- Metrics ---
-    total_vol = filtered_df['amount_est'].sum()
-    # Handle capitalization (Buy vs BUY)
-    buy_df = filtered_df[filtered_df['type'].str.contains('Buy', case=False, na=False)]
-    sell_df = filtered_df[filtered_df['type'].str.contains('Sell', case=False, na=False)]
-
-    buy_vol = buy_df['amount_est'].sum()
-    sell_vol = sell_df['amount_est'].sum()
+    # Buy vs BUY is handled in SQL (LIKE is case-insensitive)
+    totals = aggregate_trades(['volume', 'buy_volume', 'sell_volume', 'trades'], **filters).iloc[0]
 
     m1, m2, m3, m4 = st.columns(4)
-    m1.metric("Visible Volume", f"${total_vol:,.0f}")
-    m2.metric("Buy Volume", f"${buy_vol:,.0f}")
-    m3.metric("Sell Volume", f"${sell_vol:,.0f}")
-    m4.metric("Trades Count", len(filtered_df))
+    m1.metric("Visible Volume", f"${totals['volume']:,.0f}")
+    m2.metric("Buy Volume", f"${totals['buy_volume']:,.0f}")
+    m3.metric("Sell Volume", f"${totals['sell_volume']:,.0f}")
+    m4.metric("Trades Count", int(totals['trades']))
 
     # --- Visuals ---
     col_charts_1, col_charts_2 = st.columns(2)
 
     with col_charts_1:
         st.subheader("Money Flow by Sector")
-        if 'sector' in filtered_df.columns and not filtered_df.empty:
-            sector_grp = filtered_df.groupby('sector')['amount_est'].sum().reset_index()
+        sector_grp = aggregate_trades(['volume'], group_by='sector', **filters)
+        if not sector_grp.empty:
+            sector_grp = sector_grp.rename(columns={'volume': 'amount_est'})
             fig_pie = px.pie(
                 sector_grp,
                 values='amount_est',
@@ -142,8 +121,8 @@ def main():
 
     with col_charts_2:
         st.subheader("Most Active Tickers")
-        if not filtered_df.empty:
-            ticker_counts = filtered_df['ticker'].value_counts().head(10).reset_index()
+        ticker_counts = aggregate_trades(['trades'], group_by='ticker', order_by='trades', limit=10, **filters)
+        if not ticker_counts.empty:
             ticker_counts.columns = ['Ticker', 'Trade Count']
             fig_bar = px.bar(
                 ticker_counts,
@@ -158,26 +137,58 @@ def main():
 
     # --- Market Beaters Section ---
     st.subheader("Market Beaters (High Alpha Trades)")
-    st.markdown("Trades that significantly outperformed the S&P 500 over 30 days.")
-
-    if 'car_30d' in filtered_df.columns:
-        # Filter for positive alpha and drop NaNs
-        beaters_df = filtered_df[filtered_df['car_30d'] > 0.05].copy() # >5% abnormal return
-        
-        if not beaters_df.empty:
-            # Sort by highest return
-            beaters_df = beaters_df.sort_values(by='car_30d', ascending=False).head(10)
-            
-            # Format for display
-            display_beaters = beaters_df[['senator', 'ticker', 'transaction_date', 'type', 'amount_est', 'car_30d']].copy()
-            display_beaters['car_30d'] = display_beaters['car_30d'].apply(lambda x: f"+{x*100:.1f}%")
-            display_beaters['transaction_date'] = display_beaters['transaction_date'].dt.strftime('%Y-%m-%d')
-            
-            st.table(display_beaters)
-        else:
-            st.info("No significant market beaters found in current selection.")
+    st.markdown("Trades that significantly outperformed the S&P 500 over 30 days, with their abnormal return "
+                "at every horizon (CAR) and the 30-day buy-and-hold abnormal return (BHAR).")
+
+    # >5% abnormal return, highest first
+    horizon_cols = [f"car_{h}d" for h in HORIZONS] + ['bhar_30d']
+    beaters_df = query_trades(
+        columns=['senator', 'ticker', 'transaction_date', 'type', 'amount_est'] + horizon_cols,
+        min_values={'car_30d': 0.05}, order_by='car_30d', descending=True, limit=10, **filters
+    )
+
+    if not beaters_df.empty:
+        # Format for display
+        display_beaters = beaters_df.copy()
+        for col in horizon_cols:
+            display_beaters[col] = display_beaters[col].apply(lambda x: f"{x*100:+.1f}%" if pd.notnull(x) else "")
+        display_beaters['transaction_date'] = display_beaters['transaction_date'].dt.strftime('%Y-%m-%d')
+
+        st.table(display_beaters)
     else:
-        st.info("Calculated returns not available yet.")
+        st.info("No significant market beaters found in current selection.")
+
+    # --- Leaderboard Section ---
+    st.subheader("Who Beats the Market")
+    st.markdown("30-day abnormal return per dollar traded (sells count when the stock then drops), with 95% "
+                "bootstrap intervals. Party and chamber p-values: how often a random reshuffle of politicians "
+                "opens a gap this big.")
+
+    # Whole store, not the filters: recomputed only when trades or their CARs change
+    boards = default_leaderboard().compute(load_trades())
+
+    def pct(x):
+        return f"{x*100:+.2f}%" if pd.notnull(x) else ""
+
+    col_party, col_chamber = st.columns(2)
+    for col, level in ((col_party, 'party'), (col_chamber, 'chamber')):
+        board = boards[level].copy()
+        if board.empty:
+            col.info(f"No scored trades to rank by {level} yet.")
+            continue
+        for c in ('mean', 'ci_low', 'ci_high'):
+            board[c] = board[c].apply(pct)
+        board['p_value'] = board['p_value'].round(3)
+        col.table(board.drop(columns=['amount']))
+
+    top = boards['politician'].head(10).copy()
+    if not top.empty:
+        for c in ('mean', 'ci_low', 'ci_high'):
+            top[c] = top[c].apply(pct)
+        top['amount'] = top['amount'].apply(lambda x: f"${x:,.0f}")
+        st.table(top)
+    else:
+        st.info("No 30-day abnormal returns computed yet (prices still pending).")
 
 
     # --- Data Table ---
@@ -185,11 +196,11 @@ def main():
 
     view_cols = ['disclosure_date', 'transaction_date', 'senator', 'ticker', 'type', 'amount_est', 'sector',
                  'asset_description', 'car_30d']
-    # Safety check for missing columns
-    final_cols = [c for c in view_cols if c in filtered_df.columns]
-
     # Sort by Disclosure Date (Newest first)
-    table_df = filtered_df[final_cols].sort_values(by='disclosure_date', ascending=False)
+    table_df = query_trades(columns=view_cols, order_by='disclosure_date', descending=True,
+                            limit=LOG_ROWS, **filters)
+    if len(table_df) == LOG_ROWS:
+        st.caption(f"Showing the newest {LOG_ROWS:,} of {int(totals['trades']):,} trades. Narrow the filters to see the rest.")
 
     # st.dataframe(
     #     table_df.style.format({
@@ -205,10 +216,9 @@ def main():
         transaction_date = table_df['transaction_date'].dt.strftime('%Y-%m-%d').fillna("")
     )
 
-    # Format car_30d as percentage if it exists
-    if 'car_30d' in table_df.columns:
-        # Multiply by 100 and add % sign, handling NaNs
-        table_df['car_30d'] = table_df['car_30d'].apply(lambda x: f"{x*100:.2f}%" if pd.notnull(x) else "")
+    # Format car_30d as percentage
+    # Multiply by 100 and add % sign, handling NaNs
+    table_df['car_30d'] = table_df['car_30d'].apply(lambda x: f"{x*100:.2f}%" if pd.notnull(x) else "")
 
     st.dataframe(table_df, use_container_width=True, height=500)
 
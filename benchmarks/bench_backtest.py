@@ -0,0 +1,83 @@
+"""
+Copy-trading backtest cost: every politician's disclosures followed at once (simulate, position
+matrices over a local price matrix) against replaying them one politician and one day at a time,
+then the whole CopyTrader path (symbol routing, price store reads) on a warm store. Trades and prices
+are synthetic: ~500 politicians, each trading out of their own few dozen tickers, 5 years of closes.
+
+Run from the repo root:  python -m benchmarks.bench_backtest [--trades 100000] [--tickers 3000] [--sample 5]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.backtest import CopyTrader, simulate
+from src.analysis.price_store import FixturePriceProvider, PriceStore
+from test_backtest import naive_backtest
+from test_price_store import synthetic_prices
+
+TODAY = pd.Timestamp("2025-12-01 15:30")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trades", type=int, default=100_000)
+    parser.add_argument("--tickers", type=int, default=3000)
+    parser.add_argument("--politicians", type=int, default=500)
+    parser.add_argument("--sample", type=int, default=5, help="politicians timed on the day-by-day replay")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    symbols = np.array(["".join(chr(65 + int(d)) for d in f"{i:04d}") for i in range(args.tickers)])
+    closes = synthetic_prices(list(symbols), start="2020-12-01", end=TODAY.normalize())
+    who = rng.integers(0, args.politicians, args.trades)
+    universe = rng.integers(0, args.tickers, (args.politicians, 60))
+    trades = pd.DataFrame({
+        "politician": np.char.add("Member ", who.astype(str)),
+        "symbol": symbols[universe[who, rng.integers(0, 60, args.trades)]],
+        "date": TODAY.normalize() - pd.to_timedelta(rng.integers(0, 1800, args.trades), unit="D"),
+        "side": rng.choice([1, -1], args.trades, p=[0.6, 0.4]),
+        "amount": rng.choice([8000.0, 32500.0, 75000.0, 175000.0, 375000.0], args.trades),
+    })
+    print(f"{args.trades:,} trades by {args.politicians} politicians over {args.tickers} tickers, "
+          f"{len(closes):,} trading days\n")
+
+    start = time.perf_counter()
+    result = simulate(closes, trades["politician"], trades["symbol"], trades["date"], trades["side"], trades["amount"])
+    fast = time.perf_counter() - start
+    print(f"{'simulate, all politicians':<32}{fast:>8.2f} s")
+
+    sample = trades[trades["politician"].isin(result.equity.columns[:args.sample])]
+    start = time.perf_counter()
+    expected = naive_backtest(closes, sample)
+    slow = (time.perf_counter() - start) / args.sample * result.equity.shape[1]
+    print(f"{'day-by-day replay (projected)':<32}{slow:>8.2f} s  ({slow / fast:,.0f}x)")
+
+    worst = max(np.max(np.abs(result.equity[name] - equity)) for name, (equity, _) in expected.items())
+    print(f"\nmax |simulate - replay| equity over the sample: {worst:.1e}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceStore(Path(tmp) / "prices", provider=FixturePriceProvider(closes), clock=lambda: TODAY)
+        df = pd.DataFrame({
+            "senator": trades["politician"], "ticker": trades["symbol"],
+            "asset_description": trades["symbol"] + " Inc", "asset_type": "Stock",
+            "type": trades["side"].map({1: "Buy", -1: "Sell"}), "disclosure_date": trades["date"],
+            "amount_est": trades["amount"],
+        })
+        trader = CopyTrader(prices=store)
+        # Warm the store: everything below reads memory
+        trader.run(df, end=TODAY)
+        start = time.perf_counter()
+        trader.run(df, end=TODAY)
+        print(f"{'CopyTrader.run, warm store':<32}{time.perf_counter() - start:>8.2f} s")
+
+    summary = result.summary
+    print(f"\nmedian copy-trader: {summary['annual_return'].median():+.1%} a year, "
+          f"max drawdown {summary['max_drawdown'].median():.1%}, turnover {summary['turnover'].median():.1f}x")
+
+
+if __name__ == "__main__":
+    main()
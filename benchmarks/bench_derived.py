@@ -0,0 +1,64 @@
+"""
+Cold start with the derived-results store: every trade already has stored enrichment and CAR,
+so refresh_derived only has to work out that nothing is missing. Before, every restart redid one
+Yahoo lookup per ticker and one event study per trade.
+
+Run from the repo root:  python -m benchmarks.bench_derived [--rows 100000 1000000]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_normalize import synthetic_rows
+from src.analysis.metrics import EventStudy
+from src.enrichment.asset_metadata import AssetEnricher
+from src.enrichment.entity_resolver import EntityResolver
+from src.data_store import query_trades, save_local_data, save_results
+import src.data_store as data_store
+from src.ingestion.capitol_client import CapitolTradesClient
+from src.pipeline import refresh_derived
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'trades':>10}{'save results s':>16}{'cold refresh s':>16}{'beaters query ms':>18}")
+    for n in args.rows:
+        df = CapitolTradesClient()._normalize_data(synthetic_rows(n))
+        rng = np.random.default_rng(0)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            data_store.DATA_PATH = Path(tmp) / "history"
+            save_local_data(df)
+
+            start = time.perf_counter()
+            save_results('enrichment', df.assign(sector="Technology", industry="Software", name="x", market_cap=1.0,
+                                                    metadata_status='final'),
+                         AssetEnricher.RESULTS_VERSION)
+            # Every event window closed, so nothing is legitimately due for a recompute
+            save_results('car', df.assign(car_30d=rng.normal(0, 0.05, len(df)), car_status='final'),
+                         EventStudy().results_version)
+            saved = time.perf_counter() - start
+
+            start = time.perf_counter()
+            # No security master: nothing gets (re)resolved either
+            counts = refresh_derived(df, resolver=EntityResolver(pd.DataFrame(columns=['ticker', 'name'])))
+            cold = time.perf_counter() - start
+            assert counts['enrichment'] == counts['car'] == 0, counts
+
+            start = time.perf_counter()
+            query_trades(columns=['senator', 'ticker', 'car_30d'], min_values={'car_30d': 0.05},
+                         order_by='car_30d', descending=True, limit=10)
+            query = time.perf_counter() - start
+
+        print(f"{len(df):>10,}{saved:>16.1f}{cold:>16.2f}{query * 1000:>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
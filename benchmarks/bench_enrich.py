@@ -0,0 +1,82 @@
+"""
+Enrichment cost when a few trades are new: the old per-row apply over the whole frame, the
+per-distinct-ticker enrich_dataframe, and enrich_missing (only rows without metadata).
+The provider is offline and sleeps per call to stand in for Yahoo; the cache starts cold.
+
+Run from the repo root:  python -m benchmarks.bench_enrich [--rows 100000] [--new 500] [--latency 0.005]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.bench_normalize import synthetic_rows
+from src.enrichment.asset_metadata import AssetEnricher, normalize_ticker
+from src.enrichment.metadata_cache import MetadataCache
+from src.ingestion.capitol_client import CapitolTradesClient
+
+
+class SleepyProvider:
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    def fetch(self, symbol):
+        self.calls += 1
+        time.sleep(self.latency)
+        return {"name": symbol, "sector": "Technology", "industry": "Software", "market_cap": 1}
+
+
+def run(label, fn, provider):
+    start = time.perf_counter()
+    fn()
+    print(f"{label:<34}{time.perf_counter() - start:>10.2f}{provider.calls:>16,}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--new", type=int, default=500, help="trades without metadata yet")
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds per provider call")
+    args = parser.parse_args()
+
+    df = CapitolTradesClient()._normalize_data(synthetic_rows(args.rows))
+    print(f"{len(df):,} trades, {df['ticker'].nunique():,} distinct tickers, {args.new} new\n")
+    print(f"{'':<34}{'seconds':>10}{'provider calls':>16}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def enricher(name, provider, **kwargs):
+            return AssetEnricher(cache=MetadataCache(Path(tmp) / f"{name}.sqlite"), provider=provider,
+                                 requests_per_second=0, **kwargs)
+
+        # Old shape: one lookup per row, serial, a per-instance dict the only cache
+        provider = SleepyProvider(args.latency)
+        memo = {}
+
+        def old_get(ticker):
+            symbol = normalize_ticker(ticker)
+            if symbol is not None and symbol not in memo:
+                memo[symbol] = provider.fetch(symbol)
+            return memo.get(symbol)
+
+        run("per-row apply, serial", lambda: df['ticker'].astype(object).apply(old_get), provider)
+
+        provider = SleepyProvider(args.latency)
+        pooled = enricher("pooled", provider)
+        run("enrich_dataframe (distinct, pool)", lambda: pooled.enrich_dataframe(df), provider)
+
+        # Everything enriched except a batch of new trades, some on tickers never seen before
+        enriched = pooled.enrich_dataframe(df)
+        rng = np.random.default_rng(0)
+        new_rows = rng.choice(len(enriched), args.new, replace=False)
+        enriched.loc[new_rows, 'sector'] = None
+        enriched.loc[new_rows[: args.new // 10], 'ticker'] = [f"NEW{i}" for i in range(args.new // 10)]
+        provider = SleepyProvider(args.latency)
+        pooled.provider = provider
+        run("enrich_missing (new rows only)", lambda: pooled.enrich_missing(enriched), provider)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Per-page table extraction: locator-per-cell walk vs one bulk evaluation.
+
+Runs against the saved fixture page, so no network needed.
+Run from the repo root:  python -m benchmarks.bench_extraction [--repeats 5]
+"""
+import argparse
+import time
+from pathlib import Path
+
+from playwright.sync_api import sync_playwright
+
+from src.ingestion.capitol_client import CapitolTradesClient
+
+FIXTURE = Path(__file__).resolve().parent.parent / "fixtures" / "trades_page.html"
+
+
+def time_extraction(page, client, repeats):
+    timings = []
+    rows = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        rows = client._rows_to_raw(client._read_table(page))
+        timings.append(time.perf_counter() - start)
+    return min(timings), sum(timings) / len(timings), rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        page.goto(FIXTURE.as_uri())
+
+        legacy_best, legacy_avg, legacy_rows = time_extraction(page, CapitolTradesClient(bulk_extract=False), args.repeats)
+        bulk_best, bulk_avg, bulk_rows = time_extraction(page, CapitolTradesClient(bulk_extract=True), args.repeats)
+
+        browser.close()
+
+    assert legacy_rows == bulk_rows, "bulk extraction changed the raw rows"
+
+    print(f"Fixture: {FIXTURE.name} ({len(bulk_rows)} rows), {args.repeats} repeats")
+    print(f"{'mode':<10}{'best ms/page':>15}{'avg ms/page':>15}")
+    print(f"{'per-cell':<10}{legacy_best * 1000:>15.1f}{legacy_avg * 1000:>15.1f}")
+    print(f"{'bulk':<10}{bulk_best * 1000:>15.1f}{bulk_avg * 1000:>15.1f}")
+    print(f"Speedup: {legacy_best / bulk_best:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
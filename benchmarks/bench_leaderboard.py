@@ -0,0 +1,54 @@
+"""
+Leaderboard cost: amount-weighted mean CAR per politician, party and chamber with bootstrap CIs and
+permutation p-values, for a synthetic trade history (~500 politicians), computed from scratch, then
+served from memory, from disk (a restarted app), and redone after one CAR changes.
+
+Run from the repo root:  python -m benchmarks.bench_leaderboard [--trades 100000] [--resamples 1000]
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_normalize import synthetic_rows
+from src.analysis.leaderboard import Leaderboard
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trades", type=int, default=100_000)
+    parser.add_argument("--resamples", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(synthetic_rows(args.trades))[["politician_raw"]]
+    df["type"] = rng.choice(["Buy", "Sell"], args.trades, p=[0.6, 0.4])
+    df["amount_est"] = rng.choice([8000.0, 32500.0, 75000.0, 175000.0, 375000.0, 750000.0], args.trades)
+    df["car_30d"] = rng.normal(0.002, 0.06, args.trades)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        board = Leaderboard(n_boot=args.resamples, path=tmp)
+        print(f"{args.trades:,} trades, {df['politician_raw'].nunique()} politicians, "
+              f"{args.resamples:,} resamples\n")
+
+        def timed(label, fn):
+            start = time.perf_counter()
+            tables = fn()
+            print(f"{label:<24}{time.perf_counter() - start:>9.3f} s")
+            return tables
+
+        tables = timed("from scratch", lambda: board.compute(df))
+        timed("cached, in memory", lambda: board.compute(df))
+        timed("cached, on disk", lambda: Leaderboard(n_boot=args.resamples, path=tmp).compute(df))
+        df.loc[0, "car_30d"] += 0.01
+        timed("one CAR restated", lambda: board.compute(df))
+
+    print()
+    party = tables["party"].assign(amount=lambda t: t["amount"].round().astype(int))
+    print(party.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+
+if __name__ == "__main__":
+    main()
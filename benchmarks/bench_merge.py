@@ -0,0 +1,57 @@
+"""
+Cost of merging a small scrape batch into the store as history grows:
+old concat + drop_duplicates + full rewrite vs trade-id index + one appended segment.
+
+Run from the repo root:  python -m benchmarks.bench_merge [--history 10000 100000 1000000] [--batch 200]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.bench_normalize import synthetic_rows
+from src.data_store import DEDUPE_KEYS, merge_new_trades, save_local_data
+from src.ingestion.capitol_client import CapitolTradesClient
+
+
+def old_merge(df_local, df_new, path):
+    df_combined = pd.concat([df_local, df_new])
+    df_combined = df_combined.drop_duplicates(subset=DEDUPE_KEYS, keep='last')
+    df_combined.to_parquet(path, index=False)
+    return df_combined
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--batch", type=int, default=200, help="new scrape size; half of it overlaps the history")
+    args = parser.parse_args()
+
+    client = CapitolTradesClient()
+    print(f"{'history':>10}{'old merge s':>14}{'id-index merge s':>18}{'appended':>10}")
+
+    for n in args.history:
+        rows = synthetic_rows(n + args.batch // 2, seed=n)
+        history = client._normalize_data(rows[:n])
+        # Overlap is the tail of the history, re-scraped, plus genuinely new trades
+        batch = client._normalize_data(rows[n - args.batch // 2:])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = Path(tmp) / "history"
+            save_local_data(history, store)
+
+            start = time.perf_counter()
+            old_merge(history, batch, Path(tmp) / "old.parquet")
+            old_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            fresh = merge_new_trades(batch, store)
+            new_s = time.perf_counter() - start
+
+        print(f"{n:>10,}{old_s:>14.3f}{new_s:>18.4f}{len(fresh):>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Throughput of CapitolTradesClient._normalize_data on synthetic raw rows,
+against the old row-at-a-time version (kept in test_normalize.py).
+
+Run from the repo root:  python -m benchmarks.bench_normalize [--sizes 10000 100000 1000000] [--legacy-max 100000]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.ingestion.capitol_client import CapitolTradesClient
+from test_normalize import legacy_normalize
+
+SIZES = ["1K–15K", "15K–50K", "50K–100K", "100K–250K", "250K–500K", "500K–1M", "1M–5M", "5M–25M", "< 1K"]
+TYPES = ["BUY", "SELL", "EXCHANGE", "RECEIVE"]
+PARTIES = ["DemocratSenate", "RepublicanSenate", "DemocratHouse", "RepublicanHouse", "OtherHouse"]
+
+
+def synthetic_rows(n, seed=0):
+    """Raw dicts shaped like the scraper output: ~500 politicians, ~5k issuers, 5 years of dates."""
+    rng = np.random.default_rng(seed)
+
+    politicians = np.array([f"Member {i}\n{PARTIES[i % len(PARTIES)]}{'ABCDEFGHIJ'[i % 10]}X" for i in range(500)])
+    issuers = np.array([f"Issuer {i} Inc\nT{i:04d}:US" if i % 50 else f"Private Fund {i} LP" for i in range(5000)])
+    days = pd.date_range("2021-01-01", "2025-12-31", freq="D")
+    dates = np.array([f"{d.day} {d.strftime('%b')}\n{d.year}" for d in days])
+    relative = np.array(["06:01\nToday", "23:45\nYesterday"])
+
+    pub = dates[rng.integers(0, len(dates), n)]
+    pub[rng.random(n) < 0.02] = relative[rng.integers(0, 2)]
+
+    return pd.DataFrame({
+        "politician_raw": politicians[rng.integers(0, len(politicians), n)],
+        "issuer_raw": issuers[rng.integers(0, len(issuers), n)],
+        "pub_date_raw": pub,
+        "trade_date_raw": dates[rng.integers(0, len(dates), n)],
+        "type_raw": np.array(TYPES)[rng.integers(0, len(TYPES), n)],
+        "size_raw": np.array(SIZES)[rng.integers(0, len(SIZES), n)],
+    }).to_dict("records")
+
+
+def best_of(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max", type=int, default=100_000,
+                        help="skip the row-at-a-time version above this many rows (it takes minutes)")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    client = CapitolTradesClient()
+    print(f"{'rows':>10}{'vectorized s':>15}{'rows/s':>14}{'legacy s':>12}{'rows/s':>14}{'speedup':>10}")
+
+    for n in args.sizes:
+        rows = synthetic_rows(n)
+        fast = best_of(lambda: client._normalize_data(rows), args.repeats)
+
+        if n <= args.legacy_max:
+            slow = best_of(lambda: legacy_normalize(rows), 1)
+            legacy_cols = f"{slow:>12.2f}{n / slow:>14,.0f}{slow / fast:>9.1f}x"
+        else:
+            legacy_cols = f"{'-':>12}{'-':>14}{'-':>10}"
+
+        print(f"{n:>10,}{fast:>15.3f}{n / fast:>14,.0f}{legacy_cols}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Scaling of the event engine across a process pool: every EventStudy horizon (CAR + BHAR) for a
+multi-year history at 1, 2, 4 and 8 workers, tickers sharded across processes. Prices are synthetic
+and already in the local store, so this measures the computation only. Every run is checked against
+the single-process result, bit for bit.
+
+Run from the repo root:  python -m benchmarks.bench_parallel_event_engine [--trades 1000000] [--tickers 3000]
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.event_engine import batch_event_returns
+from src.analysis.metrics import HORIZONS
+from src.analysis.price_store import FixturePriceProvider, PriceStore
+from test_price_store import synthetic_prices
+
+TODAY = pd.Timestamp("2025-12-01 15:30")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trades", type=int, default=1_000_000)
+    parser.add_argument("--tickers", type=int, default=3000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    symbols = ["".join(chr(65 + int(d)) for d in f"{i:04d}") for i in range(args.tickers)]
+    trades = pd.DataFrame({
+        "symbol": rng.choice(symbols, args.trades),
+        "date": pd.Timestamp("2025-08-15") - pd.to_timedelta(rng.integers(0, 3000, args.trades), unit="D"),
+    })
+    prices = synthetic_prices(symbols, start="2016-01-01", end=TODAY.normalize())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceStore(Path(tmp) / "prices", provider=FixturePriceProvider(prices), clock=lambda: TODAY)
+        # Warm the store: everything below reads memory
+        batch_event_returns(store, trades["symbol"], trades["date"], horizons=HORIZONS)
+        print(f"{args.trades:,} trades over {args.tickers} tickers, 10 years of daily closes, "
+              f"{len(HORIZONS)} horizons, {os.cpu_count()} CPUs\n")
+        print(f"{'workers':>8}{'seconds':>10}{'trades/s':>14}{'speedup':>10}  identical")
+
+        baseline, base_time = None, None
+        for workers in args.workers:
+            start = time.perf_counter()
+            result = batch_event_returns(store, trades["symbol"], trades["date"], horizons=HORIZONS, workers=workers)
+            elapsed = time.perf_counter() - start
+            if baseline is None:
+                baseline, base_time = result, elapsed
+            same = result.equals(baseline)
+            print(f"{workers:>8}{elapsed:>10.2f}{args.trades / elapsed:>14,.0f}{base_time / elapsed:>9.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
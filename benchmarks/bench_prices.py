@@ -0,0 +1,80 @@
+"""
+Price downloads for a batch of CAR calculations: the old one-download-per-trade shape, then the
+local price store cold (empty directory), warm (next run, same trades) and a day later (one new bar).
+The provider serves synthetic closes offline and sleeps per request to stand in for Yahoo.
+
+Run from the repo root:  python -m benchmarks.bench_prices [--trades 2000] [--tickers 300] [--latency 0.05]
+"""
+import argparse
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.metrics import EventStudy
+from src.analysis.price_store import FixturePriceProvider, PriceStore
+from test_price_store import synthetic_prices
+
+TODAY = pd.Timestamp("2025-12-01 15:30")
+
+
+class SleepyProvider(FixturePriceProvider):
+    def __init__(self, prices, latency):
+        super().__init__(prices)
+        self.latency = latency
+
+    def fetch(self, symbols, start, end):
+        time.sleep(self.latency)
+        return super().fetch(symbols, start, end)
+
+
+def run(label, fn, provider):
+    provider.calls.clear()
+    start = time.perf_counter()
+    fn()
+    print(f"{label:<34}{time.perf_counter() - start:>10.2f}{len(provider.calls):>16,}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trades", type=int, default=2000)
+    parser.add_argument("--tickers", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per provider request")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # Letters only, or the asset classifier won't take them for listed symbols
+    symbols = ["".join(chr(65 + int(d)) for d in f"{i:04d}") for i in range(args.tickers)]
+    prices = synthetic_prices(symbols, start="2023-06-01", end=TODAY.normalize())
+    trades = pd.DataFrame({
+        "ticker": rng.choice(symbols, args.trades),
+        "asset_description": "Synthetic Corp",
+        "transaction_date": pd.Timestamp("2025-10-15") - pd.to_timedelta(rng.integers(0, 540, args.trades), unit="D"),
+    })
+    print(f"{args.trades:,} trades over {args.tickers} tickers, {args.latency * 1000:.0f} ms per request\n")
+    print(f"{'':<34}{'seconds':>10}{'provider calls':>16}")
+
+    provider = SleepyProvider(prices, args.latency)
+    # Old shape: every trade downloads its ticker + the benchmark over its own ~235 day window
+    sample = trades.head(200)
+    start = time.perf_counter()
+    for ticker, date in zip(sample["ticker"], sample["transaction_date"]):
+        provider.fetch([ticker, "^GSPC"], date - timedelta(days=200), date + timedelta(days=34))
+    per_trade = (time.perf_counter() - start) / len(sample)
+    print(f"{'download per trade (extrapolated)':<34}{per_trade * args.trades:>10.2f}{args.trades:>16,}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def study(now=TODAY):
+            return EventStudy(prices=PriceStore(Path(tmp) / "prices", provider=provider, clock=lambda: now))
+
+        run("price store, cold", lambda: study().analyze_batch(trades.copy()), provider)
+        run("price store, warm (next run)", lambda: study().analyze_batch(trades.copy()), provider)
+        tomorrow = TODAY + timedelta(days=1)
+        run("price store, a day later", lambda: study(tomorrow).analyze_batch(trades.copy()), provider)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Filter latency of the SQLite query mirror against boolean masks over the fully loaded frame
+(what app.py did on every rerun). st.cache_data hands back a pickled copy of the frame on every
+hit, so the old per-rerun cost is that copy plus the mask; both are printed.
+
+Run from the repo root:  python -m benchmarks.bench_query [--rows 1000000]
+"""
+import argparse
+import pickle
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.bench_normalize import synthetic_rows
+from src.data_store import aggregate_trades, load_local_data, query_trades, save_local_data, save_results
+import src.data_store as data_store
+from src.ingestion.capitol_client import CapitolTradesClient
+
+SECTORS = ["Technology", "Financial Services", "Healthcare", "Energy", "Industrials", "Utilities"]
+
+
+def best_of(fn, repeats=5):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = CapitolTradesClient()._normalize_data(synthetic_rows(args.rows))
+    df['sector'] = np.array(SECTORS)[np.random.default_rng(1).integers(0, len(SECTORS), len(df))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = Path(tmp) / "history"
+        data_store.DATA_PATH = store
+        save_local_data(df)
+
+        start = time.perf_counter()
+        save_results('enrichment', df[['trade_id', 'sector']], version='bench')  # also builds the mirror
+        print(f"{len(df):,} rows. Mirror build + sector upsert: {time.perf_counter() - start:.1f} s (one-off)\n")
+
+        start = time.perf_counter()
+        frame = load_local_data()
+        print(f"load_local_data: {time.perf_counter() - start:.2f} s")
+        cache_hit = best_of(lambda: pickle.loads(pickle.dumps(frame)), repeats=3)
+        print(f"st.cache_data hit (pickle copy of the frame), paid on every rerun: {cache_hit * 1000:.0f} ms\n")
+
+        senator = frame['senator'].value_counts().index[0]
+        ticker = frame['ticker'].value_counts().index[0]
+        cases = {
+            "one senator": (
+                lambda: frame[frame['senator'].isin([senator])],
+                lambda: query_trades(senators=[senator]),
+            ),
+            "one ticker": (
+                lambda: frame[frame['ticker'] == ticker],
+                lambda: query_trades(tickers=[ticker]),
+            ),
+            "senator + sector": (
+                lambda: frame[frame['senator'].isin([senator]) & frame['sector'].isin(["Energy"])],
+                lambda: query_trades(senators=[senator], sectors=["Energy"]),
+            ),
+            "one month": (
+                lambda: frame[(frame['transaction_date'] >= "2024-03-01") & (frame['transaction_date'] <= "2024-03-31")],
+                lambda: query_trades(start_date="2024-03-01", end_date="2024-03-31"),
+            ),
+            "senator volume by sector": (
+                lambda: frame[frame['senator'].isin([senator])].groupby('sector', observed=True)['amount_est'].sum(),
+                lambda: aggregate_trades(['volume'], group_by='sector', senators=[senator]),
+            ),
+        }
+
+        print(f"{'filter':<26}{'rows':>9}{'mask ms':>10}{'copy + mask ms':>16}{'sqlite ms':>12}")
+        for name, (mask, sql) in cases.items():
+            rows = len(sql())
+            masked = best_of(mask)
+            print(f"{name:<26}{rows:>9,}{masked * 1000:>10.1f}{(cache_hit + masked) * 1000:>16.1f}"
+                  f"{best_of(sql) * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
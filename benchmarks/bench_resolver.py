@@ -0,0 +1,87 @@
+"""
+EntityResolver throughput: index build/load over a synthetic security master, then batch lookups
+of descriptions (exact names, misspelt names, and names that shouldn't match anything).
+
+Run from the repo root:  python -m benchmarks.bench_resolver [--master 50000] [--queries 5000]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import src.enrichment.entity_resolver as entity_resolver
+from src.enrichment.entity_resolver import EntityResolver
+
+WORDS = ["American", "Global", "Pacific", "United", "First", "National", "Capital", "Energy", "Health", "Digital",
+         "Systems", "Resources", "Therapeutics", "Industries", "Financial", "Technologies", "Brands", "Realty",
+         "Partners", "Networks", "Materials", "Holdings", "Bancorp", "Pharmaceuticals", "Semiconductor"]
+SUFFIXES = ["Inc", "Corp", "Co", "Ltd", "PLC", "Group Inc", "Holdings Inc"]
+
+
+def synthetic_master(n, rng):
+    stems = [f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(WORDS)}{i}" for i in range(n)]
+    return pd.DataFrame({
+        "ticker": [f"S{i:05d}" for i in range(n)],
+        "name": [f"{s} {rng.choice(SUFFIXES)}" for s in stems],
+    })
+
+
+def typo(name, rng):
+    chars = list(name)
+    i = rng.integers(1, len(chars) - 1)
+    chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    return "".join(chars).upper()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--master", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=5_000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    master = synthetic_master(args.master, rng)
+    picks = master["name"].sample(args.queries, random_state=1, replace=True).tolist()
+    thirds = args.queries // 3
+    queries = (picks[:thirds]
+               + [typo(n, rng) for n in picks[thirds:2 * thirds]]
+               + [f"COUNTY OF {rng.choice(WORDS).upper()} SCHOOL DISTRICT {i}" for i in range(args.queries - 2 * thirds)])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "security_master.csv"
+        master.to_csv(path, index=False)
+        entity_resolver.INDEX_CACHE_DIR = Path(tmp) / "cache"
+
+        start = time.perf_counter()
+        EntityResolver.load(path)
+        print(f"master {args.master:,} names: build + pickle index {time.perf_counter() - start:.2f} s")
+
+        start = time.perf_counter()
+        resolver = EntityResolver.load(path)
+        print(f"load prebuilt index: {time.perf_counter() - start:.2f} s")
+
+        start = time.perf_counter()
+        out = resolver.resolve_many(queries)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        resolver.resolve_many(queries)
+        warm = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for q in queries[thirds:thirds + 200]:
+            resolver.resolve(q + " X")  # never memoized before
+        single = (time.perf_counter() - start) / 200
+
+    matched = out["ticker"].notna()
+    print(f"\n{args.queries:,} descriptions: {matched[:2 * thirds].mean():.1%} of real names matched, "
+          f"{matched[2 * thirds:].mean():.1%} of the rest")
+    print(f"batch, cold:       {cold:.3f} s  ({cold / args.queries * 1e6:.0f} us / lookup)")
+    print(f"batch, memoized:   {warm:.3f} s  ({warm / args.queries * 1e6:.1f} us / lookup)")
+    print(f"one at a time:     {single * 1e3:.2f} ms / lookup")
+
+
+if __name__ == "__main__":
+    main()
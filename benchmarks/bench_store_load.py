@@ -0,0 +1,84 @@
+"""
+Cold-load time and peak memory: legacy CSV store vs the typed Parquet store.
+
+Each measurement runs in a fresh interpreter so peak RSS isn't polluted by earlier runs
+(peak is read from /proc, so Linux only).
+Run from the repo root:  python -m benchmarks.bench_store_load [--rows 100000 1000000]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.bench_normalize import synthetic_rows
+from src.data_store import _segment_files, save_local_data
+from src.ingestion.capitol_client import CapitolTradesClient
+
+CHILD = r"""
+import json, sys, time
+import pandas as pd
+
+def high_water_kb():
+    # VmHWM resets on exec, unlike ru_maxrss which Linux carries over from the parent
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+
+path, mode = sys.argv[1], sys.argv[2]
+base = high_water_kb()
+start = time.perf_counter()
+if mode == "csv":
+    df = pd.read_csv(path)
+    df["transaction_date"] = pd.to_datetime(df["transaction_date"], format="ISO8601")
+    df["disclosure_date"] = pd.to_datetime(df["disclosure_date"], format="ISO8601")
+elif mode == "parquet":
+    df = pd.read_parquet(path)
+else:
+    df = pd.read_parquet(path, columns=["senator", "ticker", "transaction_date", "amount_est", "type"],
+                         filters=[("transaction_date", ">=", pd.Timestamp("2025-01-01"))])
+elapsed = time.perf_counter() - start
+peak = high_water_kb()
+print(json.dumps({"seconds": elapsed, "peak_mb": (peak - base) / 1024, "rows": len(df)}))
+"""
+
+MODES = [
+    ("csv", "CSV + 2x to_datetime"),
+    ("parquet", "Parquet, all columns"),
+    ("projected", "Parquet, 5 cols, 2025+"),
+]
+
+
+def measure(path, mode, repeats):
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, "-c", CHILD, str(path), mode], capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return min(runs, key=lambda r: r["seconds"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    client = CapitolTradesClient()
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.rows:
+            df = client._normalize_data(synthetic_rows(n))
+            csv_path = Path(tmp) / f"history_{n}.csv"
+            df.to_csv(csv_path, index=False)
+            save_local_data(df, Path(tmp) / f"history_{n}")
+            parquet_path = _segment_files(Path(tmp) / f"history_{n}")[0]
+
+            print(f"\n{n:,} rows  (CSV {csv_path.stat().st_size / 1e6:.1f} MB, "
+                  f"Parquet {parquet_path.stat().st_size / 1e6:.1f} MB)")
+            print(f"{'path':<26}{'load s':>10}{'peak MB':>10}{'rows':>12}")
+            for mode, label in MODES:
+                r = measure(csv_path if mode == "csv" else parquet_path, mode, args.repeats)
+                print(f"{label:<26}{r['seconds']:>10.3f}{r['peak_mb']:>10.1f}{r['rows']:>12,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+from src.data_store import renormalize
+
+# Rebuilds data/processed from the raw page archive (data/raw/capitoltrades).
+# Run this after changing any parsing logic. No scraping involved.
+print("Re-normalizing from the raw archive...")
+count = renormalize()
+print(f"Done. {count} records.")
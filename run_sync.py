@@ -1,23 +1,16 @@
 from src.data_store import sync_data
-from src.enrichment.asset_metadata import AssetEnricher
-import pandas as pd
+from src.pipeline import refresh_derived
 
 print("Starting full sync...")
 # 1. Scrape
 df = sync_data()
 print(f"Scraped {len(df)} records.")
 
-# 2. Enrich
+# 2. Enrich + CAR
+# Results are saved per trade (data_store derived results), so the app and later runs reuse them.
+# Only trades without a result from the current code version get computed here.
 print("Starting enrichment...")
-enricher = AssetEnricher()
-df_enriched = enricher.enrich_dataframe(df)
-print("Enrichment complete.")
-
-# Save back just in case sync_data didn't save the enriched version (it doesn't, it saves raw)
-# But wait, the app pipeline enriches on the fly or saves?
-# app.py: get_data_pipeline calls sync_data(), then enricher.enrich_dataframe(df). 
-# It does NOT save the enriched data back to CSV. It caches it in memory with @st.cache_data.
-# So the CSV remains raw. That's fine.
-# However, to "test" if errors are gone, I should run the enrichment here.
+counts = refresh_derived(df)
+print(f"Enrichment complete. Enriched {counts['enrichment']}, scored {counts['car']}, "
+      f"skipped {counts['calls_avoided']} network calls for assets Yahoo can't price.")
 print("Done.")
-
@@ -1,23 +1,86 @@
 from playwright.sync_api import sync_playwright
+from src.ingestion.capitol_client import ROWS_JS
 import json
+import os
 import time
 import random
 
-
-def scrape_capitol_trades_90d():
-    results = []
-
-    with sync_playwright() as p:
+OUTPUT_FILE = "capitol_trades_90d.jsonl"
+CHECKPOINT_FILE = "capitol_trades_90d.checkpoint.json"
+
+
+def iter_trades(path=OUTPUT_FILE):
+    """
+    Lazily yields one trade dict per line of the JSONL output.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def load_checkpoint(path=CHECKPOINT_FILE):
+    """
+    Where an interrupted run left off: the next page to scrape and how many bytes
+    of output belong to pages that finished. No checkpoint means start fresh.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"next_page": 1, "offset": 0}
+
+
+def save_checkpoint(next_page, offset, path=CHECKPOINT_FILE):
+    # Write-then-rename so a crash mid-write can't corrupt the checkpoint
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"next_page": next_page, "offset": offset}, f)
+    os.replace(tmp, path)
+
+
+def cells_to_trade(cells):
+    # Each cell's text is read once; split it instead of asking the browser again
+    politician = cells[0].split('\n')
+    issuer = cells[1].split('\n')
+    return {
+        "politician": politician[0],
+        "party_state": politician[1] if len(politician) > 1 else "",
+        "issuer": issuer[0],
+        "ticker": issuer[1] if len(issuer) > 1 else "",
+        "pub_date": cells[2],
+        "trade_date": cells[3],
+        "filed_after": cells[4].replace("days", "").strip(),
+        "owner": cells[5],
+        "type": cells[6],
+        "size": cells[7],
+        "price": cells[8]
+    }
+
+
+def scrape_capitol_trades_90d(output_path=OUTPUT_FILE, checkpoint_path=CHECKPOINT_FILE):
+    checkpoint = load_checkpoint(checkpoint_path)
+    current_page = checkpoint["next_page"]
+    total = 0
+
+    # Throw away anything written after the last finished page (a crash mid-page)
+    with open(output_path, "a+b") as f:
+        f.truncate(checkpoint["offset"])
+
+    with sync_playwright() as p, open(output_path, "a", encoding="utf-8") as out:
         browser = p.chromium.launch(headless=False)
         context = browser.new_context()
         page = context.new_page()
 
-        print("Starting scraper for the last 90 days...")
+        if current_page > 1:
+            print(f"Resuming from page {current_page}...")
+        else:
+            print("Starting scraper for the last 90 days...")
 
-        current_page = 1
         # 90 days is usually around 5-10 pages, but we set 50 to be safe.
         # The script will auto-stop when it hits an empty page.
         max_pages = 50
+        finished = True
 
         while current_page <= max_pages:
             # UPDATED URL: Added 'txDate=90d' to filter results
@@ -27,8 +90,8 @@ def scrape_capitol_trades_90d():
             try:
                 page.goto(url)
 
-                # Handle Cookie Banner (First page only)
-                if current_page == 1:
+                # Handle Cookie Banner (first page of this run only)
+                if current_page == checkpoint["next_page"]:
                     try:
                         cookie_button = page.get_by_role("button", name="Accept All")
                         if cookie_button.is_visible(timeout=3000):
@@ -44,8 +107,8 @@ def scrape_capitol_trades_90d():
                     print("Timed out waiting for data. Reached the end or page is empty.")
                     break
 
-                # Extract Rows
-                rows = page.locator("tbody tr").all()
+                # Extract Rows (one browser round trip for the whole table)
+                rows = page.eval_on_selector_all("tbody tr", ROWS_JS)
                 row_count = len(rows)
                 print(f"  - Found {row_count} trades.")
 
@@ -54,45 +117,32 @@ def scrape_capitol_trades_90d():
                     print("No trades found on this page. Stopping.")
                     break
 
-                for row in rows:
-                    cells = row.locator("td").all()
-                    if len(cells) < 8: continue
-
-                    try:
-                        trade_data = {
-                            "politician": cells[0].inner_text().split('\n')[0],
-                            "party_state": cells[0].inner_text().split('\n')[1] if '\n' in cells[
-                                0].inner_text() else "",
-                            "issuer": cells[1].inner_text().split('\n')[0],
-                            "ticker": cells[1].inner_text().split('\n')[1] if '\n' in cells[1].inner_text() else "",
-                            "pub_date": cells[2].inner_text(),
-                            "trade_date": cells[3].inner_text(),
-                            "filed_after": cells[4].inner_text().replace("days", "").strip(),
-                            "owner": cells[5].inner_text(),
-                            "type": cells[6].inner_text(),
-                            "size": cells[7].inner_text(),
-                            "price": cells[8].inner_text()
-                        }
-                        results.append(trade_data)
-                    except Exception:
-                        continue
+                for cells in rows:
+                    if len(cells) < 9: continue
+                    out.write(json.dumps(cells_to_trade(cells)) + "\n")
+                    total += 1
 
+                # Page is on disk before we move the checkpoint past it
+                out.flush()
+                os.fsync(out.fileno())
                 current_page += 1
+                save_checkpoint(current_page, out.tell(), checkpoint_path)
+
                 time.sleep(random.uniform(1.0, 2.0))
 
             except Exception as e:
                 print(f"Error on page {current_page}: {e}")
+                print(f"Progress saved. Run again to resume at page {current_page}.")
+                finished = False
                 break
 
         browser.close()
 
-    # Save to JSON
-    filename = "capitol_trades_90d.json"
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=4)
+    if finished and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
 
-    print(f"Done! Scraped {len(results)} trades total.")
+    print(f"Done! Scraped {total} trades this run. Output: {output_path}")
 
 
 if __name__ == "__main__":
-    scrape_capitol_trades_90d()
\ No newline at end of file
+    scrape_capitol_trades_90d()
@@ -0,0 +1,176 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.leaderboard import trade_direction
+from src.analysis.metrics import trade_symbols
+from src.analysis.price_store import PriceStore, default_price_store
+from src.data_store import load_local_data
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+TRADING_DAYS = 252
+# Slots valued per pass: days x SLOT_CHUNK floats at a time, small enough to stay in cache
+SLOT_CHUNK = 256
+# Books under a micro-dollar are rounding residue of a closed position
+BOOK_EPS = 1e-6
+TRADE_COLUMNS = ['senator', 'ticker', 'asset_description', 'asset_type', 'type', 'disclosure_date', 'amount_est']
+SUMMARY_COLUMNS = ['trades', 'first_trade', 'invested', 'pnl', 'total_return', 'annual_return', 'volatility',
+                   'max_drawdown', 'turnover']
+
+
+class Backtest(NamedTuple):
+    equity: pd.DataFrame     # growth of $1, date x politician
+    drawdown: pd.DataFrame   # equity against its running peak, <= 0
+    turnover: pd.DataFrame   # dollars traded that day / the book before and after, averaged
+    exposure: pd.DataFrame   # book at the close, dollars
+    summary: pd.DataFrame    # one row per politician, SUMMARY_COLUMNS
+
+
+def _frames(calendar: pd.DatetimeIndex, names, *matrices) -> list:
+    columns = pd.Index(names, name='politician')
+    return [pd.DataFrame(m, index=calendar, columns=columns) for m in matrices]
+
+
+def simulate(closes: pd.DataFrame, politicians, symbols, dates, sides, amounts) -> Backtest:
+    """
+    Copy-trades every politician over closes (date x symbol, the calendar is its index).
+    One entry per trade in politicians, symbols, dates (disclosure), sides (+1 buy, -1 sell,
+    0 ignored) and amounts (dollars, buys only). Trades that can't execute (no close for the
+    symbol yet, disclosed after the last close) are skipped; so are sells of nothing.
+
+    A buy is copied at the first close on or after its disclosure date, for its amount; a sell
+    closes the whole position in that ticker at that close. Buys are paid for with new money and
+    sale proceeds are taken out, so a politician's book is just their open positions and the
+    equity curve is time-weighted: money moving in or out isn't a return.
+    All politicians at once: holdings are a (days x politician/ticker slot) share matrix made from
+    running sums of the trades, valued against the closes SLOT_CHUNK slots at a time.
+    """
+    calendar = pd.DatetimeIndex(closes.index)
+    n_days = len(calendar)
+    # Column-major, so a slot's prices are one contiguous column
+    px = np.asfortranarray(closes.ffill().to_numpy(dtype=float))
+
+    # 1. The trades that execute: the first close on or after the disclosure date
+    politicians = pd.Series(politicians, dtype=object).to_numpy()
+    col = closes.columns.get_indexer(pd.Series(symbols, dtype=object))
+    dates = pd.to_datetime(pd.Series(dates)).dt.normalize().to_numpy(dtype="datetime64[ns]")
+    day = np.searchsorted(calendar.to_numpy(dtype="datetime64[ns]"), dates)
+    side = np.asarray(sides)
+    amount = pd.to_numeric(pd.Series(amounts), errors="coerce").to_numpy(dtype=float)
+    ok = (pd.notna(politicians) & (col >= 0) & (day < n_days) & ~np.isnat(dates)
+          & ((side < 0) | ((side > 0) & (amount > 0))))
+    price = np.full(len(ok), np.nan)
+    price[ok] = px[day[ok], col[ok]]
+    ok &= price > 0
+    if not ok.any():
+        empty = _frames(calendar, [], *(np.empty((n_days, 0)),) * 4)
+        return Backtest(*empty, pd.DataFrame(columns=SUMMARY_COLUMNS).rename_axis('politician'))
+
+    # 2. Slots: one per (politician, symbol), politicians contiguous. Trades by slot, day, sells first
+    pol, names = pd.factorize(politicians[ok], sort=True)
+    keys, slot = np.unique(pol * len(closes.columns) + col[ok], return_inverse=True)
+    slot_pol, slot_col = keys // len(closes.columns), keys % len(closes.columns)
+    order = np.lexsort((side[ok], day[ok], slot))
+    slot, day, side, amount, price = slot[order], day[ok][order], side[ok][order], amount[ok][order], price[ok][order]
+
+    # 3. Shares held after every trade: a running sum of shares bought that restarts at each sell
+    # (and each new slot). A sell's trade is minus whatever the slot held before it
+    bought = np.where(side > 0, amount / price, 0.0)
+    same_slot = np.r_[False, slot[1:] == slot[:-1]]
+    restart = ~same_slot | (side < 0)
+    total = np.cumsum(bought)
+    held = total - (total - bought)[restart][np.cumsum(restart) - 1]
+    before = np.where(same_slot, np.r_[0.0, held[:-1]], 0.0)
+    delta = np.where(side > 0, bought, -before)
+    executed = delta != 0
+
+    # 4. Money in (buys) and out (sales) and dollars traded, per day and politician
+    n_pol = len(names)
+    cell = day * n_pol + slot_pol[slot]
+    flow = np.bincount(cell, delta * price, n_days * n_pol).reshape(n_days, n_pol)
+    traded = np.bincount(cell, np.abs(delta) * price, n_days * n_pol).reshape(n_days, n_pol)
+
+    # 5. The book at each close: shares held (running sum of the trades down the days) times closes,
+    # summed over each politician's slots
+    prices = np.nan_to_num(px)  # before a symbol's first close nothing can be held
+    book = np.zeros((n_days, n_pol))
+    for lo in range(0, len(keys), SLOT_CHUNK):
+        hi = min(len(keys), lo + SLOT_CHUNK)
+        a, b = np.searchsorted(slot, [lo, hi])
+        width = hi - lo
+        shares = np.bincount(day[a:b] * width + slot[a:b] - lo, delta[a:b], n_days * width).reshape(n_days, width)
+        np.cumsum(shares, axis=0, out=shares)
+        shares *= prices[:, slot_col[lo:hi]]
+        owners = slot_pol[lo:hi]
+        starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+        book[:, owners[starts]] += np.add.reduceat(shares, starts, axis=1)
+    book[np.abs(book) < BOOK_EPS] = 0.0
+
+    # 6. Daily return of what was held coming into the day; flows at the close don't count
+    opening = np.vstack([np.zeros((1, n_pol)), book[:-1]])
+    carried = book - flow
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = np.where(opening > BOOK_EPS, carried / opening - 1, 0.0)
+        # The book right before and right after the day's trades
+        average = (carried + book) / 2
+        turnover = np.where(average > BOOK_EPS, traded / average, 0.0)
+    equity = np.cumprod(1 + returns, axis=0)
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1
+
+    # 7. Per politician, from their first copied trade on
+    first = np.full(n_pol, n_days)
+    np.minimum.at(first, slot_pol[slot[executed]], day[executed])
+    active = np.arange(n_days)[:, None] >= first
+    days_active = active.sum(axis=0)
+    years = days_active / TRADING_DAYS
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_book = np.where(active, book, 0).sum(axis=0) / days_active
+        summary = pd.DataFrame({
+            'trades': np.bincount(slot_pol[slot[executed]], minlength=n_pol),
+            'first_trade': calendar[np.minimum(first, n_days - 1)],
+            'invested': np.bincount(slot_pol[slot], np.where(side > 0, amount, 0.0), n_pol),
+            'pnl': ((carried - opening) * active).sum(axis=0),
+            'total_return': equity[-1] - 1,
+            'annual_return': equity[-1] ** (1 / years) - 1,
+            'volatility': np.nanstd(np.where(active, returns, np.nan), axis=0) * np.sqrt(TRADING_DAYS),
+            'max_drawdown': drawdown.min(axis=0),
+            # One-way: half of everything traded, per average book, per year
+            'turnover': traded.sum(axis=0) / 2 / mean_book / years,
+        }, index=pd.Index(names, name='politician'))
+
+    logger.info(f"Backtested {n_pol:,} politicians: {int(executed.sum()):,} trades over {len(keys):,} positions, "
+                f"{n_days:,} days.")
+    # Politicians whose only trades were sells of nothing never had a book
+    has = summary['trades'].to_numpy() > 0
+    frames = _frames(calendar, names[has], equity[:, has], drawdown[:, has], turnover[:, has], book[:, has])
+    return Backtest(*frames, summary[has])
+
+
+class CopyTrader:
+    def __init__(self, prices: PriceStore = None, benchmark: str = "^GSPC"):
+        # Same local price store as EventStudy; trading days are the benchmark's
+        self.prices = prices or default_price_store()
+        self.benchmark = benchmark
+
+    def run(self, df: pd.DataFrame = None, end=None) -> Backtest:
+        """
+        Backtest of every politician in df (TRADE_COLUMNS; the whole trade store by default) from the
+        first disclosure to end (default today). Symbols are routed like the event study's, so bonds
+        and other unpriceable assets are left out.
+        """
+        if df is None:
+            df = load_local_data(columns=TRADE_COLUMNS)
+        symbols = pd.Series(trade_symbols(df) if not df.empty else [], index=df.index, dtype=object)
+        dates = pd.to_datetime(df['disclosure_date'])
+        end = pd.Timestamp(end if end is not None else pd.Timestamp.now()).normalize()
+        known = sorted(symbols.dropna().unique())
+        closes = pd.DataFrame()
+        if known and dates.notna().any():
+            start = dates.min()
+            self.prices.prefetch({s: (start, end) for s in known + [self.benchmark]})
+            calendar = self.prices.get(self.benchmark, start, end).index
+            closes = self.prices.get_many(known, start, end).reindex(index=calendar, columns=known)
+        return simulate(closes, df['senator'], symbols, dates, trade_direction(df['type']), df['amount_est'])
@@ -0,0 +1,294 @@
+import math
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from src.analysis.horizons import result_columns
+from src.analysis.price_store import PriceStore
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# calculate_car's windows, in calendar days around the trade date
+ESTIMATION_LEAD = timedelta(days=200)
+ESTIMATION_GAP = timedelta(days=10)
+# The per-trade download ends this long after the event window (its "+5 days", end exclusive)
+DOWNLOAD_TAIL = timedelta(days=4)
+MIN_RETURNS = 50
+# Symbols per shard of the price matrix. Bounds memory at (trading days x SYMBOL_CHUNK) per prefix-sum array
+SYMBOL_CHUNK = 256
+# How far past a trade's last window the benchmark is read: a bar after the window proves it's complete
+STATUS_LOOKAHEAD = timedelta(days=7)
+
+# Completion of a trade's results, over its longest horizon. Final results never change
+PENDING = "pending"    # no bar in the event window yet, or no answer on the symbol's prices for all of it
+PARTIAL = "partial"    # the window has started but is still open: results are partial sums
+FINAL = "final"        # the whole window (and the download's tail) is in the past, or there's nothing to price
+
+
+def _estimation_positions(calendar: np.ndarray, dates: np.ndarray):
+    """
+    Row bounds on the calendar for every trade, found with searchsorted: the first row with a return
+    (the first row of each download has none, pct_change runs inside it, hence the +1) and the
+    estimation window [lo, hi). Horizons only move the event window's end, so these are shared.
+    """
+    est_start = dates - np.timedelta64(ESTIMATION_LEAD)
+    # The download starts at midnight of est_start; slices use the trade's own time of day (if any)
+    first = np.searchsorted(calendar, est_start.astype("datetime64[D]").astype("datetime64[ns]"), side="left") + 1
+    est_lo = np.maximum(np.searchsorted(calendar, est_start, side="left"), first)
+    est_hi = np.searchsorted(calendar, dates - np.timedelta64(ESTIMATION_GAP), side="right")
+    evt_lo = np.maximum(np.searchsorted(calendar, dates, side="left"), first)
+    return first, (est_lo, np.maximum(est_hi, est_lo)), evt_lo
+
+
+def _prefix(values: np.ndarray) -> np.ndarray:
+    # Running sums with a leading zero row: sum over rows [lo, hi) is out[hi] - out[lo]
+    out = np.zeros((values.shape[0] + 1,) + values.shape[1:], order="F")
+    np.cumsum(values, axis=0, out=out[1:])
+    return out
+
+
+def _solve(A: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # Every trade's normal equations in one batched solve; min-norm least squares if any are rank deficient
+    try:
+        return np.linalg.solve(A, b[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        return (np.linalg.pinv(A) @ b[..., None])[..., 0]
+
+
+def _score(calendar: np.ndarray, market: np.ndarray, closes: np.ndarray, dates: np.ndarray,
+           col: np.ndarray, horizons, design=None) -> dict:
+    """
+    Every horizon's CAR and BHAR for the trades (dates, col: their column in closes) on one calendar.
+    closes: days x symbols on the calendar, market: the benchmark's returns on it.
+    design: the return model's regressors as (X, which, rf): X is days x m x k factor returns, which
+    picks each column's slice of X (m is 1 for market-wide factors), rf the risk-free rate taken off the
+    stock's return (or None). None is the market model, alpha + beta * market.
+    """
+    if design is None:
+        design = (market[:, None, None], np.zeros(closes.shape[1], dtype=np.int64), None)
+    X, which, rf = design
+    X = X[:, which, :]
+    k = X.shape[2]
+
+    stock = np.full_like(closes, np.nan)
+    stock[1:] = closes[1:] / closes[:-1] - 1
+    # Rows pct_change().dropna() would keep: both returns present. The regression also needs its factors
+    both = ~np.isnan(stock) & ~np.isnan(market)[:, None]
+    valid = both & ~np.isnan(X).any(axis=2)
+    excess = stock
+    if rf is not None:
+        valid &= ~np.isnan(rf)[:, None]
+        excess = stock - rf[:, None]
+    y = np.where(valid, excess, 0.0)
+    # z[0] is the intercept's column (its sums count the rows), z[1:] the factors
+    z = [valid.astype(float)] + [np.where(valid, X[..., i], 0.0) for i in range(k)]
+    zz = {(i, j): _prefix(z[i] * z[j] if i else z[j]) for i in range(k + 1) for j in range(i, k + 1)}
+    zy = [_prefix(z[i] * y if i else y) for i in range(k + 1)]
+    # log1p sums compound the buy-and-hold returns: prod(1 + r) over [lo, hi) is exp(out[hi] - out[lo])
+    log_x = _prefix(np.log1p(np.where(both, market[:, None], 0.0)))
+    log_y = _prefix(np.log1p(np.where(both, stock, 0.0)))
+
+    def window(sums, lo, hi):
+        return sums[hi, col] - sums[lo, col]
+
+    # 1. The model's coefficients, once per trade, from the estimation window sums
+    first, est, evt_lo = _estimation_positions(calendar, dates)
+    n = window(zz[0, 0], *est)
+    if k == 1:
+        # Closed-form OLS. No spread in x (one row, flat market): least squares puts it all in alpha, beta 0
+        sx, sxx, sy, sxy = window(zz[0, 1], *est), window(zz[1, 1], *est), window(zy[0], *est), window(zy[1], *est)
+        denom = n * sxx - sx * sx
+        with np.errstate(divide="ignore", invalid="ignore"):
+            beta = np.where(np.abs(denom) > 1e-18, (n * sxy - sx * sy) / denom, 0.0)
+            coef = np.stack([(sy - beta * sx) / n, beta], axis=1)
+    else:
+        # Stacked normal equations, (trades x k+1 x k+1), one batched solve
+        A = np.empty((len(dates), k + 1, k + 1))
+        for (i, j), sums in zz.items():
+            A[:, i, j] = A[:, j, i] = window(sums, *est)
+        b = np.stack([window(sums, *est) for sums in zy], axis=1)
+        # No estimation rows: nothing to solve, and it mustn't make the batch singular
+        A[n == 0], b[n == 0] = np.eye(k + 1), 0.0
+        coef = _solve(A, b)
+
+    # 2. Each horizon: two searchsorted and a few gathers per trade, whatever its length
+    results = {}
+    for h in horizons:
+        evt_end = dates + np.timedelta64(timedelta(days=h))
+        evt_hi = np.maximum(np.searchsorted(calendar, evt_end, side="right"), evt_lo)
+        all_hi = np.maximum(np.searchsorted(calendar, evt_end + np.timedelta64(DOWNLOAD_TAIL), side="right"), first)
+        n_evt = window(zz[0, 0], evt_lo, evt_hi)
+        usable = (window(zz[0, 0], first, all_hi) >= MIN_RETURNS) & (n > 0) & (n_evt > 0)
+
+        # Abnormal = actual - (alpha + beta . factors), summed: the sums do it in one go
+        expected = sum(coef[:, i] * window(zz[0, i], evt_lo, evt_hi) for i in range(k + 1))
+        car = window(zy[0], evt_lo, evt_hi) - expected
+        bhar = np.exp(window(log_y, evt_lo, evt_hi)) - np.exp(window(log_x, evt_lo, evt_hi))
+        results[f"car_{h}d"] = np.where(usable, car, np.nan)
+        results[f"bhar_{h}d"] = np.where(usable, bhar, np.nan)
+    return results
+
+
+def _shards(n_symbols: int, workers: int) -> list:
+    # Contiguous column ranges, at least one per worker, none wider than SYMBOL_CHUNK
+    size = max(1, min(SYMBOL_CHUNK, math.ceil(n_symbols / max(workers, 1))))
+    return [(lo, min(lo + size, n_symbols)) for lo in range(0, n_symbols, size)]
+
+
+def _score_shard(task) -> dict:
+    """
+    _score for one shard of symbols (columns lo:hi). Runs in a worker process when there's a pool:
+    the matrix then comes as the path of a memory-mapped .npy, so no prices get pickled.
+    """
+    source, lo, hi, calendar, market, dates, col, horizons, design = task
+    matrix = np.load(source, mmap_mode="r") if isinstance(source, str) else source
+    return _score(calendar, market, np.asarray(matrix[:, lo:hi]), dates, col, horizons, design)
+
+
+def _shard_design(design, lo: int, hi: int):
+    if design is None:
+        return None
+    X, which, rf = design
+    return X, which[lo:hi], rf
+
+
+def batch_event_returns(prices: PriceStore, symbols, dates, benchmark: str = "^GSPC", horizons=(30,),
+                        workers: int = 1, model=None) -> pd.DataFrame:
+    """
+    CAR and BHAR at every horizon for many trades at once. car_{h}d is what calculate_car(window_days=h)
+    gives one trade at a time; bhar_{h}d is the compounded return over the same event days minus the
+    benchmark's compounded return (buy-and-hold abnormal return).
+
+    One aligned matrix of closes over the benchmark's trading days, running sums over it (SYMBOL_CHUNK
+    symbols at a time), and every trade's windows located with searchsorted. Alpha/beta are the
+    closed-form OLS over the estimation window sums; every horizon after that is a difference of two
+    running sums. Symbols that trade on days the benchmark doesn't (crypto) get a calendar of their own,
+    the union of both, which is what calculate_car would see.
+
+    model: where the expected return comes from. None is calculate_car's market model; anything else
+    (metrics.FamaFrenchModel, ...) provides regressors(calendar, symbols) -> (X, which, rf), see _score.
+    The estimation then is one batched least-squares solve over every trade's stacked window sums.
+
+    workers > 1 shards the symbols across a process pool. The matrix is written once to a memory-mapped
+    file the workers read their columns from. Every number depends on its own column only, so results
+    are identical whatever the worker count.
+
+    symbols: Yahoo symbols (already cleaned), None for trades to skip. dates: trade dates.
+    Returns result_columns(horizons) for every trade, positionally (0..n-1), NaN where there's no result,
+    plus car_status: PENDING, PARTIAL or FINAL, judged on the longest horizon.
+    """
+    horizons = tuple(horizons)
+    symbols = pd.Series(symbols, dtype=object).to_numpy()
+    dates = pd.to_datetime(pd.Series(dates)).to_numpy(dtype="datetime64[ns]")
+    out = {name: np.full(len(symbols), np.nan) for name in result_columns(horizons)}
+    # Trades with no symbol or no date have nothing to wait for
+    out["car_status"] = np.full(len(symbols), FINAL, dtype=object)
+    todo = np.flatnonzero(pd.notna(symbols) & ~np.isnat(dates))
+    if todo.size == 0 or not horizons:
+        return pd.DataFrame(out)
+
+    start = dates[todo].min() - np.timedelta64(ESTIMATION_LEAD)
+    end = dates[todo].max() + np.timedelta64(timedelta(days=max(horizons))) + np.timedelta64(DOWNLOAD_TAIL)
+    ahead = prices.get(benchmark, start, end + np.timedelta64(STATUS_LOOKAHEAD))
+    bench = ahead.loc[:end]
+    out["car_status"][todo] = PENDING
+    if bench.empty:
+        return pd.DataFrame(out)
+
+    # 0. Status from the benchmark's last bar: before the trade date, inside the window, or past it
+    last_bar = ahead.index[-1].to_datetime64()
+    window_end = dates[todo] + np.timedelta64(timedelta(days=max(horizons))) + np.timedelta64(DOWNLOAD_TAIL)
+    out["car_status"][todo] = np.where(last_bar > window_end, FINAL, np.where(last_bar >= dates[todo], PARTIAL, PENDING))
+
+    def keep(rows, results):
+        for name, values in results.items():
+            out[name][rows] = values
+
+    # 1. The calendar and the market side of the regression
+    calendar = bench.index.to_numpy(dtype="datetime64[ns]")
+    market = bench.pct_change(fill_method=None).to_numpy()
+    # Trades grouped by symbol, so a shard's trades are one slice, and by date within a symbol, so the
+    # window lookups walk each column of the running sums front to back
+    codes, distinct = pd.factorize(pd.Series(symbols[todo]), sort=True)
+    order = np.lexsort((dates[todo], codes))
+    rows, codes = todo[order], codes[order]
+
+    with tempfile.TemporaryDirectory(prefix="event-engine-") as tmp:
+        # 2. Closes of every symbol on the benchmark's calendar, column by column (Fortran order: a
+        # shard's columns are one contiguous block of the file)
+        shape = (len(calendar), len(distinct))
+        if workers > 1:
+            source = str(Path(tmp) / "closes.npy")
+            matrix = np.lib.format.open_memmap(source, mode="w+", dtype=np.float64, shape=shape, fortran_order=True)
+        else:
+            source = matrix = np.empty(shape, order="F")
+        off_calendar, unpriced = {}, []
+        for lo in range(0, len(distinct), SYMBOL_CHUNK):
+            chunk = list(distinct[lo:lo + SYMBOL_CHUNK])
+            frame = prices.get_many(chunk, start, end).reindex(columns=chunk)
+            # Nothing at all (failed fetch, unknown or delisted symbol): see step 5
+            unpriced.extend(frame.columns[frame.isna().all().to_numpy()])
+            closes = frame.reindex(bench.index)
+            # Days the benchmark didn't trade would change the return calendar
+            for symbol in frame.columns[frame[~frame.index.isin(bench.index)].notna().any().to_numpy()]:
+                off_calendar[symbol] = frame[symbol].dropna()
+                closes[symbol] = np.nan
+            matrix[:, lo:lo + len(chunk)] = closes.to_numpy()
+        if workers > 1:
+            matrix.flush()
+
+        # 3. Score shard by shard, in order. A pool when asked for one
+        design = model.regressors(bench.index, list(distinct)) if model is not None else None
+        tasks, shard_rows = [], []
+        for lo, hi in _shards(len(distinct), workers):
+            a, b = np.searchsorted(codes, [lo, hi])
+            tasks.append((source, lo, hi, calendar, market, dates[rows[a:b]], codes[a:b] - lo, horizons,
+                          _shard_design(design, lo, hi)))
+            shard_rows.append(rows[a:b])
+        if workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+                results = list(pool.map(_score_shard, tasks))
+        else:
+            results = [_score_shard(task) for task in tasks]
+        for mine, result in zip(shard_rows, results):
+            keep(mine, result)
+        del matrix, source
+
+    # 4. Off-calendar symbols, one at a time on the union of both calendars
+    for symbol, series in off_calendar.items():
+        own = bench.index.union(series.index)
+        mine = rows[codes == distinct.get_loc(symbol)]
+        keep(mine, _score(own.to_numpy(dtype="datetime64[ns]"), bench.reindex(own).pct_change(fill_method=None).to_numpy(),
+                          series.reindex(own).to_numpy()[:, None], dates[mine],
+                          np.zeros(len(mine), dtype=np.int64), horizons,
+                          model.regressors(own, [symbol]) if model is not None else None))
+
+    # 5. No closes at all. Once the provider has answered for the whole window (a settled range, see
+    # PriceStore._fill) that's final: delisted, or never traded. Until then, or after a failed fetch, pending
+    if unpriced:
+        through = np.full(len(distinct), np.datetime64("NaT"), dtype="datetime64[ns]")
+        through[distinct.get_indexer(unpriced)] = [_covered_through(prices, s, start) for s in unpriced]
+        none = np.isin(codes, distinct.get_indexer(unpriced))
+        answered = through[codes[none]] >= dates[rows[none]] + np.timedelta64(timedelta(days=max(horizons))
+                                                                            + DOWNLOAD_TAIL)
+        out["car_status"][rows[none]] = np.where(answered & (out["car_status"][rows[none]] == FINAL), FINAL, PENDING)
+    return pd.DataFrame(out)
+
+
+def _covered_through(prices: PriceStore, symbol: str, start) -> np.datetime64:
+    # Last day of the covered range that start falls in: asked for, without holes, from start up to there
+    start = pd.Timestamp(start).normalize()
+    for lo, hi in prices.covered(symbol):
+        if lo <= start <= hi:
+            return hi.to_datetime64()
+    return np.datetime64("NaT")
+
+
+def batch_car(prices: PriceStore, symbols, dates, benchmark: str = "^GSPC", window_days: int = 30) -> np.ndarray:
+    """
+    calculate_car for many trades: one horizon of batch_event_returns. NaN where it would say None.
+    """
+    return batch_event_returns(prices, symbols, dates, benchmark, (window_days,))[f"car_{window_days}d"].to_numpy()
@@ -0,0 +1,12 @@
+# The event study's result schema. No imports on purpose: the store lays out its tables from it
+# without loading the analysis code
+
+# Event windows (calendar days after the trade) EventStudy.analyze_batch reports by default, as car_{h}d / bhar_{h}d
+HORIZONS = (5, 10, 30, 60, 90)
+
+
+def result_columns(horizons) -> list:
+    """
+    Wide result columns for a set of horizons (days): car_5d, car_10d, ..., then bhar_5d, bhar_10d, ...
+    """
+    return [f"{kind}_{h}d" for kind in ("car", "bhar") for h in horizons]
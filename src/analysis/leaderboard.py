@@ -0,0 +1,269 @@
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config import DATA_DIR
+from src.data_store import DERIVED_TABLES, load_local_data, with_results
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+LEADERBOARD_PATH = DATA_DIR / "leaderboard"
+LEVELS = ("politician", "party", "chamber")
+# Raw: "Tina Smith\nDemocratSenateMN" -> Tina Smith, Democrat, Senate, MN
+POLITICIAN_PATTERN = (r"^\s*(?P<politician>[^\n]*?)\s*(?:\n\s*(?P<party>Democrat|Republican|Independent|Other)?"
+                      r"(?P<chamber>House|Senate)?(?P<state>[A-Z]{2})?\s*)?$")
+N_BOOT = 1000
+ALPHA = 0.05
+# Bootstrap draws (replicates x trades) per chunk: big enough to amortize the loop, small enough to stay in cache
+CHUNK_DRAWS = 400_000
+COLUMNS = {
+    "politician": ["politician", "party", "chamber", "trades", "amount", "mean", "ci_low", "ci_high"],
+    "party": ["party", "politicians", "trades", "amount", "mean", "ci_low", "ci_high", "p_value"],
+    "chamber": ["chamber", "politicians", "trades", "amount", "mean", "ci_low", "ci_high", "p_value"],
+}
+# Column dtypes, so an empty table still formats like a full one
+DTYPES = {"politicians": "int64", "trades": "int64", "amount": "float64", "mean": "float64", "ci_low": "float64",
+          "ci_high": "float64", "p_value": "float64"}
+
+
+def parse_politicians(raw: pd.Series) -> pd.DataFrame:
+    """
+    politician, party, chamber, state from politician_raw, parsed once per distinct value.
+    Parts the cell doesn't carry come back as NaN.
+    """
+    codes, uniques = pd.factorize(raw)
+    parsed = pd.Series(uniques, dtype=object).str.extract(POLITICIAN_PATTERN)
+    parsed["politician"] = parsed["politician"].replace("", np.nan)
+    # -1 (missing raw) reindexes to an all-NaN row
+    return parsed.reindex(codes).set_index(raw.index)
+
+
+def trade_direction(types: pd.Series) -> np.ndarray:
+    # +1 buys, -1 sells (a sale that dodges a drop earns the drop), 0 for exchanges and the like
+    codes, uniques = pd.factorize(types)
+    t = pd.Series(uniques, dtype=object).str.lower()
+    side = t.str.contains("buy", na=False).to_numpy(dtype=int) - t.str.contains("sell", na=False).to_numpy(dtype=int)
+    return np.where(codes >= 0, side[codes], 0) if len(side) else np.zeros(len(codes), dtype=int)
+
+
+def _bootstrap(num: np.ndarray, den: np.ndarray, codes: np.ndarray, k: int, n_boot: int,
+               rng: np.random.Generator) -> np.ndarray:
+    """
+    Resampled sum(num) / sum(den) per group, n_boot x k: every group's units (code -1: none)
+    drawn with replacement to the group's own size, all groups in one batch. NaN for groups of
+    fewer than two units, which say nothing about the spread.
+    """
+    keep = np.flatnonzero(codes >= 0)
+    order = keep[np.argsort(codes[keep], kind="stable")]
+    sizes = np.bincount(codes[keep], minlength=k)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    # Numerator and denominator side by side, so one gather fetches both
+    pair = np.column_stack([num[order], den[order]])
+    n = len(order)
+    # Every position draws within its own group: [0, size) shifted to where the group starts
+    span, offset = np.repeat(sizes, sizes), np.repeat(starts, sizes)
+
+    sums = np.zeros((n_boot, k, 2))
+    filled = sizes > 0
+    chunk = max(1, CHUNK_DRAWS // max(n, 1))
+    for lo in range(0, n_boot, chunk):
+        hi = min(n_boot, lo + chunk)
+        # floor(uniform * size) rather than rng.integers, which is several times slower with a bound per
+        # position. uniform < 1 in steps of 2**-53, so the product never rounds up to size
+        idx = (rng.random((hi - lo, n)) * span).astype(np.intp)
+        idx += offset
+        sums[lo:hi, filled] = np.add.reduceat(np.take(pair, idx, axis=0), starts[filled], axis=1)
+    sums[:, sizes < 2] = np.nan
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums[..., 0] / sums[..., 1]
+
+
+def _permutation_p(num: np.ndarray, den: np.ndarray, codes: np.ndarray, k: int, n_perm: int,
+                   rng: np.random.Generator) -> np.ndarray:
+    """
+    Two-sided p-value per group for "this group's weighted mean differs from everyone else's",
+    shuffling whole strata (a politician's trades move together) between the groups.
+    """
+    keep = codes >= 0
+    num, den, codes = num[keep], den[keep], codes[keep]
+    if k < 2:
+        return np.full(k, np.nan)
+
+    def gap(g_num, g_den):
+        rest_num, rest_den = num.sum() - g_num, den.sum() - g_den
+        return g_num / g_den - rest_num / rest_den
+
+    observed = gap(np.bincount(codes, num, k), np.bincount(codes, den, k))
+    labels = rng.permuted(np.tile(codes, (n_perm, 1)), axis=1)
+    flat = (labels + k * np.arange(n_perm)[:, None]).ravel()
+    perm_num = np.bincount(flat, np.tile(num, n_perm), k * n_perm).reshape(n_perm, k)
+    perm_den = np.bincount(flat, np.tile(den, n_perm), k * n_perm).reshape(n_perm, k)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        extreme = np.abs(gap(perm_num, perm_den)) >= np.abs(observed) * (1 - 1e-12)
+    return (1 + extreme.sum(axis=0)) / (n_perm + 1)
+
+
+def _empty_table(level: str) -> pd.DataFrame:
+    return pd.DataFrame({c: pd.Series(dtype=DTYPES.get(c, object)) for c in COLUMNS[level]})
+
+
+class Leaderboard:
+    """
+    Who trades well: per-trade abnormal returns rolled up per politician, party and chamber.
+    Each group gets its amount-weighted mean abnormal return (sells count with the sign flipped) and a
+    bootstrap confidence interval: politicians resample their trades, parties and chambers their
+    politicians. Parties and chambers also get a permutation p-value against everyone else.
+    Tables are cached per fingerprint of the input, in memory and on disk, so they're only redone
+    when the trades or their CARs change.
+    """
+    # Bump when the numbers change for the same input: cached tables from older code are ignored
+    RESULTS_VERSION = "2"
+
+    def __init__(self, value: str = "car_30d", weight: str = "amount_est", n_boot: int = N_BOOT,
+                 alpha: float = ALPHA, seed: int = 0, path: Path = None):
+        self.value = value
+        self.weight = weight
+        self.n_boot = n_boot
+        self.alpha = alpha
+        self.seed = seed
+        self.path = Path(path) if path else LEADERBOARD_PATH
+        self._memo = {}
+
+    def fingerprint(self, df: pd.DataFrame) -> str:
+        """
+        Hash of everything the tables depend on: the settings and the input columns, row by row.
+        """
+        h = hashlib.sha1(f"{self.RESULTS_VERSION}:{self.value}:{self.weight}:{self.n_boot}:{self.alpha}:"
+                         f"{self.seed}".encode())
+        cols = ["politician_raw", "type", self.value, self.weight]
+        h.update(pd.util.hash_pandas_object(df[cols], index=False).to_numpy().tobytes())
+        return h.hexdigest()[:20]
+
+    def compute(self, df: pd.DataFrame) -> dict:
+        """
+        {level: table} for every LEVELS entry, best mean first. df needs politician_raw, type,
+        the value column (car_30d) and the weight column (amount_est). Buys and sells only; trades
+        without a value or amount are left out.
+        Served from memory or disk when the same input was seen before.
+        """
+        key = self.fingerprint(df)
+        tables = self._memo.get(key)
+        if tables is None:
+            tables = self._read(key)
+        if tables is None:
+            tables = self._compute(df)
+            self._write(key, tables)
+        # Only the latest input is worth keeping
+        self._memo = {key: tables}
+        return {level: t.copy() for level, t in tables.items()}
+
+    def _file(self, key: str, level: str) -> Path:
+        return self.path / f"{key}-{level}.parquet"
+
+    def _read(self, key: str):
+        files = {level: self._file(key, level) for level in LEVELS}
+        if not all(f.exists() for f in files.values()):
+            return None
+        return {level: pd.read_parquet(f) for level, f in files.items()}
+
+    def _write(self, key: str, tables: dict):
+        self.path.mkdir(parents=True, exist_ok=True)
+        for level, table in tables.items():
+            file = self._file(key, level)
+            tmp = file.with_suffix(".tmp")
+            table.to_parquet(tmp, index=False)
+            os.replace(tmp, file)
+        # Tables of inputs that have since changed
+        for f in self.path.glob("*.parquet"):
+            if not f.name.startswith(f"{key}-"):
+                f.unlink(missing_ok=True)
+
+    def _compute(self, df: pd.DataFrame) -> dict:
+        # 1. Signed, weighted trades with a politician to pin them on. Names, parties and chambers are
+        # handled per distinct politician_raw cell, trades only carry the cell's code
+        cell, cells = pd.factorize(df["politician_raw"])
+        units = parse_politicians(pd.Series(cells, dtype=object))
+        side = trade_direction(df["type"])
+        x = pd.to_numeric(df[self.value], errors="coerce").to_numpy(dtype=float) * side
+        w = pd.to_numeric(df[self.weight], errors="coerce").to_numpy(dtype=float)
+        named = np.append(units["politician"].notna().to_numpy(), False)
+        keep = named[cell] & np.isfinite(x) & (side != 0) & (w > 0)
+        cell, x, w = cell[keep], x[keep], w[keep]
+        if not len(x):
+            return {level: _empty_table(level) for level in LEVELS}
+
+        # 2. Units for parties and chambers: a politician's trades under one cell (party/chamber/state), summed.
+        # Point estimates are sum(amount * return) / sum(amount) over a group's trades or units
+        units["trades"] = np.bincount(cell, minlength=len(cells))
+        units["num"] = np.bincount(cell, x * w, len(cells))
+        units["den"] = np.bincount(cell, w, len(cells))
+        units = units[units["trades"] > 0]
+        num, den = units["num"].to_numpy(), units["den"].to_numpy()
+        unit_pol, politicians = pd.factorize(units["politician"], sort=True)
+        # Cell code -> politician code, for the trades
+        pol_of_cell = np.full(len(cells), -1)
+        pol_of_cell[units.index.to_numpy()] = unit_pol
+        pol_codes = pol_of_cell[cell]
+
+        # 3. Bootstrap: politicians resample their trades, parties and chambers their politicians (one
+        # member's trades aren't independent draws). The permutation test shuffles politicians too
+        rng = np.random.default_rng(self.seed)
+        q = [self.alpha / 2, 1 - self.alpha / 2]
+        tables = {}
+        for level in LEVELS:
+            if level == "politician":
+                codes, labels, values = pol_codes, politicians, (x * w, w, np.ones(len(x)))
+            else:
+                codes, labels = pd.factorize(units[level], sort=True)
+                values = (num, den, units["trades"].to_numpy())
+            k, used = len(labels), codes >= 0
+            g_num, g_den, g_trades = (np.bincount(codes[used], v[used], k) for v in values)
+            low, high = np.quantile(_bootstrap(*values[:2], codes, k, self.n_boot, rng), q, axis=0)
+            table = pd.DataFrame({
+                level: labels,
+                "trades": g_trades.astype(int),
+                "amount": g_den,
+                "mean": g_num / g_den,
+                "ci_low": low,
+                "ci_high": high,
+            })
+            if level == "politician":
+                # Party/chamber as of where most of the politician's trades were made
+                main = units.sort_values("trades", ascending=False, kind="stable").drop_duplicates("politician")
+                table = table.merge(main[["politician", "party", "chamber"]], on="politician", how="left")
+            else:
+                table["politicians"] = units[used].groupby(level)["politician"].nunique().to_numpy()
+                table["p_value"] = _permutation_p(num, den, codes, k, self.n_boot, rng)
+            tables[level] = (table[COLUMNS[level]].sort_values("mean", ascending=False, kind="stable")
+                             .reset_index(drop=True))
+        logger.info(f"Leaderboard over {len(x):,} trades by {len(politicians):,} politicians, "
+                    f"{self.n_boot} resamples.")
+        return tables
+
+
+def load_trades() -> pd.DataFrame:
+    """
+    The store's trades with what Leaderboard.compute needs, stored CARs joined on.
+    """
+    columns = ["trade_id", "politician_raw", "type", "amount_est"]
+    df = load_local_data(columns=columns)
+    if df.empty:
+        return pd.DataFrame(columns=columns + list(DERIVED_TABLES["car"]))
+    return with_results(df)
+
+
+_default_leaderboard = None
+
+
+def default_leaderboard() -> Leaderboard:
+    """
+    The process-wide Leaderboard on LEADERBOARD_PATH, so its in-memory cache survives app reruns.
+    """
+    global _default_leaderboard
+    if _default_leaderboard is None:
+        _default_leaderboard = Leaderboard()
+    return _default_leaderboard
@@ -1,9 +1,15 @@
 import pandas as pd
 import numpy as np
-import yfinance as yf
 from sklearn.linear_model import LinearRegression
 import logging
+import re
 from datetime import timedelta
+from pathlib import Path
+from src.analysis.event_engine import STATUS_LOOKAHEAD, batch_event_returns
+from src.analysis.horizons import HORIZONS, result_columns
+from src.analysis.price_store import PriceStore, default_price_store
+from src.config import DATA_DIR
+from src.enrichment.asset_classifier import classify_assets, is_priceable, price_symbol
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -16,10 +22,202 @@ TICKER_MAP = {
     # Add more mappings here as needed
 }
 
+
+def _yahoo_symbol(ticker):
+    """
+    Scraped ticker -> the symbol prices are stored under, or None for the ones calculate_car skips.
+    """
+    if not isinstance(ticker, str) or ticker in ['--', 'NaN', '']:
+        return None
+    # Sanitize ticker for Yahoo Finance
+    ticker = ticker.strip().upper().replace('/', '-').replace('.', '-')
+    return TICKER_MAP.get(ticker, ticker)
+
+
+def trade_symbols(df: pd.DataFrame, priced=None) -> list:
+    """
+    Symbol each trade's prices are stored under, None where it can't be priced (bonds, funds, junk
+    tickers). Crypto goes out under Yahoo's pair symbol. priced: is_priceable(df), if already known.
+    """
+    priced = is_priceable(df).to_numpy() if priced is None else priced
+    classes = df['asset_type'] if 'asset_type' in df.columns else classify_assets(df)
+    return [_yahoo_symbol(price_symbol(ticker, asset_class)) if ok else None
+            for ticker, asset_class, ok in zip(df['ticker'], classes, priced)]
+
+
+# Daily factor files, as downloaded from the Ken French data library (or any CSV/Parquet with a date column)
+FACTOR_DIR = DATA_DIR / "factors"
+FF3_PATH = FACTOR_DIR / "F-F_Research_Data_Factors_daily.CSV"
+FF5_PATH = FACTOR_DIR / "F-F_Research_Data_5_Factors_2x3_daily.CSV"
+FF3_FACTORS = ("Mkt-RF", "SMB", "HML")
+FF5_FACTORS = ("Mkt-RF", "SMB", "HML", "RMW", "CMA")
+
+# SPDR sector funds, by the sector names enrichment stores (Yahoo's)
+SECTOR_ETFS = {
+    "Technology": "XLK",
+    "Financial Services": "XLF",
+    "Healthcare": "XLV",
+    "Consumer Cyclical": "XLY",
+    "Consumer Defensive": "XLP",
+    "Energy": "XLE",
+    "Industrials": "XLI",
+    "Basic Materials": "XLB",
+    "Utilities": "XLU",
+    "Real Estate": "XLRE",
+    "Communication Services": "XLC",
+}
+
+
+def load_factors(path) -> pd.DataFrame:
+    """
+    Daily factor returns (decimals, one column per factor, DatetimeIndex) from a local file.
+    Takes the Ken French library CSVs as they come (text around the table, YYYYMMDD dates, percent),
+    or a CSV/Parquet with a `date` column and factor columns already in decimals.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"No factor file at {path}. Download it from the Ken French data library.")
+    if path.suffix.lower() == ".parquet":
+        return pd.read_parquet(path).set_index("date").sort_index()
+
+    lines = path.read_text().splitlines()
+    header = next((i for i, line in enumerate(lines) if "Mkt-RF" in line and line.startswith(",")), None)
+    if header is None:
+        return pd.read_csv(path, parse_dates=["date"]).set_index("date").sort_index()
+
+    # French format: the daily table runs from its header to the first line that isn't a YYYYMMDD row
+    rows = []
+    for line in lines[header + 1:]:
+        if not re.match(r"^\s*\d{8}\s*,", line):
+            break
+        rows.append(line)
+    columns = ["date"] + [c.strip() for c in lines[header].split(",")[1:]]
+    table = pd.DataFrame([r.split(",") for r in rows], columns=columns)
+    table["date"] = pd.to_datetime(table["date"].str.strip(), format="%Y%m%d")
+    return table.set_index("date").astype(float).div(100)
+
+
+class MarketModel:
+    """
+    Expected return = alpha + beta * benchmark return, fit per trade over the estimation window.
+    calculate_car's model, and the base for the others: a model hands the event engine its regressors.
+    """
+    name = "market"
+
+    def bind(self, df: pd.DataFrame, symbols: list):
+        """
+        The model for one batch of trades (df, and the price symbol of each row). Most don't care.
+        """
+        return self
+
+    def regressors(self, calendar: pd.DatetimeIndex, symbols: list):
+        """
+        (X, which, rf) for the event engine: X is days x m x k factor returns on the calendar, which
+        picks each symbol's slice of X, rf is taken off the stock's return (None: nothing).
+        None here means the engine's own market model.
+        """
+        return None
+
+
+class FamaFrenchModel(MarketModel):
+    """
+    Excess return regressed on the Fama-French factors (Mkt-RF, SMB, HML and for FF5 RMW, CMA),
+    read from a local file. Loaded once, on first use.
+    """
+
+    def __init__(self, name: str = "ff3", factors=FF3_FACTORS, path: Path = FF3_PATH):
+        self.name = name
+        self.factors = list(factors)
+        self.path = Path(path)
+        self._data = None
+
+    @property
+    def data(self) -> pd.DataFrame:
+        if self._data is None:
+            data = load_factors(self.path)
+            missing = sorted(set(self.factors + ["RF"]) - set(data.columns))
+            if missing:
+                raise ValueError(f"Factor file {self.path} has no {missing} column(s)")
+            self._data = data
+        return self._data
+
+    def regressors(self, calendar, symbols):
+        # Same factors for every symbol; days the file doesn't have drop out of the regression
+        data = self.data.reindex(calendar)
+        return data[self.factors].to_numpy()[:, None, :], np.zeros(len(symbols), dtype=np.int64), data["RF"].to_numpy()
+
+
+class SectorModel(MarketModel):
+    """
+    Market model against the stock's sector ETF instead of the index (SECTOR_ETFS, by the trade's
+    enriched sector), so a tech stock riding a tech rally doesn't count as alpha.
+    Symbols with no known sector keep the benchmark.
+    """
+    name = "sector"
+
+    def __init__(self, prices: PriceStore, benchmark: str = "^GSPC", sectors: dict = None):
+        self.prices = prices
+        self.benchmark = benchmark
+        self.sectors = sectors or {}
+
+    def bind(self, df, symbols):
+        if 'sector' not in df.columns:
+            return self
+        sectors = {s: sector for s, sector in zip(symbols, df['sector'].astype(object)) if s is not None}
+        return SectorModel(self.prices, self.benchmark, sectors)
+
+    def regressors(self, calendar, symbols):
+        etfs = [SECTOR_ETFS.get(self.sectors.get(s), self.benchmark) for s in symbols]
+        codes, funds = pd.factorize(pd.Series(etfs, dtype=object))
+        closes = self.prices.get_many(list(funds), calendar[0], calendar[-1]).reindex(columns=funds).reindex(calendar)
+        return closes.pct_change(fill_method=None).to_numpy()[:, :, None], codes, None
+
+
+def make_model(name: str, prices: PriceStore = None, benchmark: str = "^GSPC") -> MarketModel:
+    """
+    Return model by name: 'market', 'ff3', 'ff5' or 'sector'.
+    """
+    if name == "market":
+        return MarketModel()
+    if name == "ff3":
+        return FamaFrenchModel("ff3", FF3_FACTORS, FF3_PATH)
+    if name == "ff5":
+        return FamaFrenchModel("ff5", FF5_FACTORS, FF5_PATH)
+    if name == "sector":
+        return SectorModel(prices or default_price_store(), benchmark)
+    raise ValueError(f"Unknown return model {name!r}")
+
+
 class EventStudy:
-    def __init__(self, benchmark_ticker='^GSPC'):
+    # Bump when the CAR math changes; stored results from older versions get redone
+    RESULTS_VERSION = "2"
+
+    def __init__(self, benchmark_ticker='^GSPC', prices: PriceStore = None, horizons=HORIZONS, workers: int = 1,
+                 model='market'):
         # ^GSPC is the S&P 500 index
         self.benchmark = benchmark_ticker
+        self.horizons = tuple(sorted(set(horizons)))
+        # Processes analyze_batch shards the tickers across (1: in-process). Doesn't change any number
+        self.workers = workers
+        # Local price store (shared with PortfolioManager); only uncovered date ranges hit the network
+        self.prices = prices or default_price_store()
+        # Where analyze_batch's expected returns come from: a name for make_model, or a model itself.
+        # calculate_car is always the market model
+        self.model = make_model(model, self.prices, self.benchmark) if isinstance(model, str) else model
+        # Trades we didn't download prices for because their asset class has none (bonds, private funds...)
+        self.calls_avoided = 0
+
+    @property
+    def results_version(self) -> str:
+        # Same code against a different benchmark (or other horizons, another model) is a different result
+        return f"{self.RESULTS_VERSION}:{self.benchmark}:{','.join(map(str, self.horizons))}:{self.model.name}"
+
+    @property
+    def result_columns(self) -> list:
+        """
+        Columns analyze_batch adds: car_{h}d for every horizon, then bhar_{h}d, then car_status.
+        """
+        return result_columns(self.horizons) + ['car_status']
 
     def calculate_car(self, ticker: str, trade_date: pd.Timestamp, window_days=30) -> float:
         """
@@ -29,32 +227,19 @@ class EventStudy:
         if pd.isna(trade_date):
             return None
 
-        # Skip invalid tickers
-        if not isinstance(ticker, str) or ticker in ['--', 'NaN', '']:
+        # Skip invalid tickers, sanitize the rest for Yahoo Finance
+        ticker = _yahoo_symbol(ticker)
+        if ticker is None:
             return None
 
-        # Sanitize ticker for Yahoo Finance
-        ticker = ticker.strip().upper().replace('/', '-').replace('.', '-')
-        ticker = TICKER_MAP.get(ticker, ticker)
-
         # Define time windows
         est_start = trade_date - timedelta(days=200)
         est_end = trade_date - timedelta(days=10)
         evt_end = trade_date + timedelta(days=window_days)
 
         try:
-            # Fetch stock + market benchmark data
-            data = yf.download(
-                [ticker, self.benchmark],
-                start=est_start,
-                end=evt_end + timedelta(days=5),
-                progress=False,
-                auto_adjust=False,
-            )['Adj Close']
-
-            # Fix for yfinance returning multiindex columns
-            if isinstance(data.columns, pd.MultiIndex):
-                data.columns = data.columns.droplevel(1)
+            # Fetch stock + market benchmark data (from the price store; end is inclusive there)
+            data = self.prices.get_many([ticker, self.benchmark], est_start, evt_end + timedelta(days=4))
 
             # Calculate daily returns (percent change)
             returns = data.pct_change(fill_method=None).dropna()
@@ -102,15 +287,39 @@ class EventStudy:
 
     def analyze_batch(self, df: pd.DataFrame) -> pd.DataFrame:
         """
-        Applies CAR calculation to a whole dataframe of trades.
+        Applies the event study to a whole dataframe of trades, every horizon in one pass:
+        car_{h}d (same numbers as calculate_car(window_days=h) per row) and bhar_{h}d (buy-and-hold
+        abnormal return) for each of self.horizons. Vectorized (event_engine.batch_event_returns):
+        the regression is done once per trade, each extra horizon is a difference of running sums.
+        car_status says whether the results can still change (pending/partial) or are final.
+        Expected returns come from self.model (the market model unless told otherwise).
+        With workers > 1 the tickers are sharded across a process pool.
         """
         if df.empty:
             return df
 
-        logger.debug(f"Calculating financial metrics (Alpha/Beta) for {len(df)} trades...")
+        logger.debug(f"Calculating financial metrics (Alpha/Beta) for {len(df)} trades at horizons {self.horizons}...")
+
+        # Non-priceable rows never reach yf.download
+        priced = is_priceable(df).to_numpy()
+        self.calls_avoided += int((~priced).sum())
 
-        df['car_30d'] = df.apply(
-            lambda row: self.calculate_car(row['ticker'], row['transaction_date']),
-            axis=1
-        )
+        symbols = trade_symbols(df, priced)
+        dates = pd.to_datetime(df['transaction_date'])
+        self._prefetch(symbols, dates, max(self.horizons))
+
+        results = batch_event_returns(self.prices, symbols, dates, self.benchmark, self.horizons, self.workers,
+                                      self.model.bind(df, symbols))
+        for col in results.columns:
+            df[col] = pd.Series(results[col].to_numpy(), index=df.index, dtype=float if col != 'car_status' else object)
         return df
+
+    def _prefetch(self, symbols: list, dates: pd.Series, window_days=30):
+        # Every window this batch needs, up front, so the engine reads memory.
+        # One span for all symbols, so symbols with the same gap go out in the same request
+        known = [s for s in symbols if s is not None]
+        if not known or dates.isna().all():
+            return
+        # The benchmark is read a little further, to tell open windows from closed ones
+        span = (dates.min() - timedelta(days=200), dates.max() + timedelta(days=window_days + 4) + STATUS_LOOKAHEAD)
+        self.prices.prefetch({s: span for s in set(known) | {self.benchmark}})
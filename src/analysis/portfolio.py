@@ -1,13 +1,27 @@
 import pandas as pd
-import yfinance as yf
 from pypfopt import EfficientFrontier, risk_models, expected_returns
+from src.analysis.price_store import PriceStore, default_price_store
+from src.enrichment.asset_classifier import price_symbol
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
 
 class PortfolioManager:
-    def __init__(self, tickers: list):
+    def __init__(self, tickers: list, asset_classes: list = None, prices: PriceStore = None):
+        # Same local price store as EventStudy: the 2y history only downloads what isn't on disk yet
+        self.prices = prices or default_price_store()
+
+        # asset_classes (aligned with tickers): assets Yahoo can't price are dropped before the download,
+        # crypto is rerouted to its Yahoo pair ($BTC -> BTC-USD)
+        if asset_classes is not None:
+            routed = [price_symbol(t, c) for t, c in zip(tickers, asset_classes)]
+            dropped = {t for t, r in zip(tickers, routed) if r is None} - set(routed)
+            self.calls_avoided = len(dropped)
+            tickers = [r for r in routed if r is not None]
+        else:
+            self.calls_avoided = 0
+
         # Improved Filter: Must be a string, not '--' or '---'
         # Also sanitize for Yahoo Finance (BRK/B -> BRK-B)
         cleaned_tickers = []
@@ -39,7 +53,8 @@ class PortfolioManager:
 
         try:
             # 1. Download Data
-            df = yf.download(self.tickers, period="2y", progress=False, auto_adjust=False)['Adj Close']
+            today = pd.Timestamp.now().normalize()
+            df = self.prices.get_many(self.tickers, today - pd.DateOffset(years=2), today)
 
             if isinstance(df, pd.Series):
                 df = df.to_frame()
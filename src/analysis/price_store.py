@@ -0,0 +1,280 @@
+import json
+import os
+import re
+import threading
+from datetime import timedelta
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import yfinance as yf
+from yfinance.exceptions import YFTickerMissingError
+from src.config import DATA_DIR
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# One Parquet file of adjusted closes per symbol, plus the date ranges it has asked the provider for
+PRICE_STORE_PATH = DATA_DIR / "prices"
+# Symbols per provider request
+FETCH_CHUNK = 100
+# Ranges that reach today aren't covered for good, but aren't asked for again for this long either
+UNSETTLED_TTL = timedelta(minutes=15)
+
+ONE_DAY = timedelta(days=1)
+
+
+class YahooPriceProvider:
+    """
+    Adjusted daily closes from Yahoo Finance. One yf.download for the whole batch of symbols.
+    """
+
+    def fetch(self, symbols: list, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """
+        Wide frame (date x symbol) of adjusted closes for [start, end], both inclusive.
+        Symbols with no data are missing from the columns; attrs["no_data"] lists the ones
+        Yahoo said it has nothing for (delisted, no prices in the range).
+        """
+        data = yf.download(symbols, start=start, end=end + ONE_DAY, progress=False, auto_adjust=False)
+        if data is None or data.empty:
+            closes = pd.DataFrame()
+        else:
+            closes = data["Adj Close"]
+            if isinstance(closes, pd.Series):
+                closes = closes.to_frame(symbols[0])
+            closes = closes.dropna(axis=1, how="all")
+        # A ticker that failed inside the batch comes back as an all-NaN column, whatever the reason.
+        # yf.download doesn't say why, a single-ticker history call does
+        closes.attrs["no_data"] = [s for s in symbols if s not in closes.columns and self._has_no_data(s, start, end)]
+        return closes
+
+    def _has_no_data(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> bool:
+        try:
+            history = yf.Ticker(symbol).history(start=start, end=end + ONE_DAY, auto_adjust=False, raise_errors=True)
+        except YFTickerMissingError:
+            return True
+        except Exception as e:
+            # Rate limit, timeout...: not an answer
+            logger.debug(f"Price lookup for {symbol} failed: {e}")
+            return False
+        return history.empty or history["Adj Close"].isna().all()
+
+
+class FixturePriceProvider:
+    """
+    Offline provider over a wide frame of closes (date x symbol), for tests and benchmarks.
+    Records every request in `calls` so tests can check what the store asked for.
+    """
+
+    def __init__(self, prices: pd.DataFrame):
+        self.prices = prices.sort_index()
+        self.calls = []
+
+    @classmethod
+    def from_csv(cls, path):
+        # Long format: date, symbol, adj_close
+        long = pd.read_csv(path, parse_dates=["date"])
+        return cls(long.pivot(index="date", columns="symbol", values="adj_close"))
+
+    def fetch(self, symbols: list, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        self.calls.append((tuple(symbols), start, end))
+        known = [s for s in symbols if s in self.prices.columns]
+        closes = self.prices.loc[start:end, known].dropna(axis=1, how="all")
+        closes.attrs["no_data"] = [s for s in symbols if s not in closes.columns]
+        return closes
+
+
+def _gaps(covered: list, start: pd.Timestamp, end: pd.Timestamp) -> list:
+    # Parts of [start, end] not inside any covered (start, end) range. covered is sorted and merged
+    gaps, cursor = [], start
+    for lo, hi in covered:
+        if hi < cursor:
+            continue
+        if lo > end:
+            break
+        if lo > cursor:
+            gaps.append((cursor, lo - ONE_DAY))
+        cursor = max(cursor, hi + ONE_DAY)
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def _merge_ranges(ranges: list) -> list:
+    merged = []
+    for lo, hi in sorted(ranges):
+        if merged and lo <= merged[-1][1] + ONE_DAY:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+class PriceStore:
+    """
+    Local store of daily adjusted closes, shared by EventStudy and PortfolioManager.
+
+    Each symbol is a small Parquet file (date, adj_close) whose metadata lists the calendar ranges
+    already asked for. A request only goes to the provider for the parts of its range that aren't
+    covered yet, batched across symbols with the same gap. Today's close isn't final, so a range
+    reaching today is only trusted in memory for UNSETTLED_TTL, never marked covered on disk.
+    Loaded symbols stay in memory, so a batch of trades reads each file at most once.
+    """
+
+    def __init__(self, path: Path = None, provider=None, clock=pd.Timestamp.now):
+        self.path = Path(path) if path else PRICE_STORE_PATH
+        self.provider = provider or YahooPriceProvider()
+        self._clock = clock
+        self._series = {}
+        self._covered = {}
+        # symbol -> [(start, end, fetched_at)] for unsettled ranges
+        self._recent = {}
+        self._lock = threading.RLock()
+        # Provider requests made by this instance (each covers up to FETCH_CHUNK symbols)
+        self.fetches = 0
+
+    def _file(self, symbol: str) -> Path:
+        # ^GSPC, BRK-B, BTC-USD... anything odd becomes an underscore
+        return self.path / f"{re.sub(r'[^A-Za-z0-9.-]', '_', symbol)}.parquet"
+
+    def _load(self, symbol: str):
+        if symbol in self._series:
+            return
+        file = self._file(symbol)
+        series, covered = pd.Series(dtype=float), []
+        if file.exists():
+            table = pq.read_table(file)
+            series = pd.Series(table.column("adj_close").to_numpy(),
+                               index=pd.DatetimeIndex(table.column("date").to_numpy()), dtype=float)
+            meta = json.loads((table.schema.metadata or {}).get(b"covered", b"[]"))
+            covered = [(pd.Timestamp(lo), pd.Timestamp(hi)) for lo, hi in meta]
+        self._series[symbol] = series
+        self._covered[symbol] = covered
+
+    def _save(self, symbol: str):
+        series = self._series[symbol]
+        covered = [[lo.strftime("%Y-%m-%d"), hi.strftime("%Y-%m-%d")] for lo, hi in self._covered[symbol]]
+        table = pa.table({"date": pa.array(series.index.values, type=pa.timestamp("ns")),
+                          "adj_close": pa.array(series.to_numpy(), type=pa.float64())})
+        table = table.replace_schema_metadata({"covered": json.dumps(covered)})
+        # Write-then-rename, so a reader never sees half a file
+        self.path.mkdir(parents=True, exist_ok=True)
+        file = self._file(symbol)
+        tmp = file.with_suffix(".tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, file)
+
+    def covered(self, symbol: str) -> list:
+        """
+        (start, end) calendar ranges already fetched for symbol, merged and sorted.
+        """
+        with self._lock:
+            self._load(symbol)
+            return list(self._covered[symbol])
+
+    def get(self, symbol: str, start, end) -> pd.Series:
+        """
+        Adjusted closes for one symbol over [start, end]. Empty if the provider has none.
+        """
+        return self.get_many([symbol], start, end).get(symbol, pd.Series(dtype=float))
+
+    def get_many(self, symbols: list, start, end) -> pd.DataFrame:
+        """
+        Wide frame (date x symbol) of adjusted closes over [start, end], both inclusive.
+        Only the uncovered gaps go to the provider. Symbols with no data are left out.
+        """
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        symbols = list(dict.fromkeys(s for s in symbols if isinstance(s, str) and s))
+        with self._lock:
+            self._fill(symbols, start, end)
+            columns = {s: self._series[s].loc[start:end] for s in symbols if not self._series[s].empty}
+        if not columns:
+            return pd.DataFrame()
+        return pd.DataFrame(columns).sort_index()
+
+    def prefetch(self, spans: dict):
+        """
+        Makes sure {symbol: (start, end)} is covered, in as few provider requests as it can.
+        For batch jobs: every later get() inside those spans is served from memory.
+        """
+        by_span = {}
+        for symbol, (start, end) in spans.items():
+            by_span.setdefault((pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()), []).append(symbol)
+        with self._lock:
+            for (start, end), symbols in by_span.items():
+                self._fill(symbols, start, end)
+
+    def _known(self, symbol: str, now: pd.Timestamp) -> list:
+        recent = [(lo, hi) for lo, hi, at in self._recent.get(symbol, []) if now - at < UNSETTLED_TTL]
+        return _merge_ranges(self._covered[symbol] + recent) if recent else self._covered[symbol]
+
+    def _fill(self, symbols: list, start: pd.Timestamp, end: pd.Timestamp):
+        for symbol in symbols:
+            self._load(symbol)
+        # Nothing to fetch past today
+        now = self._clock()
+        end = min(end, now.normalize())
+        if end < start:
+            return
+
+        # 1. What's missing, per symbol. Symbols sharing a gap share a request
+        wanted = {}
+        for symbol in symbols:
+            for gap in _gaps(self._known(symbol, now), start, end):
+                wanted.setdefault(gap, []).append(symbol)
+        if not wanted:
+            return
+
+        # 2. Fetch. Today's close isn't final: fetch it, don't cover it for good
+        settled = now.normalize() - ONE_DAY
+        changed = set()
+        for (lo, hi), group in wanted.items():
+            for i in range(0, len(group), FETCH_CHUNK):
+                chunk = group[i:i + FETCH_CHUNK]
+                try:
+                    self.fetches += 1
+                    frame = self.provider.fetch(chunk, lo, hi)
+                except Exception as e:
+                    # Not covered, so the next request tries again
+                    logger.warning(f"Price fetch failed for {len(chunk)} symbols {lo:%Y-%m-%d}..{hi:%Y-%m-%d}: {e}")
+                    continue
+                logger.debug(f"Fetched prices for {len(chunk)} symbols {lo:%Y-%m-%d}..{hi:%Y-%m-%d}")
+                no_data = set(frame.attrs.get("no_data", ()))
+                dropped = [s for s in chunk if s not in frame.columns and s not in no_data]
+                if dropped:
+                    # Left out without the provider saying it has nothing: like a failed fetch, not covered
+                    logger.warning(f"No prices and no reason for {len(dropped)} symbols "
+                                   f"{lo:%Y-%m-%d}..{hi:%Y-%m-%d}, retrying next time: {dropped[:10]}")
+                for symbol in chunk:
+                    if symbol in dropped:
+                        continue
+                    if symbol in frame.columns:
+                        fresh = frame[symbol].dropna().astype(float)
+                        fresh.index = pd.DatetimeIndex(pd.DatetimeIndex(fresh.index).tz_localize(None).normalize(), freq=None)
+                        old = self._series[symbol]
+                        if not old.empty:
+                            fresh = pd.concat([old[~old.index.isin(fresh.index)], fresh]).sort_index()
+                        self._series[symbol] = fresh
+                    # The provider saying it has no data for a settled range is an answer too (delisted, not trading yet)
+                    if lo <= settled:
+                        self._covered[symbol] = _merge_ranges(self._covered[symbol] + [(lo, min(hi, settled))])
+                    if hi > settled:
+                        self._recent.setdefault(symbol, []).append((max(lo, settled + ONE_DAY), hi, now))
+                    changed.add(symbol)
+
+        # 3. Persist what changed
+        for symbol in changed:
+            self._save(symbol)
+
+
+_default_store = None
+
+
+def default_price_store() -> PriceStore:
+    """
+    The process-wide store on PRICE_STORE_PATH, so every EventStudy/PortfolioManager shares its memory.
+    """
+    global _default_store
+    if _default_store is None:
+        _default_store = PriceStore()
+    return _default_store
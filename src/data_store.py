@@ -1,35 +1,355 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from collections import Counter
 from pathlib import Path
+import os
+import re
+import sqlite3
+import threading
+import time
+from src.analysis.horizons import HORIZONS, result_columns
 from src.ingestion.capitol_client import CapitolTradesClient
+from src.ingestion.html_table import parse_trades_table
+from src.ingestion.raw_archive import RawPageArchive
+from src.ingestion.trade_keys import assign_trade_ids, known_trade_keys, parse_trade_ids, raw_trade_key
+from src.trade_index import TradeIdIndex
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Where we keep the loot
-DATA_PATH = Path("data/processed/senate_trades_history.csv")
+# Where we keep the loot: a directory of append-only Parquet segments.
+# Every sync adds one small segment; compaction folds them back into one.
+DATA_PATH = Path("data/processed/senate_trades_history")
+# Older single-file stores. Only read once, to migrate them
+LEGACY_PARQUET_PATH = Path("data/processed/senate_trades_history.parquet")
+LEGACY_CSV_PATH = Path("data/processed/senate_trades_history.csv")
 
+# Compact once there are more segments than this, or the uncompacted ones add up to this many bytes
+MAX_SEGMENTS = 8
+MAX_UNCOMPACTED_BYTES = 32 * 1024 * 1024
 
-def load_local_data() -> pd.DataFrame:
-    """Reads the CSV."""
-    if not DATA_PATH.exists():
+# Same trade_id in two segments: the newest segment wins.
+# Rows from before trade ids existed fall back to these fields
+DEDUPE_KEYS = ['transaction_date', 'senator', 'ticker', 'amount_est', 'type']
+CATEGORICAL_COLUMNS = ['senator', 'ticker', 'type', 'asset_type']
+
+# Typed schema for the columns we know about. Anything else (enrichment, metrics) is stored as inferred
+STORE_SCHEMA = pa.schema([
+    ("politician_raw", pa.string()),
+    ("issuer_raw", pa.string()),
+    ("pub_date_raw", pa.string()),
+    ("trade_date_raw", pa.string()),
+    ("type_raw", pa.string()),
+    ("size_raw", pa.string()),
+    ("senator", pa.dictionary(pa.int32(), pa.string())),
+    ("ticker", pa.dictionary(pa.int32(), pa.string())),
+    ("asset_description", pa.string()),
+    ("transaction_date", pa.timestamp("ns")),
+    ("disclosure_date", pa.timestamp("ns")),
+    ("amount_est", pa.float64()),
+    ("type", pa.dictionary(pa.int32(), pa.string())),
+    ("asset_type", pa.dictionary(pa.int32(), pa.string())),
+    ("sector", pa.string()),
+    ("trade_id", pa.string()),
+])
+DATE_COLUMNS = ["transaction_date", "disclosure_date"]
+
+# SQLite mirror of the segments that the app queries, so only the matching slice reaches pandas.
+# Lives next to the segments and can be thrown away at any time; it rebuilds itself from them
+QUERY_DB_NAME = "_query.sqlite"
+QUERY_COLUMNS = ['trade_id', 'senator', 'ticker', 'asset_description', 'transaction_date',
+                 'disclosure_date', 'amount_est', 'type', 'asset_type', 'sector']
+INDEXED_COLUMNS = ['senator', 'ticker', 'sector', 'transaction_date']
+# Per-trade results computed outside the store (enrichment, CAR): one table per computation, every row
+# stamped with the version of the code that made it. Own file, because unlike the mirror these cost
+# network calls to redo. Joined onto trades at query time
+DERIVED_DB_NAME = "_derived.sqlite"
+DERIVED_TABLES = {
+    # metadata_status: 'pending' while the lookup found nothing (retried), else 'final'
+    'enrichment': {'sector': 'TEXT', 'industry': 'TEXT', 'name': 'TEXT', 'market_cap': 'REAL',
+                   'metadata_status': 'TEXT'},
+    # CAR and buy-and-hold abnormal return at each of EventStudy's default horizons (days)
+    # plus whether those can still change ('pending', 'partial') or are frozen ('final').
+    # Other horizons get their columns through register_result_fields
+    'car': {**dict.fromkeys(result_columns(HORIZONS), 'REAL'), 'car_status': 'TEXT'},
+    'resolution': {'resolved_ticker': 'TEXT', 'ticker_confidence': 'REAL'},
+}
+# Derived fields the app filters/sorts on (Market Beaters). Lets SQLite walk the index instead of the join
+DERIVED_INDEXED_COLUMNS = {'car': ['car_30d']}
+VIEW_COLUMNS = QUERY_COLUMNS + [c for fields in DERIVED_TABLES.values() for c in fields if c not in QUERY_COLUMNS]
+# Named aggregates aggregate_trades() can compute
+AGGREGATES = {
+    'trades': "COUNT(*)",
+    'volume': "TOTAL(amount_est)",
+    'buy_volume': "TOTAL(CASE WHEN type LIKE '%buy%' THEN amount_est END)",
+    'sell_volume': "TOTAL(CASE WHEN type LIKE '%sell%' THEN amount_est END)",
+    'first_trade': "MIN(transaction_date)",
+    'last_trade': "MAX(transaction_date)",
+}
+
+
+def _to_arrow(df: pd.DataFrame) -> pa.Table:
+    """
+    pandas -> arrow with the store schema applied to every known column.
+    The final cast is what pins all-null columns (sector before enrichment) to string instead of null/double.
+    """
+    df = df.copy()
+    for field in STORE_SCHEMA:
+        if field.name not in df.columns:
+            continue
+        if pa.types.is_timestamp(field.type):
+            df[field.name] = pd.to_datetime(df[field.name], format="ISO8601")
+        elif pa.types.is_floating(field.type):
+            df[field.name] = pd.to_numeric(df[field.name], errors="coerce")
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    schema = pa.schema([
+        STORE_SCHEMA.field(f.name) if f.name in STORE_SCHEMA.names else f
+        for f in table.schema
+    ], metadata=table.schema.metadata)
+    return table.cast(schema)
+
+
+def _filters(start_date=None, end_date=None):
+    filters = []
+    if start_date is not None:
+        filters.append(("transaction_date", ">=", pd.Timestamp(start_date)))
+    if end_date is not None:
+        filters.append(("transaction_date", "<=", pd.Timestamp(end_date)))
+    return filters or None
+
+
+def _segment_files(path: Path = None) -> list:
+    """
+    Live segments, oldest first. Name is seg-<seq>[-c].parquet; a compacted segment (-c) takes the
+    highest seq it absorbed, so it sorts after the segments it replaces and before anything newer.
+    """
+    path = Path(path or DATA_PATH)
+    if not path.is_dir():
+        return []
+    segments = []
+    for f in path.iterdir():
+        m = re.fullmatch(r"seg-(\d+)(-c)?\.parquet", f.name)
+        if m:
+            segments.append((int(m.group(1)), bool(m.group(2)), f))
+    return [f for _, _, f in sorted(segments)]
+
+
+def _write_segment(df_or_table, path: Path, seq: int = None, compacted: bool = False) -> Path:
+    path.mkdir(parents=True, exist_ok=True)
+    seq = seq if seq is not None else time.time_ns()
+    target = path / f"seg-{seq:020d}{'-c' if compacted else ''}.parquet"
+    table = df_or_table if isinstance(df_or_table, pa.Table) else _to_arrow(df_or_table)
+    # Write-then-rename so readers never see half a file
+    tmp = path / f".{target.name}.tmp"
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, target)
+    return target
+
+
+def append_segment(df: pd.DataFrame, path: Path = None) -> Path:
+    """
+    Writes one new segment. Cost is the size of df, not the size of the history.
+    """
+    return _write_segment(df, Path(path or DATA_PATH))
+
+
+def save_local_data(df: pd.DataFrame, path: Path = None):
+    """
+    Replaces the whole store with df (one compacted segment) and rebuilds the id index to match.
+    """
+    path = Path(path or DATA_PATH)
+    old = _segment_files(path)
+    if 'trade_id' not in df.columns or df['trade_id'].isna().any():
+        df = df.assign(trade_id=assign_trade_ids(df))
+    _write_segment(df, path, compacted=True)
+    for f in old:
+        f.unlink(missing_ok=True)
+    TradeIdIndex(path).rebuild(parse_trade_ids(df['trade_id']))
+
+
+def migrate_csv_to_parquet(csv_path: Path = None, parquet_path: Path = None) -> bool:
+    """
+    One-shot move from the old CSV store. The CSV is left where it is.
+    """
+    csv_path = Path(csv_path or LEGACY_CSV_PATH)
+    parquet_path = Path(parquet_path or DATA_PATH)
+    if not csv_path.exists():
+        return False
+
+    df = pd.read_csv(csv_path)
+    for col in DATE_COLUMNS:
+        df[col] = pd.to_datetime(df[col], format="ISO8601")
+    save_local_data(df, parquet_path)
+    print(f"Migrated {len(df)} records from {csv_path} to {parquet_path}")
+    return True
+
+
+def _migrate_legacy_store():
+    if _segment_files(DATA_PATH):
+        return
+    if LEGACY_PARQUET_PATH.is_file():
+        # Single-file Parquet store -> first segment, no re-encode needed
+        _write_segment(pq.read_table(LEGACY_PARQUET_PATH), DATA_PATH, compacted=True)
+        print(f"Moved {LEGACY_PARQUET_PATH} into segment store {DATA_PATH}")
+    elif LEGACY_CSV_PATH.exists():
+        migrate_csv_to_parquet()
+
+
+def _concat_frames(frames: list) -> pd.DataFrame:
+    df = pd.concat(frames, ignore_index=True)
+    # Segments each carry their own category sets, concat falls back to object
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def _merge_segments(frames: list) -> pd.DataFrame:
+    if len(frames) == 1:
+        return frames[0]
+    df = _concat_frames(frames)
+    if 'trade_id' in df.columns and df['trade_id'].notna().all():
+        df = df.drop_duplicates(subset=['trade_id'], keep='last')
+    else:
+        df = df.drop_duplicates(subset=[c for c in DEDUPE_KEYS if c in df.columns], keep='last')
+    return df.reset_index(drop=True)
+
+
+def load_local_data(columns: list = None, start_date=None, end_date=None) -> pd.DataFrame:
+    """
+    Reads the merged view of every segment (newest wins on duplicates).
+    columns: only read these (column projection).
+    start_date / end_date: transaction_date range, pushed down so skipped row groups are never decoded.
+    """
+    _migrate_legacy_store()
+    return _read_store(DATA_PATH, columns, start_date, end_date)
+
+
+def _read_store(path: Path, columns: list = None, start_date=None, end_date=None) -> pd.DataFrame:
+    segments = _segment_files(path)
+    if not segments:
         return pd.DataFrame()
+
+    # Dedupe needs the key columns even when the caller didn't ask for them
+    read_cols = None
+    if columns is not None:
+        read_cols = list(dict.fromkeys(list(columns) + ['trade_id'] + DEDUPE_KEYS))
+
     try:
-        df = pd.read_csv(DATA_PATH)
-        # Fix date types cuz CSVs turn them into strings
-        df['transaction_date'] = pd.to_datetime(df['transaction_date'])
-        df['disclosure_date'] = pd.to_datetime(df['disclosure_date'])
-        return df
+        frames = []
+        for f in segments:
+            available = pq.read_schema(f).names
+            cols = [c for c in read_cols if c in available] if read_cols else None
+            frames.append(pd.read_parquet(f, columns=cols, filters=_filters(start_date, end_date)))
+        df = _merge_segments(frames)
+    except FileNotFoundError:
+        # A compaction swapped segments under us. Just read the new layout
+        return _read_store(path, columns, start_date, end_date)
     except Exception as e:
         print(f"Error loading local data: {e}")
         return pd.DataFrame()
 
+    return df[[c for c in columns if c in df.columns]] if columns is not None else df
+
+
+def _trade_index(path: Path = None) -> TradeIdIndex:
+    """
+    The persistent id index for a store, built on first use. A store from before trade ids
+    gets its ids stamped once here (one full rewrite, never again).
+    """
+    path = Path(path or DATA_PATH)
+    index = TradeIdIndex(path)
+    if index.exists() or not _segment_files(path):
+        return index
+
+    df = _read_store(path)
+    if 'trade_id' not in df.columns or df['trade_id'].isna().any():
+        print(f"Stamping trade ids onto {len(df)} stored records (one-time)...")
+        save_local_data(df, path)  # also builds the index
+    else:
+        index.rebuild(parse_trade_ids(df['trade_id']))
+    return index
+
+
+def merge_new_trades(df_new: pd.DataFrame, path: Path = None) -> pd.DataFrame:
+    """
+    Appends only the trades in df_new the store has never seen, and returns them.
+    Work is proportional to df_new: an id lookup in the index, one small segment, one index append.
+    """
+    path = Path(path or DATA_PATH)
+    if df_new.empty:
+        return df_new
+    if 'trade_id' not in df_new.columns:
+        df_new = df_new.assign(trade_id=assign_trade_ids(df_new))
+
+    index = _trade_index(path)
+    fresh = df_new[~index.contains(parse_trade_ids(df_new['trade_id']))]
+    fresh = fresh.drop_duplicates(subset=['trade_id'])
+    if fresh.empty:
+        return fresh
+
+    append_segment(fresh, path)
+    index.add(parse_trade_ids(fresh['trade_id']))
+    return fresh
+
+
+_compaction_lock = threading.Lock()
+
+
+def needs_compaction(path: Path = None) -> bool:
+    segments = _segment_files(path)
+    uncompacted = [f for f in segments if not f.name.endswith("-c.parquet")]
+    return (len(segments) > MAX_SEGMENTS
+            or sum(f.stat().st_size for f in uncompacted) > MAX_UNCOMPACTED_BYTES)
+
+
+def compact(path: Path = None, force: bool = False) -> bool:
+    """
+    Folds every current segment into one, resolving duplicates. Segments appended while this
+    runs are left alone. Returns True if it compacted.
+    """
+    path = Path(path or DATA_PATH)
+    if not _compaction_lock.acquire(blocking=False):
+        return False  # Someone's already on it
+    try:
+        segments = _segment_files(path)
+        if len(segments) < 2 or not (force or needs_compaction(path)):
+            return False
+
+        merged = _merge_segments([pd.read_parquet(f) for f in segments])
+        last_seq = int(re.match(r"seg-(\d+)", segments[-1].name).group(1))
+        _write_segment(merged, path, seq=last_seq, compacted=True)
+        for f in segments:
+            # The new file can share the newest segment's seq; don't delete what we just wrote
+            if not (f.name.endswith("-c.parquet") and int(re.match(r"seg-(\d+)", f.name).group(1)) == last_seq):
+                f.unlink(missing_ok=True)
+        TradeIdIndex(path).compact()
+        logger.info(f"Compacted {len(segments)} segments into one ({len(merged)} records).")
+        return True
+    finally:
+        _compaction_lock.release()
+
+
+def compact_in_background(path: Path = None):
+    """
+    Kicks off compaction on a worker thread if a threshold is crossed. Returns the thread (or None).
+    Not a daemon, so a script that just synced still finishes the compaction before exiting.
+    """
+    if not needs_compaction(path):
+        return None
+    worker = threading.Thread(target=compact, args=(path,), name="segment-compaction")
+    worker.start()
+    return worker
+
 
 def sync_data():
     """
     The Master Function.
     1. Checks local DB for last date.
     2. Scrapes only what's new.
-    3. Merges and Saves.
+    3. Appends it as a new segment (compaction happens in the background).
     """
     df_local = load_local_data()
 
@@ -43,29 +363,466 @@ def sync_data():
     else:
         print("🆕 No local data. Now scraping full 90-days.")
 
-    # Run the scraper
-    client = CapitolTradesClient()
-    df_new = client.fetch_trades(start_date=start_date)
+    # Run the scraper. Known keys let it stop at the first page we already fully have
+    client = CapitolTradesClient(archive=RawPageArchive())
+    df_new = client.fetch_trades(start_date=start_date, known_keys=known_trade_keys(df_local))
 
-    if df_new.empty:
+    # Save to disk (Persistence). Only trades with unseen ids get written
+    df_fresh = merge_new_trades(df_new)
+    if df_fresh.empty:
         print(" No new trades found. Up to date.")
         return df_local
+    compact_in_background()
 
-    # Merge logic (Avoid dupes)
-    if not df_local.empty:
-        # Combine old and new
-        df_combined = pd.concat([df_local, df_new])
-        # Dedupe based on key fields (cuz we don't have a unique ID)
-        df_combined = df_combined.drop_duplicates(
-            subset=['transaction_date', 'senator', 'ticker', 'amount_est', 'type'],
-            keep='last'
-        )
-    else:
-        df_combined = df_new
+    # Same view load_local_data would give, without reading it back
+    df_combined = _concat_frames([df_local, df_fresh]) if not df_local.empty else df_fresh
+    print(f"Database updated. {len(df_fresh)} new. Total records: {len(df_combined)}")
+
+    return df_combined
+
+
+def renormalize(archive: RawPageArchive = None, output_path: Path = None, batch_pages: int = 200) -> int:
+    """
+    Rebuilds the processed dataset from the raw page archive. Zero network.
+    Streams the archive newest-first, batch_pages snapshots at a time, each batch becoming a row group
+    of one Parquet file that replaces every segment at the end. Memory is one batch plus 8 bytes per trade key.
+    Returns the number of trades written.
+    """
+    archive = archive or RawPageArchive()
+    output_path = Path(output_path or DATA_PATH)
+    output_path.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path / ".renormalize.tmp"
+
+    client = CapitolTradesClient()  # only borrowed for its parsing, never hits the network
+    # Same trade shows up in many snapshots. Keep it as many times as any one snapshot lists it,
+    # so genuinely repeated same-day trades survive
+    emitted = Counter()
+    # Trade id ordinals count across batches, so a repeat that lands in a later batch still gets its own id
+    assigned = Counter()
+    batch, pages_in_batch, total = [], 0, 0
+    writer = None
+
+    def flush():
+        nonlocal batch, pages_in_batch, total, writer
+        if batch:
+            table = _to_arrow(client._normalize_data(batch, seen_keys=assigned))
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema, compression="zstd")
+            writer.write_table(table.cast(writer.schema))
+            total += table.num_rows
+        batch, pages_in_batch = [], 0
+
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    for entry, page_html in archive.iter_snapshots(newest_first=True):
+        on_page = Counter()
+        for row in client._rows_to_raw(parse_trades_table(page_html)):
+            key = raw_trade_key(row)
+            on_page[key] += 1
+            if on_page[key] > emitted[key]:
+                batch.append({**row, "fetched_at": entry["fetched_at"]})
+        for key, count in on_page.items():
+            emitted[key] = max(emitted[key], count)
+
+        pages_in_batch += 1
+        if pages_in_batch >= batch_pages:
+            flush()
+    flush()
+    if writer is not None:
+        writer.close()
 
-    # Save to disk (Persistence)
-    DATA_PATH.parent.mkdir(parents=True, exist_ok=True)
-    df_combined.to_csv(DATA_PATH, index=False)
-    print(f"Database updated. Total records: {len(df_combined)}")
+    if total == 0:
+        print("Raw archive is empty. Nothing to rebuild.")
+        return 0
 
-    return df_combined
\ No newline at end of file
+    old = _segment_files(output_path)
+    segment = output_path / f"seg-{time.time_ns():020d}-c.parquet"
+    os.replace(tmp_path, segment)
+    for f in old:
+        f.unlink(missing_ok=True)
+    ids = pq.read_table(segment, columns=['trade_id']).column('trade_id').to_pylist()
+    TradeIdIndex(output_path).rebuild(parse_trade_ids(ids))
+    print(f"Rebuilt {output_path} from {len(archive)} snapshots. Total records: {total}")
+    return total
+
+
+# --- Query engine ---
+
+_query_lock = threading.Lock()
+
+
+def _segment_seq(f: Path) -> int:
+    return int(re.match(r"seg-(\d+)", f.name).group(1))
+
+
+def _create_query_schema(conn):
+    cols = ", ".join(f"{c} {'REAL' if c == 'amount_est' else 'TEXT'}" for c in QUERY_COLUMNS[1:])
+    conn.executescript(f"""
+        CREATE TABLE IF NOT EXISTS trades (trade_id TEXT PRIMARY KEY, {cols});
+        CREATE TABLE IF NOT EXISTS loaded_segments (name TEXT PRIMARY KEY, seq INTEGER);
+    """)
+    _create_query_indexes(conn)
+    _create_derived_schema(conn, "derived")
+    # Views can't reach into an attached database, temp views can (and live as long as the connection)
+    extra = ", ".join(f"{name}.{c}" for name, fields in DERIVED_TABLES.items()
+                      for c in fields if c not in QUERY_COLUMNS)
+    joins = " ".join(f"LEFT JOIN derived.{name} AS {name} USING (trade_id)" for name in DERIVED_TABLES)
+    conn.execute(f"CREATE TEMP VIEW IF NOT EXISTS trade_view AS SELECT trades.*, {extra} FROM trades {joins}")
+
+
+def _create_derived_schema(conn, schema: str = "main"):
+    for name, fields in DERIVED_TABLES.items():
+        cols = ", ".join(f"{c} {t}" for c, t in fields.items())
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {schema}.{name} "
+                     f"(trade_id TEXT PRIMARY KEY, version TEXT NOT NULL, computed_at TEXT NOT NULL, {cols})")
+        # Fields registered after the table was first made
+        have = {row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({name})")}
+        for c, t in fields.items():
+            if c not in have:
+                conn.execute(f"ALTER TABLE {schema}.{name} ADD COLUMN {c} {t}")
+        for c in DERIVED_INDEXED_COLUMNS.get(name, []):
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_{name}_{c} ON {name} ({c})")
+
+
+def _create_query_indexes(conn):
+    for col in INDEXED_COLUMNS:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_trades_{col} ON trades ({col})")
+
+
+def _sql_rows(df: pd.DataFrame, columns: list) -> list:
+    """
+    DataFrame -> list of tuples SQLite can bind, built column-wise (no per-row pandas).
+    Dates become 'YYYY-MM-DD' so they compare as text; missing values become NULL.
+    """
+    values = []
+    for col in columns:
+        s = df[col] if col in df.columns else pd.Series(None, index=df.index, dtype=object)
+        if col in DATE_COLUMNS:
+            s = pd.to_datetime(s, format="ISO8601")
+            out = s.to_numpy(dtype="datetime64[D]").astype(str).astype(object)
+        else:
+            out = s.to_numpy(dtype=object)
+        out[pd.isna(s).to_numpy()] = None
+        values.append(out)
+    return list(zip(*values))
+
+
+def _load_segment_into(conn, f: Path):
+    available = pq.read_schema(f).names
+    df = pd.read_parquet(f, columns=[c for c in QUERY_COLUMNS if c in available])
+    placeholders = ", ".join("?" * len(QUERY_COLUMNS))
+    # Segments load oldest first, so REPLACE gives the same newest-wins view as load_local_data
+    conn.executemany(f"INSERT OR REPLACE INTO trades ({', '.join(QUERY_COLUMNS)}) VALUES ({placeholders})",
+                     _sql_rows(df, QUERY_COLUMNS))
+    conn.execute("INSERT OR REPLACE INTO loaded_segments VALUES (?, ?)", (f.name, _segment_seq(f)))
+
+
+def _sync_query_db(conn, path: Path):
+    """
+    Brings the mirror up to date with the segments: new segments are inserted, a compaction
+    of segments we already hold is just relabelled, anything else (save/renormalize) rebuilds.
+    """
+    live = _segment_files(path)
+    loaded = dict(conn.execute("SELECT name, seq FROM loaded_segments").fetchall())
+    new = [f for f in live if f.name not in loaded]
+    gone = loaded.keys() - {f.name for f in live}
+    if not new and not gone:
+        return
+
+    with conn:
+        if gone:
+            covered = max(loaded.values())
+            # A compacted segment takes the highest seq it absorbed: if we'd loaded up to there, we hold its rows
+            folded = [f for f in new if f.name.endswith("-c.parquet") and _segment_seq(f) <= covered]
+            if len(folded) == len(new) == 1:
+                conn.executemany("DELETE FROM loaded_segments WHERE name = ?", [(n,) for n in gone])
+                conn.execute("INSERT INTO loaded_segments VALUES (?, ?)", (new[0].name, _segment_seq(new[0])))
+                return
+            conn.execute("DELETE FROM trades")
+            conn.execute("DELETE FROM loaded_segments")
+            new = live
+            logger.info(f"Rebuilding query index from {len(live)} segments.")
+
+        # Bulk load into an empty table: cheaper to build the indexes once at the end than row by row
+        bulk = not conn.execute("SELECT 1 FROM trades LIMIT 1").fetchone()
+        last_rowid = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM trades").fetchone()[0]
+        if bulk:
+            for col in INDEXED_COLUMNS:
+                conn.execute(f"DROP INDEX IF EXISTS idx_trades_{col}")
+        for f in new:
+            _load_segment_into(conn, f)
+        if bulk:
+            _create_query_indexes(conn)
+            conn.execute("ANALYZE")  # lets the planner pick the most selective index when filters combine
+        # Enrichment saved earlier applies to the rows just loaded; put it where the sector index sees it
+        conn.execute("""
+            UPDATE trades SET sector = e.sector FROM derived.enrichment AS e
+            WHERE trades.rowid > ? AND e.trade_id = trades.trade_id AND e.sector IS NOT NULL
+        """, (last_rowid,))
+
+
+def _query_db(path: Path = None):
+    """
+    Open connection to an up-to-date query mirror, or None if the store is empty.
+    """
+    if path is None:
+        _migrate_legacy_store()
+    path = Path(path or DATA_PATH)
+    if not _segment_files(path):
+        return None
+    _trade_index(path)  # stamps ids onto a store that predates them
+
+    conn = sqlite3.connect(path / QUERY_DB_NAME, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("ATTACH DATABASE ? AS derived", (str(path / DERIVED_DB_NAME),))
+    # Filters hit rows scattered all over the table; keep the hot pages around between reruns
+    conn.execute("PRAGMA cache_size = -131072")
+    conn.execute("PRAGMA mmap_size = 1073741824")
+    with _query_lock:
+        _create_query_schema(conn)
+        try:
+            _sync_query_db(conn, path)
+        except FileNotFoundError:
+            # A compaction swapped segments under us. Go again on the new layout
+            _sync_query_db(conn, path)
+    return conn
+
+
+def _check_columns(columns):
+    unknown = [c for c in columns if c not in VIEW_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown trade columns: {unknown}")
+
+
+def _source(columns, min_values=None) -> str:
+    # Skip the join when everything asked for lives on trades itself
+    needed = set(columns) | set(min_values or {})
+    return "trades" if needed <= set(QUERY_COLUMNS) else "trade_view"
+
+
+def _where(senators=None, sectors=None, tickers=None, start_date=None, end_date=None, min_values=None):
+    """
+    WHERE clause + params for the filters the app offers. Empty/None filters are skipped.
+    min_values: {column: lower bound}, e.g. {'car_30d': 0.05}.
+    """
+    clauses, params = [], []
+    for col, values in (('senator', senators), ('sector', sectors), ('ticker', tickers)):
+        if values:
+            values = [values] if isinstance(values, str) else list(values)
+            clauses.append(f"{col} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    if start_date is not None:
+        clauses.append("transaction_date >= ?")
+        params.append(pd.Timestamp(start_date).strftime('%Y-%m-%d'))
+    if end_date is not None:
+        clauses.append("transaction_date <= ?")
+        params.append(pd.Timestamp(end_date).strftime('%Y-%m-%d'))
+    for col, bound in (min_values or {}).items():
+        _check_columns([col])
+        clauses.append(f"{col} > ?")
+        params.append(bound)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def _read_sql(conn, sql, params) -> pd.DataFrame:
+    try:
+        df = pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+    for col in DATE_COLUMNS + ['first_trade', 'last_trade']:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], format="ISO8601")
+    return df
+
+
+def query_trades(columns: list = None, order_by: str = None, descending: bool = False, limit: int = None,
+                 path: Path = None, **filters) -> pd.DataFrame:
+    """
+    The slice of the store matching the filters, straight from SQL.
+    filters: senators, sectors, tickers, start_date, end_date, min_values (see _where).
+    Derived columns (industry, car_30d, ...) come along for free through the join.
+    """
+    columns = list(columns or VIEW_COLUMNS)
+    _check_columns(columns + ([order_by] if order_by else []))
+    conn = _query_db(path)
+    if conn is None:
+        return pd.DataFrame(columns=columns)
+
+    where, params = _where(**filters)
+    sql = f"SELECT {', '.join(columns)} FROM {_source(columns, filters.get('min_values'))}{where}"
+    if order_by:
+        sql += f" ORDER BY {order_by} {'DESC' if descending else 'ASC'}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return _read_sql(conn, sql, params)
+
+
+def aggregate_trades(metrics=('trades', 'volume'), group_by: str = None, order_by: str = None,
+                     descending: bool = True, limit: int = None, path: Path = None, **filters) -> pd.DataFrame:
+    """
+    Named AGGREGATES over the filtered trades, optionally per group_by value.
+    Like pandas groupby, trades with no value for group_by are left out.
+    """
+    unknown = [m for m in metrics if m not in AGGREGATES]
+    if unknown:
+        raise ValueError(f"Unknown aggregates: {unknown}")
+    if group_by:
+        _check_columns([group_by])
+    if order_by and order_by not in metrics and order_by != group_by:
+        raise ValueError(f"Can only order by {group_by} or one of {list(metrics)}")
+
+    keys = [group_by] if group_by else []
+    conn = _query_db(path)
+    if conn is None:
+        return pd.DataFrame(columns=keys + list(metrics))
+
+    where, params = _where(**filters)
+    if group_by:
+        where += (" AND " if where else " WHERE ") + f"{group_by} IS NOT NULL"
+    select = ", ".join(keys + [f"{AGGREGATES[m]} AS {m}" for m in metrics])
+    sql = f"SELECT {select} FROM {_source(keys, filters.get('min_values'))}{where}"
+    if group_by:
+        sql += f" GROUP BY {group_by}"
+    if order_by:
+        sql += f" ORDER BY {order_by} {'DESC' if descending else 'ASC'}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return _read_sql(conn, sql, params)
+
+
+def distinct_values(column: str, path: Path = None) -> list:
+    """
+    Sorted non-null values of a column, for filter dropdowns. Indexed columns answer from the index.
+    """
+    _check_columns([column])
+    conn = _query_db(path)
+    if conn is None:
+        return []
+    try:
+        rows = conn.execute(f"SELECT DISTINCT {column} FROM {_source([column])} WHERE {column} IS NOT NULL "
+                            f"ORDER BY {column}").fetchall()
+    finally:
+        conn.close()
+    return [r[0] for r in rows]
+
+
+def _derived_db(path: Path = None):
+    path = Path(path or DATA_PATH)
+    path.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path / DERIVED_DB_NAME, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    with _query_lock:
+        _create_derived_schema(conn)
+    return conn
+
+
+def _check_table(name: str):
+    if name not in DERIVED_TABLES:
+        raise ValueError(f"Unknown derived table {name!r}, expected one of {list(DERIVED_TABLES)}")
+
+
+def register_result_fields(name: str, fields: dict):
+    """
+    Adds {column: SQLite type} fields to a derived table, e.g. the CAR columns of non-default horizons.
+    The table gains them the next time it's opened; fields it already has are left as they are.
+    """
+    _check_table(name)
+    for c, t in fields.items():
+        if c not in DERIVED_TABLES[name]:
+            DERIVED_TABLES[name][c] = t
+            if c not in VIEW_COLUMNS:
+                VIEW_COLUMNS.append(c)
+
+
+def save_results(name: str, df: pd.DataFrame, version: str, path: Path = None) -> int:
+    """
+    Upserts per-trade results of one computation (a DERIVED_TABLES entry), keyed by trade_id and
+    stamped with version. Only the table's fields that df carries are written (see register_result_fields
+    for new ones). Returns rows written.
+    """
+    _check_table(name)
+    fields = [c for c in DERIVED_TABLES[name] if c in df.columns]
+    if df.empty or 'trade_id' not in df.columns:
+        return 0
+
+    computed_at = pd.Timestamp.now().isoformat(timespec="seconds")
+    rows = [(r[0], str(version), computed_at) + r[1:]
+            for r in _sql_rows(df[df['trade_id'].notna()], ['trade_id'] + fields)]
+    cols = ['trade_id', 'version', 'computed_at'] + fields
+    updates = ", ".join(f"{c} = excluded.{c}" for c in cols[1:])
+    conn = _derived_db(path)
+    try:
+        with conn:
+            conn.executemany(f"INSERT INTO {name} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))}) "
+                             f"ON CONFLICT (trade_id) DO UPDATE SET {updates}", rows)
+    finally:
+        conn.close()
+
+    if 'sector' in fields:
+        # The mirror filters sector off its own indexed column, keep it in step
+        conn = _query_db(path)
+        if conn is not None:
+            sector = 3 + fields.index('sector')
+            try:
+                with _query_lock, conn:
+                    conn.executemany("UPDATE trades SET sector = ? WHERE trade_id = ?",
+                                     [(r[sector], r[0]) for r in rows if r[sector] is not None])
+            finally:
+                conn.close()
+    return len(rows)
+
+
+def load_results(name: str, version: str = None, path: Path = None) -> pd.DataFrame:
+    """
+    trade_id + the fields of one derived table. With version, only results from that version.
+    """
+    _check_table(name)
+    conn = _derived_db(path)
+    sql = f"SELECT trade_id, {', '.join(DERIVED_TABLES[name])} FROM {name}"
+    params = []
+    if version is not None:
+        sql += " WHERE version = ?"
+        params.append(str(version))
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def missing_results(df: pd.DataFrame, name: str, version: str, path: Path = None, settled_by: tuple = None) -> pd.DataFrame:
+    """
+    Rows of df that have no result from this version of the computation (never computed, or stale).
+    settled_by: (status field, value). Results whose status isn't that value yet count as missing too.
+    """
+    _check_table(name)
+    if df.empty:
+        return df
+    sql, params = f"SELECT trade_id FROM {name} WHERE version = ?", [str(version)]
+    if settled_by is not None:
+        column, value = settled_by
+        if column not in DERIVED_TABLES[name]:
+            raise ValueError(f"{name} has no field {column!r}")
+        sql += f" AND {column} = ?"
+        params.append(value)
+    conn = _derived_db(path)
+    try:
+        have = pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+    return df[~df['trade_id'].isin(have['trade_id'])]
+
+
+def with_results(df: pd.DataFrame, path: Path = None) -> pd.DataFrame:
+    """
+    df with every stored derived field joined on by trade_id (whatever version made it).
+    """
+    for name, fields in DERIVED_TABLES.items():
+        df = df.merge(load_results(name, path=path), on='trade_id', how='left', suffixes=('', '_stored'))
+        for c in fields:
+            if f"{c}_stored" in df.columns:
+                # Stored result wins, the store's own value (e.g. a scraped sector) is the fallback
+                df[c] = df.pop(f"{c}_stored").combine_first(df[c])
+    return df
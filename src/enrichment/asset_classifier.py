@@ -0,0 +1,103 @@
+import re
+import pandas as pd
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+STOCK = "Stock"
+ETF = "ETF"
+MUTUAL_FUND = "Mutual Fund"
+CRYPTO = "Crypto"
+TREASURY = "Treasury"
+BOND = "Bond"
+PRIVATE = "Private Fund"
+UNKNOWN = "Unknown"
+
+# Yahoo has prices for these (crypto under a rerouted symbol, see price_symbol)
+PRICEABLE_CLASSES = {STOCK, ETF, MUTUAL_FUND, CRYPTO}
+# ...and sector/industry metadata only for these
+METADATA_CLASSES = {STOCK, ETF, MUTUAL_FUND}
+
+# What a listed symbol looks like once ":US" is gone: BRK/B, BRK.B, BF-B, VWUSX
+_LISTED = re.compile(r"^[A-Z]{1,5}(?:[./-][A-Z]{1,2})?$")
+_NO_SYMBOL = {"", "N/A", "--", "---", "UNKNOWN", "NAN"}
+
+# Issuer text, checked in this order. First match wins
+_ETF_WORDS = re.compile(r"\b(?:ETF|ETN|SPDR|ISHARES|PROSHARES|INDEX FUND)\b")
+_TREASURY_WORDS = re.compile(r"\b(?:US TREASURY|U S TREASURY|UNITED STATES TREASURY|TREASURY (?:BILLS?|NOTES?|BONDS?)|"
+                             r"T BILLS?)\b")
+_BOND_WORDS = re.compile(r"\b(?:BONDS?|NOTES?|DEBENTURES?|CITY|COUNTY|STATE|AUTHORITY|DISTRICTS?|DEPARTMENT|"
+                         r"AGENCY|BOARD|COMMISSION|UNIVERSITY|SCHOOLS?|TOWNSHIP|VILLAGE|PARISH|GOVERNMENT|"
+                         r"MUNICIPAL|REVENUE|AIRPORTS?|FINANCE CORP(?:ORATION)?)\b|\d+(?:\.\d+)? ?%")
+_PRIVATE_WORDS = re.compile(r"\b(?:LLC|LP|L P|BDC|PARTNERS|FUND [IVX]+|ALLOCATE|CAPITAL [IVX]+)\b")
+_FUND_WORDS = re.compile(r"\b(?:FUND|PORTFOLIO)\b")
+_CRYPTO_WORDS = re.compile(r"\b(?:BITCOIN|ETHEREUM|CRYPTO ?CURRENCY)\b")
+
+
+def _classify_one(description: str, ticker: str) -> str:
+    text = re.sub(r"[^A-Z0-9%. ]+", " ", description.upper()) if isinstance(description, str) else ""
+    symbol = ticker.strip().upper().replace(":US", "") if isinstance(ticker, str) else ""
+    listed = symbol not in _NO_SYMBOL and bool(_LISTED.match(symbol))
+
+    # 1. Ticker shape says it all
+    if symbol.startswith("$"):
+        return CRYPTO
+    if symbol[:1].isdigit():
+        # CUSIP-ish fragments (7410Z) are debt issues
+        return BOND
+
+    # 2. Issuer text
+    if _ETF_WORDS.search(text):
+        return ETF
+    if _TREASURY_WORDS.search(text):
+        return TREASURY
+    if _CRYPTO_WORDS.search(text) and not listed:
+        return CRYPTO
+    if listed:
+        # Five letters ending in X is the mutual fund share class convention (VWUSX)
+        if len(symbol) == 5 and symbol.endswith("X") or _FUND_WORDS.search(text):
+            return MUTUAL_FUND
+        return STOCK
+    if _BOND_WORDS.search(text):
+        return BOND
+    if _PRIVATE_WORDS.search(text):
+        return PRIVATE
+    # No usable symbol (the entity resolver may still find one) or one Yahoo won't know (BRY.1)
+    return UNKNOWN
+
+
+def classify_assets(df: pd.DataFrame, ticker_col="ticker", description_col="asset_description") -> pd.Series:
+    """
+    Asset class per trade (STOCK, ETF, ...) from the issuer text and the shape of the ticker.
+    Runs once per distinct (description, ticker) pair. Same index as df.
+    """
+    if df.empty:
+        return pd.Series([], index=df.index, dtype=object)
+    descriptions = df[description_col].astype(object) if description_col in df.columns \
+        else pd.Series(None, index=df.index, dtype=object)
+    pairs = pd.MultiIndex.from_arrays([descriptions, df[ticker_col].astype(object)])
+    codes, uniques = pd.factorize(pairs)
+    classes = [_classify_one(description, ticker) for description, ticker in uniques]
+    return pd.Series(pd.Index(classes, dtype=object).take(codes), index=df.index, dtype=object)
+
+
+def is_priceable(df: pd.DataFrame, ticker_col="ticker", class_col="asset_type") -> pd.Series:
+    """
+    True where Yahoo can price the trade: a priceable asset class and a usable symbol.
+    Rows that aren't get skipped before any download. Classifies on the fly if df has no class_col.
+    """
+    classes = df[class_col].astype(object) if class_col in df.columns else classify_assets(df, ticker_col)
+    symbols = df[ticker_col].astype(object).fillna("").astype(str).str.strip().str.upper()
+    return classes.isin(PRICEABLE_CLASSES) & ~symbols.isin(_NO_SYMBOL)
+
+
+def price_symbol(ticker, asset_class=None):
+    """
+    Symbol to download prices under. Crypto is rerouted to Yahoo's pairs ($ETH -> ETH-USD);
+    everything else is left for the caller's usual cleanup. None if the asset can't be priced.
+    """
+    if asset_class is not None and asset_class not in PRICEABLE_CLASSES:
+        return None
+    if asset_class == CRYPTO and isinstance(ticker, str) and ticker.strip().startswith("$"):
+        return f"{ticker.strip()[1:].upper()}-USD"
+    return ticker
@@ -1,81 +1,135 @@
 import yfinance as yf
 import pandas as pd
 import logging
-import sys
-import os
-from contextlib import contextmanager
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from src.enrichment.asset_classifier import CRYPTO, METADATA_CLASSES
+from src.enrichment.metadata_cache import MetadataCache
 from src.utils.logger import setup_logger
+from src.utils.rate_limit import RateLimiter
 
 logger = setup_logger(__name__)
 
-@contextmanager
-def suppress_stdout_stderr():
+METADATA_COLUMNS = ["name", "sector", "industry", "market_cap"]
+# metadata_status: settled, or the lookup came back empty (dead ticker or a failed call) and the
+# row should be looked up again once the cache's negative entry for it has expired
+METADATA_FINAL, METADATA_PENDING = "final", "pending"
+
+
+def normalize_ticker(ticker):
     """
-    A context manager that redirects stdout and stderr to devnull
-    to suppress yfinance's verbose 404 errors.
+    Scraped ticker -> the symbol Yahoo knows it by, or None if there's nothing worth looking up.
+    """
+    if not isinstance(ticker, str):
+        return None
+
+    ticker = ticker.strip().upper()
+    # "N/A" would otherwise become a perfectly plausible looking "N-A"
+    if ticker == "N/A":
+        return None
+
+    # FIX: Sanitize ticker for Yahoo Finance (BRK/B -> BRK-B)
+    ticker = ticker.replace('/', '-').replace('.', '-')
+
+    # Skip tickers starting with $ (Crypto) or digits (Invalid/Bond)
+    if ticker.startswith('$') or (len(ticker) > 0 and ticker[0].isdigit()):
+        return None
+
+    # Handle Invalid Tickers
+    if not ticker or ticker == "---" or "UNKNOWN" in ticker:
+        return None
+    return ticker
+
+
+class YahooMetadataProvider:
+    """
+    Looks one symbol up on Yahoo Finance. Returns the metadata dict, None if Yahoo doesn't know
+    the symbol, and raises on anything that might go away if retried.
     """
-    with open(os.devnull, 'w') as devnull:
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
-        try:
-            sys.stdout = devnull
-            sys.stderr = devnull
-            yield
-        finally:
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
 
-class AssetEnricher:
     def __init__(self):
-        # Cache to prevent hitting Yahoo Finance API repeatedly for the same ticker
-        self._cache = {}
+        # yfinance reports 404s through its logger. Quieting the logger is thread-safe,
+        # unlike swapping sys.stdout/sys.stderr under every other thread's feet
+        logging.getLogger("yfinance").setLevel(logging.CRITICAL)
 
-    def get_asset_info(self, ticker: str) -> dict:
-        """
-        Fetches Sector, Industry, and Name for a given ticker.
-        """
-        # 1. Validation
-        if not isinstance(ticker, str):
-            return self._default_metadata()
+    def fetch(self, symbol: str):
+        info = yf.Ticker(symbol).info
 
-        ticker = ticker.strip().upper()
+        # Delisted/unknown symbols come back as a near-empty dict instead of an error
+        if not info or not (info.get('shortName') or info.get('sector')):
+            return None
 
-        # FIX: Sanitize ticker for Yahoo Finance (BRK/B -> BRK-B)
-        ticker = ticker.replace('/', '-').replace('.', '-')
+        return {
+            "name": info.get('shortName', 'Unknown'),
+            "sector": info.get('sector', 'Unknown'),
+            "industry": info.get('industry', 'Unknown'),
+            "market_cap": info.get('marketCap', 0)
+        }
 
-        # Skip tickers starting with $ (Crypto) or digits (Invalid/Bond)
-        if ticker.startswith('$') or (len(ticker) > 0 and ticker[0].isdigit()):
-            return self._default_metadata()
 
-        # 2. Check Cache
-        if ticker in self._cache:
-            return self._cache[ticker]
+class AssetEnricher:
+    # Bump when the metadata we produce changes meaning; stored results from older versions get redone
+    RESULTS_VERSION = "2"
 
-        # 3. Handle Invalid Tickers
-        if not ticker or ticker == "---" or "UNKNOWN" in ticker:
-            return self._default_metadata()
+    def __init__(self, cache: MetadataCache = None, provider=None, max_workers: int = 8,
+                 requests_per_second: float = 5.0, retries: int = 2, backoff: float = 0.5):
+        # Cache to prevent hitting Yahoo Finance API repeatedly for the same ticker.
+        # On disk and shared across runs/processes, failures included (with a shorter TTL)
+        self._cache = cache if cache is not None else MetadataCache()
+        self.provider = provider or YahooMetadataProvider()
+        self.max_workers = max(1, max_workers)
+        # One budget shared by every worker thread
+        self._limiter = RateLimiter(requests_per_second)
+        self.retries = retries
+        self.backoff = backoff
+        # Distinct symbols we didn't look up because their asset class has no metadata to find
+        self.calls_avoided = 0
+
+    def _fetch(self, symbol: str):
+        """
+        Provider lookup with rate limiting and retries (exponential backoff).
+        Returns metadata or None; a lookup that keeps failing counts as None.
+        """
+        for attempt in range(self.retries + 1):
+            self._limiter.wait()
+            try:
+                return self.provider.fetch(symbol)
+            except Exception as e:
+                # Common for delisted stocks or weird symbols, sometimes just Yahoo being Yahoo
+                if attempt == self.retries:
+                    logger.debug(f"Metadata fetch failed for {symbol}: {e}")
+                    return None
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def lookup(self, symbols, refresh: bool = False) -> dict:
+        """
+        {symbol: metadata or None} for already-normalized symbols. Cache first, then the
+        misses go out through the thread pool. Every answer (None included) gets cached.
+        refresh: skip the cache and ask the provider again.
+        """
+        symbols = list(dict.fromkeys(s for s in symbols if s))
+        cached = self._cache.get_many(symbols) if not refresh else {}
+        result = {s: value for s, (found, value) in cached.items() if found}
+        todo = [s for s in symbols if s not in result]
+
+        if todo:
+            logger.info(f"Fetching metadata for {len(todo)} tickers ({len(result)} cached)...")
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(todo))) as pool:
+                fetched = dict(zip(todo, pool.map(self._fetch, todo)))
+            self._cache.put_many(fetched)
+            result.update(fetched)
+        return result
 
-        # 4. Fetch from yfinance
-        try:
-            # Suppress the annoying 404 prints from yfinance
-            with suppress_stdout_stderr():
-                stock = yf.Ticker(ticker)
-                info = stock.info
-
-            metadata = {
-                "name": info.get('shortName', 'Unknown'),
-                "sector": info.get('sector', 'Unknown'),
-                "industry": info.get('industry', 'Unknown'),
-                "market_cap": info.get('marketCap', 0)
-            }
-
-            self._cache[ticker] = metadata
-            return metadata
-
-        except Exception as e:
-            # Common for delisted stocks or weird symbols
-            # logger.debug(f"Metadata fetch failed for {ticker}: {e}")
+    def get_asset_info(self, ticker: str) -> dict:
+        """
+        Fetches Sector, Industry, and Name for a given ticker.
+        """
+        symbol = normalize_ticker(ticker)
+        if symbol is None:
             return self._default_metadata()
+        metadata = self.lookup([symbol])[symbol]
+        return metadata if metadata is not None else self._default_metadata()
 
     def _default_metadata(self):
         return {
@@ -85,6 +139,30 @@ class AssetEnricher:
             "market_cap": 0
         }
 
+    def cache_stats(self) -> dict:
+        """
+        Hit/miss counters of the metadata cache for this process, plus its size on disk.
+        """
+        return self._cache.stats()
+
+    def ticker_dimension(self, tickers, refresh: bool = False) -> pd.DataFrame:
+        """
+        One row per distinct raw ticker: the ticker plus its metadata (defaults where unknown)
+        and metadata_status (pending where a lookup found nothing).
+        Work is per distinct normalized symbol, however many trades share it.
+        """
+        raw = pd.Series(pd.unique(pd.Series(tickers, dtype=object)), dtype=object)
+        symbols = raw.map(normalize_ticker)
+        found = self.lookup(symbols.dropna(), refresh=refresh)
+
+        default = self._default_metadata()
+        rows = [found.get(s) or default for s in symbols]
+        dim = pd.DataFrame(rows, columns=METADATA_COLUMNS)
+        dim.insert(0, "ticker", raw)
+        dim["metadata_status"] = [METADATA_PENDING if s is not None and found.get(s) is None else METADATA_FINAL
+                                  for s in symbols]
+        return dim
+
     def enrich_dataframe(self, df: pd.DataFrame, ticker_col='ticker') -> pd.DataFrame:
         """
         Applies enrichment to a full DataFrame.
@@ -94,22 +172,89 @@ class AssetEnricher:
 
         logger.info(f"Enriching {len(df)} trades with market data...")
 
-        # 1. Get new metadata
-        # Use apply to fetch data for every row
-        meta_list = df[ticker_col].apply(self.get_asset_info)
-        meta_df = pd.DataFrame(meta_list.tolist())
+        # 1. Get new metadata, once per distinct ticker
+        meta_df = self._metadata_for(df[ticker_col], asset_classes=df.get('asset_type'))
 
         # 2. Clean up duplicates BEFORE merging
         # If 'sector' or 'industry' already exist (as None/NaN), drop them
-        # so the new meta_df versions take precedence.
-        cols_to_drop = [c for c in meta_df.columns if c in df.columns]
+        # so the new metadata versions take precedence.
+        cols_to_drop = [c for c in METADATA_COLUMNS + ["metadata_status"] if c in df.columns]
         if cols_to_drop:
             df = df.drop(columns=cols_to_drop)
 
         # 3. Merge
-        # We reset index to ensure rows align perfectly
-        df = df.reset_index(drop=True)
-        meta_df = meta_df.reset_index(drop=True)
+        result = pd.concat([df.reset_index(drop=True), meta_df], axis=1)
+        logger.info(f"Metadata cache: {self.cache_stats()}")
+        return result
+
+    def enrich_missing(self, df: pd.DataFrame, ticker_col='ticker', stale=None, tickers=None) -> pd.DataFrame:
+        """
+        Incremental enrich_dataframe: only rows with no sector yet, plus any marked stale, get looked up.
+        Every other row keeps the values it has. Same index and row order as df.
+        stale: boolean mask over df of rows to refresh.
+        tickers: raw tickers to refresh wherever they appear.
+        Refreshed rows skip the cache; missing rows use it as usual.
+        Rows whose asset_type has no metadata (bonds, crypto, ...) get it as their sector, no lookup.
+        metadata_status says which rows' lookups found nothing (pending) and are worth redoing later.
+        """
+        if df.empty: return df
+
+        df = df.copy()
+        for col in METADATA_COLUMNS:
+            if col not in df.columns:
+                df[col] = None
+        if 'metadata_status' not in df.columns:
+            df['metadata_status'] = METADATA_FINAL
+
+        missing = df['sector'].isna().to_numpy()
+        refresh = pd.Series(False, index=df.index)
+        if stale is not None:
+            refresh |= pd.Series(stale, index=df.index).fillna(False).astype(bool)
+        if tickers is not None:
+            refresh |= df[ticker_col].isin(list(tickers))
+        refresh = refresh.to_numpy()
+
+        for mask, forced in ((missing & ~refresh, False), (refresh, True)):
+            if mask.any():
+                classes = df.loc[mask, 'asset_type'] if 'asset_type' in df.columns else None
+                meta_df = self._metadata_for(df.loc[mask, ticker_col], refresh=forced, asset_classes=classes)
+                for col in METADATA_COLUMNS + ['metadata_status']:
+                    # object first: market_cap may be an all-None column until now
+                    df[col] = df[col].astype(object)
+                    df.loc[mask, col] = meta_df[col].to_numpy()
+
+        logger.info(f"Enriched {int((missing | refresh).sum())} of {len(df)} trades "
+                    f"({int(refresh.sum())} refreshed). Metadata cache: {self.cache_stats()}")
+        return df
+
+    def _metadata_for(self, tickers: pd.Series, refresh: bool = False, asset_classes: pd.Series = None) -> pd.DataFrame:
+        """
+        METADATA_COLUMNS plus metadata_status for each ticker, positionally aligned (0..n-1), via the dimension table.
+        asset_classes (aligned with tickers): rows outside METADATA_CLASSES are never looked up;
+        their sector is the asset class instead ("Treasury", "Bond", ...).
+        """
+        # astype(object): the store hands back tickers as a categorical
+        tickers = tickers.astype(object).reset_index(drop=True)
+        if asset_classes is None:
+            lookup = np.ones(len(tickers), dtype=bool)
+        else:
+            asset_classes = asset_classes.astype(object).reset_index(drop=True)
+            lookup = asset_classes.isin(METADATA_CLASSES).to_numpy()
+
+        dim = self.ticker_dimension(tickers[lookup], refresh=refresh)
+        # Positional take instead of a merge: keeps row order, and NaN tickers match their own row
+        codes = pd.Index(dim["ticker"]).get_indexer(tickers[lookup])
+        columns = METADATA_COLUMNS + ["metadata_status"]
+        if lookup.all():
+            return dim[columns].iloc[codes].reset_index(drop=True)
+
+        defaults = {**self._default_metadata(), "metadata_status": METADATA_FINAL}
+        meta = pd.DataFrame({col: pd.Series([value] * len(tickers), dtype=object)
+                             for col, value in defaults.items()})
+        meta.loc[lookup, columns] = dim[columns].iloc[codes].to_numpy()
+        meta.loc[~lookup, "sector"] = asset_classes[~lookup].fillna("Unknown").to_numpy()
+        meta.loc[(asset_classes == CRYPTO).to_numpy(), "industry"] = "Cryptocurrency"
 
-        result = pd.concat([df, meta_df], axis=1)
-        return result
\ No newline at end of file
+        skipped = set(tickers[~lookup].map(normalize_ticker).dropna()) - set(dim["ticker"].map(normalize_ticker))
+        self.calls_avoided += len(skipped)
+        return meta
@@ -0,0 +1,290 @@
+import hashlib
+import pickle
+import re
+from pathlib import Path
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from src.config import DATA_DIR
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Local security master: a CSV with at least `ticker` and `name` columns. Not shipped (listings go stale);
+# any exchange or SEC ticker list will do, e.g. SEC's company_tickers.json with `title` renamed to `name`.
+# fixtures/security_master.csv shows the format. Without it, only names our own trades carry can match
+SECURITY_MASTER_PATH = DATA_DIR / "reference" / "security_master.csv"
+INDEX_CACHE_DIR = DATA_DIR / "cache"
+
+# What the scraper leaves in the ticker column when the issuer cell had no symbol
+UNRESOLVED_TICKERS = {"UNKNOWN", "N/A", "--", "---", ""}
+# Cosine similarity of the character trigram profiles; below this we'd rather not guess
+MIN_CONFIDENCE = 0.8
+# Queries per sparse matrix product. Bounds the candidates-by-master matrix in memory
+BATCH_SIZE = 2000
+# Candidate search only uses trigrams rarer than this (share of master names containing them);
+# "INC"/"ING"-style trigrams would otherwise drag every name into every query
+CANDIDATE_MAX_DF = 0.01
+# Best candidates per query that get the exact cosine rescore
+CANDIDATES = 8
+
+# Words that say what kind of security it is, not which company
+_NOISE_WORDS = re.compile(
+    r"\b(?:THE|INC|INCORPORATED|CORP|CORPORATION|CO|COMPANY|LTD|LIMITED|PLC|LLC|LP|SA|NV|AG|ADR|ADS|"
+    r"CLASS [A-Z]|CL [A-Z]|COMMON STOCK|COMMON|ORDINARY SHARES|SHARES|STOCK)\b"
+)
+
+
+def normalize_name(name) -> str:
+    """
+    Issuer / security name -> comparable key. 'The Goldman Sachs Group, Inc.' -> 'GOLDMAN SACHS GROUP'.
+    """
+    if not isinstance(name, str):
+        return ""
+    name = name.upper().replace("&", " AND ")
+    name = re.sub(r"[^A-Z0-9 ]+", " ", name)
+    return " ".join(_NOISE_WORDS.sub(" ", name).split())
+
+
+def is_unresolved(tickers: pd.Series) -> pd.Series:
+    """
+    True where the ticker column holds no usable symbol.
+    """
+    tickers = tickers.astype(object)
+    return tickers.isna() | tickers.astype(str).str.strip().str.upper().isin(UNRESOLVED_TICKERS)
+
+
+class Match(NamedTuple):
+    ticker: str
+    name: str
+    confidence: float
+
+
+class EntityResolver:
+    """
+    Maps free-text asset descriptions to tickers through a character trigram TF-IDF index over a
+    security master. Exact (normalized) names short-circuit the index. Everything else goes in batches:
+    rare trigrams pick a handful of candidates (one small sparse product), then those get the exact
+    cosine. Every answer is memoized, so repeats cost a dict lookup.
+    """
+    # Bump when matching changes enough that stored resolutions should be redone
+    RESULTS_VERSION = "1"
+    # Bump when the pickled index layout changes
+    INDEX_VERSION = "2"
+
+    def __init__(self, master: pd.DataFrame, min_confidence: float = MIN_CONFIDENCE):
+        master = master.dropna(subset=["ticker", "name"])
+        keys = master["name"].map(normalize_name)
+        master, keys = master[keys != ""], keys[keys != ""]
+
+        self.min_confidence = min_confidence
+        self.tickers = master["ticker"].astype(str).to_numpy(dtype=object)
+        self.names = master["name"].astype(str).to_numpy(dtype=object)
+        # First listing wins for duplicate names
+        self._exact = {}
+        for i, key in enumerate(keys):
+            self._exact.setdefault(key, i)
+        self._vectorizer = None
+        self._index = None
+        if len(keys):
+            self._vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=(3, 3), dtype=np.float32)
+            # Rows come out L2-normalized, so a dot product is the cosine similarity
+            self._vectors = self._vectorizer.fit_transform(keys).tocsr()
+            # Inverted index (trigram x security) for the candidate search, common trigrams emptied out
+            index = self._vectors.T.tocsr()
+            postings = np.diff(index.indptr)
+            rare = postings <= max(CANDIDATE_MAX_DF * len(keys), CANDIDATES)
+            self._rare = rare.astype(np.float32)
+            self._index = sparse.diags(self._rare) @ index
+            self._index.eliminate_zeros()
+        self._memo = {}
+
+    def add_names(self, extra: pd.DataFrame) -> None:
+        """
+        Appends ticker/name rows to a built index without refitting it: the new names are vectorized
+        against the master's trigram vocabulary. Names already in the index keep their first ticker.
+        """
+        extra = extra.dropna(subset=["ticker", "name"])
+        keys = extra["name"].map(normalize_name)
+        extra, keys = extra[keys != ""], keys[keys != ""]
+        if extra.empty:
+            return
+        if self._vectorizer is None:
+            # Nothing fitted to extend
+            self.__init__(extra, self.min_confidence)
+            return
+
+        offset = len(self.tickers)
+        self.tickers = np.concatenate([self.tickers, extra["ticker"].astype(str).to_numpy(dtype=object)])
+        self.names = np.concatenate([self.names, extra["name"].astype(str).to_numpy(dtype=object)])
+        for i, key in enumerate(keys, offset):
+            self._exact.setdefault(key, i)
+        vectors = self._vectorizer.transform(keys).tocsr()
+        self._vectors = sparse.vstack([self._vectors, vectors]).tocsr()
+        index = sparse.diags(self._rare) @ vectors.T.tocsr()
+        index.eliminate_zeros()
+        self._index = sparse.hstack([self._index, index]).tocsr()
+        # Earlier answers may have a better match now
+        self._memo = {}
+
+    def __len__(self):
+        return len(self.tickers)
+
+    @classmethod
+    def load(cls, path: Path = None, extra: pd.DataFrame = None, min_confidence: float = MIN_CONFIDENCE):
+        """
+        Resolver over the security master at path (if it exists) plus any extra ticker/name rows.
+        The index for a master file is pickled under INDEX_CACHE_DIR and reused until the file's content
+        changes; extra rows go on top after loading, so new trades don't invalidate it.
+        """
+        path = Path(path) if path else SECURITY_MASTER_PATH
+        has_extra = extra is not None and not extra.empty
+        if not path.exists():
+            logger.warning(f"No security master at {path}; only names our own trades carry can be matched. "
+                           f"See SECURITY_MASTER_PATH in {__name__} for where to get one.")
+            master = extra[["ticker", "name"]] if has_extra else pd.DataFrame(columns=["ticker", "name"])
+            return cls(master, min_confidence)
+
+        resolver = cls._load_master(path)
+        resolver.min_confidence = min_confidence
+        if has_extra:
+            resolver.add_names(extra[["ticker", "name"]])
+        return resolver
+
+    @classmethod
+    def _load_master(cls, path: Path):
+        digest = hashlib.sha256(f"{cls.INDEX_VERSION}:".encode() + path.read_bytes()).hexdigest()
+        cached = INDEX_CACHE_DIR / f"entity_index-{digest[:16]}.pkl"
+        if cached.exists():
+            with open(cached, "rb") as f:
+                return pickle.load(f)
+
+        resolver = cls(pd.read_csv(path, usecols=["ticker", "name"], dtype=str))
+        INDEX_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for stale in INDEX_CACHE_DIR.glob("entity_index-*.pkl"):
+            stale.unlink(missing_ok=True)
+        tmp = cached.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(resolver, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(cached)
+        return resolver
+
+    @staticmethod
+    def master_from_trades(df: pd.DataFrame, ticker_col="ticker", description_col="asset_description") -> pd.DataFrame:
+        """
+        ticker/name pairs our own history already knows: every trade that came with a symbol.
+        """
+        if df.empty or description_col not in df.columns:
+            return pd.DataFrame(columns=["ticker", "name"])
+        known = df.loc[~is_unresolved(df[ticker_col]), [ticker_col, description_col]].astype(object)
+        known.columns = ["ticker", "name"]
+        return known.drop_duplicates().reset_index(drop=True)
+
+    def _best_matches(self, keys: list) -> None:
+        # Memoizes the best candidate for every key, confident or not; the threshold applies on the way out
+        todo = []
+        for key in keys:
+            if key in self._memo:
+                continue
+            i = self._exact.get(key)
+            if i is not None:
+                self._memo[key] = Match(self.tickers[i], self.names[i], 1.0)
+            elif not key or self._index is None:
+                self._memo[key] = None
+            else:
+                todo.append(key)
+
+        for start in range(0, len(todo), BATCH_SIZE):
+            chunk = todo[start:start + BATCH_SIZE]
+            queries = self._vectorizer.transform(chunk)
+            best, scores = self._rescore(queries, self._candidates(queries))
+            for key, i, score in zip(chunk, best, scores):
+                self._memo[key] = Match(self.tickers[i], self.names[i], float(score)) if score > 0 else None
+
+    def _candidates(self, queries) -> list:
+        """
+        Up to CANDIDATES security rows per query, ranked by the rare-trigram part of the score.
+        A query made only of common trigrams gets scored against the whole master instead.
+        """
+        partial = (queries @ self._index).tocsr()
+        candidates = []
+        for q in range(queries.shape[0]):
+            lo, hi = partial.indptr[q], partial.indptr[q + 1]
+            if hi == lo:
+                full = (queries[q] @ self._vectors.T).toarray().ravel()
+                candidates.append(np.argsort(full)[::-1][:CANDIDATES])
+                continue
+            cols, vals = partial.indices[lo:hi], partial.data[lo:hi]
+            if hi - lo > CANDIDATES:
+                top = np.argpartition(vals, -CANDIDATES)[-CANDIDATES:]
+                cols = cols[top]
+            candidates.append(cols)
+        return candidates
+
+    def _rescore(self, queries, candidates):
+        # Exact cosine between each query and its candidates, all pairs in one sparse elementwise product
+        counts = np.array([len(c) for c in candidates])
+        rows = np.repeat(np.arange(len(candidates)), counts)
+        cols = np.concatenate(candidates).astype(np.int64)
+        scores = np.asarray(queries[rows].multiply(self._vectors[cols]).sum(axis=1)).ravel()
+
+        best = np.zeros(len(candidates), dtype=np.int64)
+        best_scores = np.zeros(len(candidates))
+        bounds = np.concatenate([[0], np.cumsum(counts)])
+        for q in range(len(candidates)):
+            lo, hi = bounds[q], bounds[q + 1]
+            if hi > lo:
+                j = lo + int(np.argmax(scores[lo:hi]))
+                best[q], best_scores[q] = cols[j], scores[j]
+        return best, best_scores
+
+    def resolve(self, description: str):
+        """
+        Best Match for one description, or None if nothing clears min_confidence.
+        """
+        key = normalize_name(description)
+        self._best_matches([key])
+        match = self._memo[key]
+        return match if match is not None and match.confidence >= self.min_confidence else None
+
+    def resolve_many(self, descriptions) -> pd.DataFrame:
+        """
+        Batch lookup. One row per description, in order: ticker (None below min_confidence),
+        the master name it matched and the confidence (0-1) of that best candidate.
+        """
+        descriptions = pd.Series(descriptions, dtype=object).reset_index(drop=True)
+        keys = descriptions.map(normalize_name)
+        self._best_matches(list(pd.unique(keys)))
+
+        matches = [self._memo[k] for k in keys]
+        confidence = np.array([m.confidence if m else 0.0 for m in matches])
+        accepted = confidence >= self.min_confidence
+        return pd.DataFrame({
+            "description": descriptions,
+            "ticker": [m.ticker if ok else None for m, ok in zip(matches, accepted)],
+            "matched_name": [m.name if m else None for m in matches],
+            "confidence": confidence,
+        })
+
+    def fill_unknown(self, df: pd.DataFrame, ticker_col="ticker", description_col="asset_description") -> pd.DataFrame:
+        """
+        Copy of df with unresolved tickers filled in from asset_description wherever the match is
+        confident. ticker_confidence says how sure we were (NaN where the scrape gave the ticker).
+        """
+        df = df.copy()
+        df["ticker_confidence"] = np.nan
+        unresolved = is_unresolved(df[ticker_col]).to_numpy()
+        if not unresolved.any() or description_col not in df.columns:
+            return df
+
+        found = self.resolve_many(df.loc[unresolved, description_col])
+        hit = found["ticker"].notna().to_numpy()
+        rows = df.index[unresolved][hit]
+        # object first: a categorical won't take symbols it hasn't seen
+        df[ticker_col] = df[ticker_col].astype(object)
+        df.loc[rows, ticker_col] = found["ticker"].to_numpy()[hit]
+        df.loc[rows, "ticker_confidence"] = found["confidence"].to_numpy()[hit]
+        logger.info(f"Resolved {int(hit.sum())} of {int(unresolved.sum())} trades without a ticker.")
+        return df
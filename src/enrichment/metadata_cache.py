@@ -0,0 +1,158 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from src.config import DATA_DIR
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+CACHE_PATH = DATA_DIR / "cache" / "asset_metadata.sqlite"
+
+# A good answer holds for a week; "no such ticker" gets re-asked after a day in case Yahoo was just flaky
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_NEGATIVE_TTL = 24 * 3600
+DEFAULT_MAX_ENTRIES = 50_000
+# Eviction checks the table size every this many writes instead of on each one
+EVICT_EVERY = 64
+
+
+class MetadataCache:
+    """
+    On-disk TTL cache for ticker metadata, shared by every process that opens the same file.
+
+    An entry is either a metadata dict or a negative result (the lookup failed / ticker is dead),
+    which expires sooner. Past max_entries the least recently used entries go first.
+    Hit/miss counters are per instance (this process) and come back from stats().
+    """
+
+    def __init__(self, path: Path = None, ttl: float = DEFAULT_TTL, negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, clock=time.time):
+        self.path = Path(path) if path else CACHE_PATH
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._conn = None
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.counters = {"hits": 0, "negative_hits": 0, "misses": 0, "expired": 0, "writes": 0, "evictions": 0}
+
+    def _db(self):
+        # Opened on first use, so building an enricher never touches the disk by itself
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value TEXT,
+                    expires_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries (last_used);
+            """)
+        return self._conn
+
+    def get(self, key: str):
+        """
+        (found, value). value is None for a cached negative result.
+        """
+        return self.get_many([key]).get(key, (False, None))
+
+    def get_many(self, keys) -> dict:
+        """
+        {key: (found, value)} for every key, one round trip per 500 keys.
+        """
+        keys = list(dict.fromkeys(keys))
+        now = self._clock()
+        found = {}
+        with self._lock:
+            conn = self._db()
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = conn.execute(f"SELECT key, value, expires_at FROM entries "
+                                    f"WHERE key IN ({', '.join('?' * len(chunk))})", chunk).fetchall()
+                found.update({k: (v, exp) for k, v, exp in rows})
+
+            result, fresh = {}, []
+            for key in keys:
+                if key not in found:
+                    self.counters["misses"] += 1
+                    result[key] = (False, None)
+                elif found[key][1] <= now:
+                    self.counters["expired"] += 1
+                    self.counters["misses"] += 1
+                    result[key] = (False, None)
+                else:
+                    value = found[key][0]
+                    self.counters["negative_hits" if value is None else "hits"] += 1
+                    result[key] = (True, None if value is None else json.loads(value))
+                    fresh.append(key)
+
+            if fresh:
+                with conn:
+                    conn.executemany("UPDATE entries SET last_used = ? WHERE key = ?", [(now, k) for k in fresh])
+        return result
+
+    def put(self, key: str, value: dict = None):
+        """
+        Caches value for key. None records a negative result (shorter TTL).
+        """
+        self.put_many({key: value})
+
+    def put_many(self, items: dict):
+        now = self._clock()
+        rows = [(key, None if value is None else json.dumps(value),
+                 now + (self.negative_ttl if value is None else self.ttl), now)
+                for key, value in items.items()]
+        with self._lock:
+            conn = self._db()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", rows)
+            self.counters["writes"] += len(rows)
+            self._writes += len(rows)
+            if self._writes >= EVICT_EVERY:
+                self._writes = 0
+                self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        with conn:
+            expired = conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,)).rowcount
+            over = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_entries
+            lru = 0
+            if over > 0:
+                lru = conn.execute("DELETE FROM entries WHERE key IN "
+                                   "(SELECT key FROM entries ORDER BY last_used LIMIT ?)", (over,)).rowcount
+        self.counters["evictions"] += expired + lru
+
+    def evict(self):
+        """
+        Drops expired entries, then least recently used ones down to max_entries.
+        """
+        with self._lock:
+            self._evict(self._db(), self._clock())
+
+    def clear(self):
+        with self._lock:
+            with self._db() as conn:
+                conn.execute("DELETE FROM entries")
+
+    def stats(self) -> dict:
+        """
+        This process's counters plus what's on disk right now. For monitoring.
+        """
+        with self._lock:
+            entries, negative = self._db().execute(
+                "SELECT COUNT(*), COUNT(*) - COUNT(value) FROM entries").fetchone()
+        lookups = self.counters["hits"] + self.counters["negative_hits"] + self.counters["misses"]
+        hit_rate = (self.counters["hits"] + self.counters["negative_hits"]) / lookups if lookups else 0.0
+        return {**self.counters, "hit_rate": hit_rate, "entries": entries, "negative_entries": negative}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,65 @@
+import re
+from lxml import html as lxml_html
+
+# Elements that start their own line when a browser renders innerText
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "dd", "details", "div", "dl", "dt", "fieldset",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr",
+    "li", "main", "nav", "ol", "p", "pre", "section", "summary", "table", "tbody", "thead", "tr", "ul",
+}
+SKIP_TAGS = {"script", "style", "template", "noscript", "svg"}
+
+_LINE_BREAK = "\x00"
+_WHITESPACE = re.compile(r"[ \t\r\n\f\v]+")
+
+
+def inner_text(element) -> str:
+    """
+    Approximates the browser's HTMLElement.innerText for static markup:
+    block elements go on their own line, runs of whitespace collapse to one space.
+    Good enough to give the same strings Playwright's inner_text() returns for the trades table.
+    """
+    parts = []
+
+    def walk(node):
+        tag = node.tag if isinstance(node.tag, str) else None
+        if tag is None or tag in SKIP_TAGS:
+            return
+        if tag == "br":
+            parts.append(_LINE_BREAK)
+            return
+
+        block = tag in BLOCK_TAGS
+        if block:
+            parts.append(_LINE_BREAK)
+        if node.text:
+            parts.append(node.text)
+        for child in node:
+            walk(child)
+            if child.tail:
+                parts.append(child.tail)
+        if block:
+            parts.append(_LINE_BREAK)
+
+    # The element itself is the container, so only its children decide the line layout
+    if element.text:
+        parts.append(element.text)
+    for child in element:
+        walk(child)
+        if child.tail:
+            parts.append(child.tail)
+
+    text = _WHITESPACE.sub(" ", "".join(parts))
+    lines = [line.strip() for line in text.split(_LINE_BREAK)]
+    return "\n".join(line for line in lines if line)
+
+
+def parse_trades_table(page_html: str) -> list:
+    """
+    Parses a trades page into a list of rows, each a list of cell texts.
+    Same shape as the browser-side ROWS_JS evaluation.
+    """
+    if not page_html:
+        return []
+    doc = lxml_html.fromstring(page_html)
+    return [[inner_text(td) for td in tr.iter("td")] for tr in doc.iterfind(".//tbody/tr")]
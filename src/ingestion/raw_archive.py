@@ -0,0 +1,82 @@
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from src.config import RAW_DATA_DIR
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class RawPageArchive:
+    """
+    Content-addressed archive of every trades page we scrape.
+
+    Layout under root:
+        pages/<2 hex>/<sha256>.html.gz   one gzipped snapshot per distinct page body
+        manifest.jsonl                   one line per snapshot: digest, url, page, fetched_at
+
+    A page we've already seen byte-for-byte costs nothing: no blob write, no manifest line.
+    """
+
+    def __init__(self, root: Path = None):
+        self.root = Path(root) if root else RAW_DATA_DIR / "capitoltrades"
+        self.pages_dir = self.root / "pages"
+        self.manifest_path = self.root / "manifest.jsonl"
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.pages_dir / digest[:2] / f"{digest}.html.gz"
+
+    def put(self, page_html: str, url: str, page_num: int, fetched_at: datetime = None) -> str:
+        """
+        Stores one page snapshot. Returns its content hash.
+        """
+        body = page_html.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        blob = self._blob_path(digest)
+        if blob.exists():
+            return digest
+
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so a crash never leaves a half-written blob behind
+        tmp = blob.with_suffix(".tmp")
+        with gzip.open(tmp, "wb", compresslevel=6) as f:
+            f.write(body)
+        os.replace(tmp, blob)
+
+        entry = {
+            "digest": digest,
+            "url": url,
+            "page": page_num,
+            "fetched_at": (fetched_at or datetime.now()).isoformat(),
+        }
+        with open(self.manifest_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        return digest
+
+    def get(self, digest: str) -> str:
+        with gzip.open(self._blob_path(digest), "rb") as f:
+            return f.read().decode("utf-8")
+
+    def entries(self, newest_first: bool = True) -> list:
+        if not self.manifest_path.exists():
+            return []
+        with open(self.manifest_path, encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        return entries[::-1] if newest_first else entries
+
+    def iter_snapshots(self, newest_first: bool = True):
+        """
+        Yields (manifest entry, page html) one snapshot at a time, so memory stays flat
+        no matter how much history is archived.
+        """
+        for entry in self.entries(newest_first=newest_first):
+            try:
+                yield entry, self.get(entry["digest"])
+            except (OSError, EOFError) as e:
+                logger.warning(f"Skipping unreadable snapshot {entry['digest']}: {e}")
+
+    def __len__(self):
+        return len(self.entries())
@@ -0,0 +1,107 @@
+import hashlib
+from collections import Counter
+import numpy as np
+import pandas as pd
+
+# Raw cells that pin down a trade. pub_date_raw is left out on purpose:
+# it reads "Today"/"Yesterday" and changes from one scrape to the next.
+KEY_FIELDS = ("politician_raw", "issuer_raw", "trade_date_raw", "type_raw", "size_raw")
+
+
+def _clean(value) -> str:
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    return str(value).strip()
+
+
+def raw_trade_key(row: dict) -> int:
+    """
+    64-bit content hash of one raw trade. Stable across runs and processes (unlike hash()).
+    """
+    blob = "\x1f".join(_clean(row.get(field)) for field in KEY_FIELDS)
+    return int.from_bytes(hashlib.blake2b(blob.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def raw_trade_keys(df: pd.DataFrame) -> np.ndarray:
+    """
+    raw_trade_key for every row of a frame, as uint64. Each distinct combination of key cells is
+    hashed once and broadcast back; missing key columns count as empty.
+    """
+    if df.empty:
+        return np.array([], dtype=np.uint64)
+    codes, cells = [], []
+    for field in KEY_FIELDS:
+        col = df[field] if field in df.columns else pd.Series("", index=df.index)
+        c, uniques = pd.factorize(col.astype(object))
+        # Missing cells factorize to -1, which picks the trailing ""
+        cells.append([_clean(v) for v in uniques] + [""])
+        codes.append(c)
+    combos, inverse = np.unique(np.column_stack(codes), axis=0, return_inverse=True)
+    # Same blob as raw_trade_key, built a column at a time
+    blobs = np.array(cells[0], dtype=object)[combos[:, 0]]
+    for f in range(1, len(KEY_FIELDS)):
+        blobs = blobs + "\x1f" + np.array(cells[f], dtype=object)[combos[:, f]]
+    blake2b = hashlib.blake2b
+    digests = b"".join([blake2b(blob.encode("utf-8"), digest_size=8).digest() for blob in blobs.tolist()])
+    return np.frombuffer(digests, dtype=">u8").astype(np.uint64)[inverse.ravel()]
+
+
+def known_trade_keys(df: pd.DataFrame) -> Counter:
+    """
+    Key -> how many stored trades carry it, for everything already in the local store. Counts, not
+    a set, so a second identical same-day trade still reads as new. 8 bytes of key per distinct
+    trade, so even a big history is a cheap filter to hand to the scraper.
+    """
+    if df.empty or any(field not in df.columns for field in KEY_FIELDS):
+        return Counter()
+    keys, counts = np.unique(raw_trade_keys(df), return_counts=True)
+    return Counter(dict(zip(keys.tolist(), counts.tolist())))
+
+
+# Odd 64-bit constant (golden ratio) used to spread occurrence ordinals across the id space
+_ORDINAL_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def trade_id_values(df: pd.DataFrame, seen: Counter = None) -> np.ndarray:
+    """
+    Deterministic uint64 id per row: the raw content key, mixed with how many times that same
+    content already appeared earlier in the frame. Two genuinely identical same-day trades
+    (same politician, issuer, date, type and size) get different ids instead of collapsing.
+    seen: key -> occurrences already given ids before this frame (earlier batches of one job).
+    Counting continues from there, and it's updated with this frame's keys.
+    """
+    keys = raw_trade_keys(df)
+    if not len(keys):
+        return keys
+    ordinals = pd.Series(keys).groupby(keys).cumcount().to_numpy(dtype=np.uint64)
+    if seen is not None:
+        distinct, counts = np.unique(keys, return_counts=True)
+        before = np.array([seen.get(k, 0) for k in distinct.tolist()], dtype=np.uint64)
+        ordinals += before[np.searchsorted(distinct, keys)]
+        seen.update(dict(zip(distinct.tolist(), counts.tolist())))
+    # First occurrence keeps the plain content key; wraparound on overflow is intended
+    with np.errstate(over="ignore"):
+        return keys ^ (ordinals * _ORDINAL_MIX)
+
+
+def format_trade_ids(values: np.ndarray) -> pd.Series:
+    # All ids in one hex string, cut into 16-char pieces: no per-id Python formatting
+    text = np.asarray(values, dtype=">u8").tobytes().hex().encode("ascii")
+    return pd.Series(np.frombuffer(text, dtype="S16").astype(str).astype(object), dtype=object)
+
+
+def parse_trade_ids(ids) -> np.ndarray:
+    ids = list(ids)
+    if not ids:
+        return np.array([], dtype=np.uint64)
+    return np.frombuffer(bytes.fromhex("".join(ids)), dtype=">u8").astype(np.uint64)
+
+
+def assign_trade_ids(df: pd.DataFrame, seen: Counter = None) -> pd.Series:
+    """
+    16-hex-char trade_id column for a frame of raw trades, aligned to df's index.
+    seen: see trade_id_values.
+    """
+    ids = format_trade_ids(trade_id_values(df, seen))
+    ids.index = df.index
+    return ids
@@ -0,0 +1,76 @@
+import pandas as pd
+from src.data_store import missing_results, register_result_fields, save_results
+from src.enrichment.asset_classifier import classify_assets
+from src.enrichment.asset_metadata import METADATA_FINAL, AssetEnricher
+from src.enrichment.entity_resolver import EntityResolver
+from src.analysis.event_engine import FINAL
+from src.analysis.metrics import EventStudy
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def _due(df: pd.DataFrame, name: str, version: str, path, force_ids, settled_by=None) -> pd.Series:
+    # Rows with no stored result from this version, plus the ones we were told to redo
+    missing = missing_results(df, name, version, path, settled_by)
+    return df['trade_id'].isin(missing['trade_id']) | df['trade_id'].isin(force_ids)
+
+
+def refresh_derived(df: pd.DataFrame, enricher: AssetEnricher = None, analyzer: EventStudy = None,
+                    path=None, resolver: EntityResolver = None) -> dict:
+    """
+    Computes enrichment and CAR for the trades in df that have no stored result from the current
+    code version, and saves them. Enrichment is also redone while a lookup has found nothing
+    (metadata_status pending), and CAR while a trade's event window is still open
+    (car_status pending/partial); final results are left alone. Everything else is already on disk;
+    the app joins it in SQL.
+    Returns how many trades each step had to compute, plus how many remote calls the asset
+    classes saved (bonds, private funds... that Yahoo has nothing on).
+    """
+    if df.empty:
+        return {'resolved': 0, 'enrichment': 0, 'car': 0, 'calls_avoided': 0}
+
+    # 0. Resolve trades the scrape gave no ticker (issuer name -> symbol) so they get priced too
+    if resolver is None:
+        resolver = EntityResolver.load(extra=EntityResolver.master_from_trades(df))
+    df = resolver.fill_unknown(df)
+    resolved = df[df['ticker_confidence'].notna()]
+    # Resolved for the first time: whatever was computed without a ticker doesn't count anymore
+    newly_resolved = missing_results(resolved, 'resolution', EntityResolver.RESULTS_VERSION, path)['trade_id']
+    if not resolved.empty:
+        save_results('resolution', resolved.rename(columns={'ticker': 'resolved_ticker'}),
+                     EntityResolver.RESULTS_VERSION, path)
+    # Classify after resolving: a resolved ticker can turn an Unknown into a Stock
+    df['asset_type'] = classify_assets(df)
+
+    # 1. Enrich (Yahoo Finance)
+    enricher = enricher or AssetEnricher()
+    avoided_before = enricher.calls_avoided
+    # Lookups that found nothing stay due; the metadata cache decides when Yahoo gets asked again
+    todo = df[_due(df, 'enrichment', AssetEnricher.RESULTS_VERSION, path, newly_resolved,
+                   settled_by=('metadata_status', METADATA_FINAL))]
+    if not todo.empty:
+        # Incremental: whatever metadata those rows already carry (e.g. a scraped sector) is kept
+        enriched = enricher.enrich_missing(todo)
+        save_results('enrichment', enriched, AssetEnricher.RESULTS_VERSION, path)
+
+    # 2. Analyze (Calculate CAR - Cumulative Abnormal Returns)
+    analyzer = analyzer or EventStudy()
+    # The store only knows the default horizons' columns until told otherwise
+    register_result_fields('car', {c: 'TEXT' if c == 'car_status' else 'REAL' for c in analyzer.result_columns})
+    scored_before = analyzer.calls_avoided
+    # Only what isn't final: new or stale, or an event window still open (pending/partial) that new
+    # bars may have moved. Final results stay frozen unless the trade got a new ticker
+    todo_car = df[_due(df, 'car', analyzer.results_version, path, newly_resolved, settled_by=('car_status', FINAL))]
+    if not todo_car.empty:
+        scored = analyzer.analyze_batch(todo_car.copy())
+        save_results('car', scored, analyzer.results_version, path)
+
+    skipped_meta = enricher.calls_avoided - avoided_before
+    skipped_prices = analyzer.calls_avoided - scored_before
+    logger.info(f"Derived results: resolved {len(newly_resolved)}, enriched {len(todo)}, "
+                f"scored {len(todo_car)} of {len(df)} trades.")
+    logger.info(f"Network calls avoided by asset class: {skipped_meta} metadata lookups, "
+                f"{skipped_prices} price downloads. Classes: {df['asset_type'].value_counts().to_dict()}")
+    return {'resolved': len(newly_resolved), 'enrichment': len(todo), 'car': len(todo_car),
+            'calls_avoided': skipped_meta + skipped_prices}
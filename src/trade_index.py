@@ -0,0 +1,97 @@
+import os
+from pathlib import Path
+import numpy as np
+
+
+class TradeIdIndex:
+    """
+    Persistent set of trade ids (uint64) that lives next to the segment store.
+
+        <store>/_trade_ids.bin        sorted, unique body
+        <store>/_trade_ids.tail.bin   unsorted ids appended by merges since the last compaction
+
+    Membership is a binary search on the memory-mapped body plus a scan of the (small) tail,
+    and adding ids is an append, so a merge costs O(new rows), not O(history).
+    """
+
+    def __init__(self, store_dir: Path):
+        store_dir = Path(store_dir)
+        self.body_path = store_dir / "_trade_ids.bin"
+        self.tail_path = store_dir / "_trade_ids.tail.bin"
+        self._body_map = None
+        self._body_stamp = None
+
+    def exists(self) -> bool:
+        return self.body_path.exists()
+
+    def _read(self, path: Path) -> np.ndarray:
+        if not path.exists():
+            return np.array([], dtype=np.uint64)
+        return np.fromfile(path, dtype="<u8").astype(np.uint64, copy=False)
+
+    def _body(self) -> np.ndarray:
+        """
+        The sorted body as a read-only memory map, so a lookup only touches the pages its
+        binary search lands on. The map is reopened when a rebuild or compaction has replaced the file.
+        """
+        try:
+            stat = self.body_path.stat()
+        except FileNotFoundError:
+            return np.array([], dtype=np.uint64)
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stamp != self._body_stamp:
+            self._body_map = (np.memmap(self.body_path, dtype="<u8", mode="r")
+                              if stat.st_size else np.array([], dtype=np.uint64))
+            self._body_stamp = stamp
+        return self._body_map
+
+    def __len__(self):
+        sizes = (p.stat().st_size for p in (self.body_path, self.tail_path) if p.exists())
+        return sum(sizes) // 8
+
+    def contains(self, ids: np.ndarray) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.uint64)
+        body = self._body()
+        found = np.zeros(len(ids), dtype=bool)
+        if len(body):
+            pos = np.searchsorted(body, ids).clip(max=len(body) - 1)
+            found = np.asarray(body[pos]) == ids
+        tail = self._read(self.tail_path)
+        if len(tail):
+            found |= np.isin(ids, tail)
+        return found
+
+    def add(self, ids: np.ndarray):
+        ids = np.asarray(ids, dtype="<u8")
+        if not len(ids):
+            return
+        if not self.exists():
+            self.rebuild(ids)
+            return
+        with open(self.tail_path, "ab") as f:
+            ids.tofile(f)
+
+    def rebuild(self, ids: np.ndarray):
+        """
+        Replaces the whole index with `ids` (sorted and deduped into the body).
+        """
+        self.body_path.parent.mkdir(parents=True, exist_ok=True)
+        body = np.unique(np.asarray(ids, dtype=np.uint64)).astype("<u8")
+        tmp = self.body_path.with_name(self.body_path.name + ".tmp")
+        body.tofile(tmp)
+        self._body_map = self._body_stamp = None
+        os.replace(tmp, self.body_path)
+        self.tail_path.unlink(missing_ok=True)
+
+    def compact(self):
+        """
+        Folds the tail into the sorted body.
+        """
+        tail = self._read(self.tail_path)
+        if len(tail):
+            self.rebuild(np.concatenate([self._read(self.body_path), tail]))
+
+    def clear(self):
+        self._body_map = self._body_stamp = None
+        self.body_path.unlink(missing_ok=True)
+        self.tail_path.unlink(missing_ok=True)
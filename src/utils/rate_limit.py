@@ -0,0 +1,43 @@
+import asyncio
+import threading
+import time
+
+
+class AsyncRateLimiter:
+    """
+    Global request budget shared by every worker on one event loop.
+    Each wait() claims the next free slot, so N workers together never go over `rate` requests/sec.
+    """
+
+    def __init__(self, rate: float):
+        # rate <= 0 means no limit
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_slot = 0.0
+
+    async def wait(self):
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class RateLimiter:
+    """
+    Thread-safe twin of AsyncRateLimiter: every thread sharing one instance draws from the same
+    budget. The slot is claimed under the lock, the sleeping happens outside it.
+    """
+
+    def __init__(self, rate: float):
+        # rate <= 0 means no limit
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+from src.enrichment.asset_classifier import classify_assets, is_priceable, price_symbol
+
+
+@pytest.mark.parametrize("description, ticker, asset_class", [
+    ("Huntington Bancshares Inc", "HBAN", "Stock"),
+    ("Berkshire Hathaway Inc", "BRK/B", "Stock"),
+    ("Kite Realty Group Trust", "KRG", "Stock"),
+    ("SPDR S&P 500 ETF Trust", "SPY", "ETF"),
+    ("iShares 20 Year Treasury Bond ETF", "TLT", "ETF"),
+    ("PROSHARES SHORT MIDCAP400", "N/A", "ETF"),
+    ("VANGUARD LONG TERM TAX EXEMPT FUND", "VWLUX", "Mutual Fund"),
+    ("Vanguard fund, no fund words", "VWUSX", "Mutual Fund"),
+    ("BITCOIN", "$BTC", "Crypto"),
+    ("US TREASURY BILLS", "N/A", "Treasury"),
+    ("CITY OF CHICAGO", "N/A", "Bond"),
+    ("LONG BEACH UNIFIED SCHOOL DISTRICT", "UNKNOWN", "Bond"),
+    ("NextEra Energy Capital Holdings Inc", "7410Z", "Bond"),
+    ("APOLLO DEBT SOLUTIONS BDC", "N/A", "Private Fund"),
+    ("HPS SPECIAL SITUATIONS OPPORTUNITY FUND II LP", "N/A", "Private Fund"),
+    ("PDD HOLDINGS INC", "N/A", "Unknown"),
+    ("Berry Corp", "BRY.1", "Unknown"),
+])
+def test_classify(description, ticker, asset_class):
+    df = pd.DataFrame({"asset_description": [description], "ticker": [ticker]})
+    assert classify_assets(df).tolist() == [asset_class]
+
+
+def test_classify_keeps_index_and_handles_missing_values():
+    df = pd.DataFrame({"asset_description": ["Apple Inc", None, "Apple Inc"],
+                       "ticker": pd.Categorical(["AAPL", None, "AAPL"])}, index=[7, 8, 9])
+
+    out = classify_assets(df)
+
+    assert out.index.tolist() == [7, 8, 9]
+    assert out.tolist() == ["Stock", "Unknown", "Stock"]
+
+
+def test_priceable_needs_class_and_symbol():
+    df = pd.DataFrame({"ticker": ["AAPL", "N/A", "$BTC", "UNKNOWN", "VTI"],
+                       "asset_type": ["Stock", "Treasury", "Crypto", "Stock", "ETF"]})
+
+    assert is_priceable(df).tolist() == [True, False, True, False, True]
+
+
+def test_price_symbol_reroutes_crypto():
+    assert price_symbol("$ETH", "Crypto") == "ETH-USD"
+    assert price_symbol("AAPL", "Stock") == "AAPL"
+    assert price_symbol("N/A", "Bond") is None
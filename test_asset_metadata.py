@@ -0,0 +1,149 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from src.enrichment.asset_metadata import AssetEnricher, normalize_ticker
+from src.enrichment.metadata_cache import MetadataCache
+
+
+class StubProvider:
+    """
+    Offline stand-in for Yahoo: answers from a dict, counts calls, can be slow or flaky.
+    """
+
+    def __init__(self, table, delay=0.0, failures=None):
+        self.table = table
+        self.delay = delay
+        self.failures = dict(failures or {})  # symbol -> how many times to raise first
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def fetch(self, symbol):
+        with self._lock:
+            self.calls.append(symbol)
+            failing = self.failures.get(symbol, 0) > 0
+            if failing:
+                self.failures[symbol] -= 1
+        time.sleep(self.delay)
+        if failing:
+            raise ConnectionError(f"flaky {symbol}")
+        sector = self.table.get(symbol)
+        return None if sector is None else {"name": symbol, "sector": sector, "industry": "x", "market_cap": 1}
+
+
+def _enricher(tmp_path, provider, **kwargs):
+    kwargs.setdefault("requests_per_second", 0)
+    kwargs.setdefault("backoff", 0)
+    return AssetEnricher(cache=MetadataCache(tmp_path / "meta.sqlite"), provider=provider, **kwargs)
+
+
+def test_work_scales_with_distinct_tickers(tmp_path):
+    provider = StubProvider({"AAPL": "Technology", "BRK-B": "Financial Services"})
+    df = pd.DataFrame({
+        "ticker": pd.Categorical(["AAPL", "brk/b", "BRK.B", None, "$BTC", "AAPL", "ZZZZ"] * 100),
+        "amount_est": range(700),
+    }, index=range(1000, 1700))
+
+    out = _enricher(tmp_path, provider).enrich_dataframe(df)
+
+    assert sorted(provider.calls) == ["AAPL", "BRK-B", "ZZZZ"]
+    assert out.index.tolist() == list(range(700))
+    assert out["amount_est"].tolist() == list(range(700))
+    assert out["sector"].tolist()[:7] == ["Technology", "Financial Services", "Financial Services",
+                                          "Unknown", "Unknown", "Technology", "Unknown"]
+    assert out["market_cap"].tolist()[:4] == [1, 1, 1, 0]
+
+
+def test_lookups_run_concurrently(tmp_path):
+    symbols = [f"T{i}" for i in range(16)]
+    provider = StubProvider({s: "Technology" for s in symbols}, delay=0.1)
+
+    start = time.perf_counter()
+    _enricher(tmp_path, provider, max_workers=8).lookup(symbols)
+
+    # 16 x 0.1 s serially; two rounds of 8 in the pool
+    assert time.perf_counter() - start < 0.8
+    assert sorted(provider.calls) == sorted(symbols)
+
+
+def test_rate_limit_is_shared_by_the_pool(tmp_path):
+    symbols = [f"T{i}" for i in range(10)]
+    provider = StubProvider({s: "Technology" for s in symbols})
+
+    start = time.perf_counter()
+    _enricher(tmp_path, provider, max_workers=8, requests_per_second=20).lookup(symbols)
+
+    assert time.perf_counter() - start >= 0.4
+
+
+def test_retries_then_caches_failure(tmp_path):
+    provider = StubProvider({"AAPL": "Technology", "MSFT": "Technology"}, failures={"AAPL": 2, "MSFT": 5})
+
+    found = _enricher(tmp_path, provider, retries=2).lookup(["AAPL", "MSFT"])
+
+    assert found["AAPL"]["sector"] == "Technology"
+    assert found["MSFT"] is None
+    assert provider.calls.count("AAPL") == provider.calls.count("MSFT") == 3
+    # The give-up is cached as a negative result: a new run doesn't hammer it again
+    again = StubProvider({})
+    assert _enricher(tmp_path, again).lookup(["MSFT"]) == {"MSFT": None}
+    assert again.calls == []
+
+
+@pytest.mark.parametrize("raw, symbol", [
+    (" brk/b ", "BRK-B"), ("BF.A", "BF-A"), ("$BTC", None), ("912797", None), ("---", None), ("N/A", None), (None, None),
+])
+def test_normalize_ticker(raw, symbol):
+    assert normalize_ticker(raw) == symbol
+
+
+def test_enrich_missing_only_touches_rows_without_metadata(tmp_path):
+    provider = StubProvider({"AAPL": "Technology", "MSFT": "Technology", "XOM": "Energy"})
+    df = pd.DataFrame({
+        "ticker": ["AAPL", "MSFT", "XOM", "AAPL"],
+        "sector": ["Hand Curated", None, "Energy", None],
+        "industry": ["kept", None, "Oil", None],
+    }, index=[10, 11, 12, 13])
+
+    out = _enricher(tmp_path, provider).enrich_missing(df)
+
+    assert sorted(provider.calls) == ["AAPL", "MSFT"]
+    assert out.index.tolist() == [10, 11, 12, 13]
+    assert out["sector"].tolist() == ["Hand Curated", "Technology", "Energy", "Technology"]
+    assert out["industry"].tolist() == ["kept", "x", "Oil", "x"]
+    assert df["sector"].isna().sum() == 2  # caller's frame untouched
+
+
+def test_enrich_missing_refreshes_stale_past_the_cache(tmp_path):
+    provider = StubProvider({"AAPL": "Technology", "XOM": "Energy"})
+    enricher = _enricher(tmp_path, provider)
+    df = enricher.enrich_missing(pd.DataFrame({"ticker": ["AAPL", "XOM"]}))
+    provider.table["XOM"] = "Utilities"
+    provider.calls.clear()
+
+    # Nothing missing: no work at all
+    assert enricher.enrich_missing(df)["sector"].tolist() == ["Technology", "Energy"]
+    assert provider.calls == []
+
+    out = enricher.enrich_missing(df, tickers=["XOM"])
+
+    assert provider.calls == ["XOM"]
+    assert out["sector"].tolist() == ["Technology", "Utilities"]
+
+
+def test_enrich_missing_skips_assets_without_metadata(tmp_path):
+    provider = StubProvider({"AAPL": "Technology"})
+    df = pd.DataFrame({
+        "ticker": ["AAPL", "N/A", "$BTC", "BRY.1"],
+        "asset_type": ["Stock", "Treasury", "Crypto", "Unknown"],
+    })
+    enricher = _enricher(tmp_path, provider)
+
+    out = enricher.enrich_missing(df)
+
+    assert provider.calls == ["AAPL"]
+    assert enricher.calls_avoided == 1  # BRY-1; N/A and $BTC never had a symbol to look up
+    assert out["sector"].tolist() == ["Technology", "Treasury", "Crypto", "Unknown"]
+    assert out["industry"].tolist() == ["x", "Unknown", "Cryptocurrency", "Unknown"]
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.data_store as data_store
+from src.analysis.backtest import CopyTrader, simulate
+from src.analysis.price_store import FixturePriceProvider, PriceStore
+from test_data_store import _raw_trades, store  # noqa: F401 (fixture)
+from test_price_store import TODAY, synthetic_prices
+
+
+def naive_backtest(closes, trades):
+    """
+    Straight from the definition, one politician and one day at a time: value what was held coming
+    into the day, then trade at the close (sells first). trades: politician, symbol, date, side, amount.
+    Returns {politician: (equity, book)}.
+    """
+    px = closes.ffill()
+    values, column = px.to_numpy(), {s: j for j, s in enumerate(px.columns)}
+    trades = trades.assign(day=px.index.searchsorted(pd.to_datetime(trades["date"]).dt.normalize()))
+    out = {}
+    for name, mine in trades.groupby("politician"):
+        shares, level, book, equity, books = {}, 1.0, 0.0, [], []
+        by_day = {i: today.sort_values("side", kind="stable") for i, today in mine.groupby("day")}
+        for i in range(len(px)):
+            carried = sum(q * values[i, column[s]] for s, q in shares.items())
+            if book > 0:
+                level *= carried / book
+            for t in by_day.get(i, mine.iloc[:0]).itertuples():
+                price = values[i, column[t.symbol]]
+                if pd.isna(price):
+                    continue
+                if t.side < 0:
+                    shares.pop(t.symbol, None)
+                else:
+                    shares[t.symbol] = shares.get(t.symbol, 0.0) + t.amount / price
+            book = sum(q * values[i, column[s]] for s, q in shares.items())
+            equity.append(level)
+            books.append(book)
+        out[name] = (pd.Series(equity, index=px.index), pd.Series(books, index=px.index))
+    return out
+
+
+def _random_trades(closes, n=400, seed=3):
+    rng = np.random.default_rng(seed)
+    symbols = [c for c in closes.columns if c != "^GSPC"]
+    return pd.DataFrame({
+        "politician": rng.choice([f"Member {i}" for i in range(8)], n),
+        "symbol": rng.choice(symbols, n),
+        "date": closes.index[0] + pd.to_timedelta(rng.integers(0, 500, n), unit="D"),
+        "side": rng.choice([1, 1, -1], n),
+        "amount": rng.choice([8000.0, 32500.0, 75000.0], n),
+    })
+
+
+def test_matches_a_day_by_day_replay():
+    closes = synthetic_prices(["AAPL", "MSFT", "XOM", "NVDA"], start="2024-01-01", end="2025-06-30", seed=4)
+    # A symbol that only lists halfway through: buys before then can't execute
+    closes.loc[:"2024-09-01", "NVDA"] = np.nan
+    trades = _random_trades(closes)
+
+    result = simulate(closes, trades["politician"], trades["symbol"], trades["date"], trades["side"], trades["amount"])
+
+    expected = naive_backtest(closes, trades)
+    assert list(result.equity.columns) == sorted(expected)
+    for name, (equity, book) in expected.items():
+        np.testing.assert_allclose(result.equity[name], equity, rtol=1e-9)
+        np.testing.assert_allclose(result.exposure[name], book, rtol=1e-9, atol=1e-6)
+    assert (result.drawdown <= 0).all().all()
+    np.testing.assert_allclose(result.summary["total_return"], result.equity.iloc[-1] - 1)
+    np.testing.assert_allclose(result.summary["max_drawdown"], result.drawdown.min())
+
+
+def test_new_money_and_sales_are_not_returns():
+    days = pd.bdate_range("2025-01-06", periods=6)
+    closes = pd.DataFrame({"AAPL": [10.0, 12.0, 12.0, 9.0, 11.0, 11.0], "MSFT": 20.0}, index=days)
+    trades = pd.DataFrame([
+        ("A", "AAPL", days[0], 1, 100.0),    # 10 shares at 10
+        ("A", "AAPL", days[1], 1, 120.0),    # 10 more at 12: new money, no return
+        ("A", "MSFT", days[2], -1, 0.0),     # sells what was never bought: nothing happens
+        ("A", "AAPL", days[4], -1, 0.0),     # all 20 out at 11
+        ("B", "MSFT", days[5] + pd.Timedelta(days=3), 1, 50.0),  # after the last close
+    ], columns=["politician", "symbol", "date", "side", "amount"])
+
+    result = simulate(closes, trades["politician"], trades["symbol"], trades["date"], trades["side"], trades["amount"])
+
+    assert list(result.equity.columns) == ["A"]
+    np.testing.assert_allclose(result.equity["A"], [1.0, 1.2, 1.2, 0.9, 1.1, 1.1])
+    np.testing.assert_allclose(result.exposure["A"], [100.0, 240.0, 240.0, 180.0, 0.0, 0.0])
+    np.testing.assert_allclose(result.drawdown["A"], [0.0, 0.0, 0.0, -0.25, -1 / 12, -1 / 12])
+    # Traded dollars over the book before and after the trades, averaged: 100 / 50, 120 / 180, 220 / 110
+    np.testing.assert_allclose(result.turnover["A"], [2.0, 120 / 180, 0.0, 0.0, 2.0, 0.0])
+    summary = result.summary.loc["A"]
+    assert summary["trades"] == 3 and summary["invested"] == 220.0
+    assert summary["pnl"] == pytest.approx(220.0 - 220.0)
+    assert summary["max_drawdown"] == pytest.approx(-0.25)
+
+
+def test_nothing_to_trade():
+    closes = synthetic_prices(["AAPL"], start="2025-01-01", end="2025-02-01")
+
+    result = simulate(closes, ["A"], ["GONE"], [pd.Timestamp("2025-01-10")], [1], [1000.0])
+
+    assert result.equity.shape == (len(closes), 0) and result.summary.empty
+
+
+def test_copy_trader_runs_off_the_trade_store(store, tmp_path):
+    df = _raw_trades([("A", "Apple Inc", "AAPL"), ("A", "Microsoft Corp", "MSFT"), ("B", "Microsoft Corp", "MSFT"),
+                      ("B", "US TREASURY BILLS", "N/A")])
+    data_store.merge_new_trades(df)
+    frame = synthetic_prices(["AAPL", "MSFT"], start="2025-06-01", end=TODAY.normalize())
+    prices = PriceStore(tmp_path / "prices", provider=FixturePriceProvider(frame), clock=lambda: TODAY)
+
+    result = CopyTrader(prices=prices).run(end=TODAY)
+
+    # Disclosed Mon 24 Nov 2025, copied at that close; the treasury bill has no price
+    assert list(result.equity.columns) == ["A", "B"]
+    assert result.equity.index[0] == pd.Timestamp("2025-11-24") and result.equity.index[-1] == pd.Timestamp("2025-12-01")
+    assert result.summary["trades"].tolist() == [2, 1]
+    np.testing.assert_allclose(result.exposure.iloc[0], [2 * 8000.0, 8000.0])
+    closes = frame.loc["2025-11-24":]
+    np.testing.assert_allclose(result.equity["B"], closes["MSFT"] / closes["MSFT"].iloc[0])
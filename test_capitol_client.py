@@ -0,0 +1,303 @@
+import json
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from src.ingestion.capitol_client import CapitolTradesClient
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "trades_page.html"
+TRADES_JSON = Path(__file__).resolve().parent / "capitol_trades_90d.json"
+
+
+@pytest.fixture(scope="module")
+def browser_page():
+    sync_api = pytest.importorskip("playwright.sync_api")
+    with sync_api.sync_playwright() as p:
+        try:
+            browser = p.chromium.launch(headless=True)
+        except Exception as e:
+            pytest.skip(f"Chromium not available: {e}")
+        page = browser.new_page()
+        page.goto(FIXTURE.as_uri())
+        yield page
+        browser.close()
+
+
+def test_bulk_extraction_matches_per_cell(browser_page):
+    legacy = CapitolTradesClient(bulk_extract=False)
+    bulk = CapitolTradesClient(bulk_extract=True)
+
+    legacy_rows = legacy._rows_to_raw(legacy._read_table(browser_page))
+    bulk_rows = bulk._rows_to_raw(bulk._read_table(browser_page))
+
+    assert len(bulk_rows) == 96
+    assert bulk_rows == legacy_rows
+    assert bulk_rows[0]["politician_raw"] == "Tina Smith\nDemocratSenateMN"
+    assert bulk_rows[0]["issuer_raw"] == "Huntington Bancshares Inc\nHBAN:US"
+
+
+def test_rows_to_raw_skips_short_rows():
+    client = CapitolTradesClient()
+    table = [
+        ["Tina Smith\nDemocratSenateMN", "Huntington Bancshares Inc\nHBAN:US", "23:45\nYesterday",
+         "20 Nov\n2025", "days 5", "Spouse", "SELL", "100K–250K", "$15.88", ""],
+        ["No trades found"],
+    ]
+    raw = client._rows_to_raw(table)
+
+    assert raw == [{
+        "politician_raw": "Tina Smith\nDemocratSenateMN",
+        "issuer_raw": "Huntington Bancshares Inc\nHBAN:US",
+        "pub_date_raw": "23:45\nYesterday",
+        "trade_date_raw": "20 Nov\n2025",
+        "type_raw": "SELL",
+        "size_raw": "100K–250K",
+    }]
+
+
+def _fixture_pages(rows_per_page=32):
+    """Splits the saved 96-row page into smaller pages, followed by an empty one."""
+    html = FIXTURE.read_text(encoding="utf-8")
+    head, rest = html.split("<tbody>", 1)
+    body, tail = rest.split("</tbody>", 1)
+    rows = ["<tr" + chunk for chunk in body.split("<tr")[1:]]
+
+    pages = []
+    for i in range(0, len(rows), rows_per_page):
+        pages.append(head + "<tbody>" + "".join(rows[i:i + rows_per_page]) + "</tbody>" + tail)
+    pages.append(head + "<tbody><tr><td>No trades found</td></tr></tbody>" + tail)
+    return pages
+
+
+@pytest.fixture
+def paginated_server():
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+
+    pages = _fixture_pages()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            page_num = int(parse_qs(urlparse(self.path).query).get("page", ["1"])[0])
+            body = pages[min(page_num, len(pages)) - 1].encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/trades"
+    server.shutdown()
+
+
+def _chromium_or_skip():
+    sync_api = pytest.importorskip("playwright.sync_api")
+    with sync_api.sync_playwright() as p:
+        try:
+            p.chromium.launch(headless=True).close()
+        except Exception as e:
+            pytest.skip(f"Chromium not available: {e}")
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_paginated_scrape_merges_in_page_order(paginated_server, concurrency):
+    _chromium_or_skip()
+    client = CapitolTradesClient(backend="browser", concurrency=concurrency, requests_per_second=0,
+                                 page_delay=(0, 0), base_url=paginated_server)
+
+    raw = client._run_scraper("2025-01-01,2025-12-31")
+
+    assert len(raw) == 96
+    assert raw == _single_page_rows()
+
+
+def _single_page_rows():
+    sync_api = pytest.importorskip("playwright.sync_api")
+    client = CapitolTradesClient()
+    with sync_api.sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        page.goto(FIXTURE.as_uri())
+        rows = client._rows_to_raw(client._read_table(page))
+        browser.close()
+    return rows
+
+
+def _run_pool(client, pages, known_keys=None, delays=None):
+    """Drives the page pool with a fake fetch: pages[n - 1] are page n's rows, later pages are empty."""
+    import asyncio
+
+    fetched = []
+
+    async def fetch_page(page_num):
+        fetched.append((page_num, asyncio.get_running_loop().time()))
+        # Uneven latencies, so workers finish out of page order
+        await asyncio.sleep((delays or {}).get(page_num, 0))
+        return pages[page_num - 1] if page_num <= len(pages) else []
+
+    return asyncio.run(client._run_scraper_concurrent(fetch_page, known_keys)), fetched
+
+
+def _rows(page_num, n=3):
+    return [{"politician_raw": f"P{page_num}", "issuer_raw": f"I{i}", "trade_date_raw": "1 Dec\n2025",
+             "type_raw": "BUY", "size_raw": "1K–15K"} for i in range(n)]
+
+
+def test_page_pool_merges_in_page_order_and_stops_at_the_first_empty_page():
+    client = CapitolTradesClient(concurrency=4, requests_per_second=0)
+    pages = [_rows(n) for n in range(1, 7)]
+
+    raw, fetched = _run_pool(client, pages, delays={1: 0.05, 2: 0.03, 3: 0.01})
+
+    assert raw == [row for page in pages for row in page]
+    # At most one page per worker gets claimed past the end
+    assert max(n for n, _ in fetched) <= 7 + 3
+
+
+def test_page_pool_stops_at_the_first_fully_known_page():
+    from src.ingestion.trade_keys import raw_trade_key
+
+    client = CapitolTradesClient(concurrency=3, requests_per_second=0)
+    pages = [_rows(n) for n in range(1, 9)]
+    known = Counter(raw_trade_key(row) for page in pages[3:] for row in page)
+
+    # Page 6 comes back before the known page 4 does: fetched, but tossed
+    raw, _ = _run_pool(client, pages, known_keys=known, delays={4: 0.05})
+
+    assert raw == [row for page in pages[:3] for row in page]
+    assert _run_pool(client, [[]])[0] is None
+    assert _run_pool(client, [_rows(1)], known_keys=Counter(raw_trade_key(r) for r in _rows(1)))[0] == []
+
+
+def test_repeated_identical_trade_is_not_known():
+    from src.ingestion.trade_keys import raw_trade_key
+
+    client = CapitolTradesClient()
+    row = _rows(1, n=1)[0]
+    # The store holds one of these; the page now lists a second, identical one
+    known = Counter({raw_trade_key(row): 1})
+
+    assert client._page_is_known([row], known)
+    assert not client._page_is_known([row, dict(row)], known)
+
+
+def test_page_pool_shares_one_rate_budget():
+    client = CapitolTradesClient(concurrency=4, requests_per_second=20, max_pages=6)
+
+    raw, fetched = _run_pool(client, [_rows(n) for n in range(1, 7)])
+
+    stamps = sorted(t for _, t in fetched)
+    assert len(raw) == 18 and len(stamps) == 6
+    assert all(b - a >= 0.045 for a, b in zip(stamps, stamps[1:]))
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_http_backend_reads_paginated_pages(paginated_server, concurrency):
+    client = CapitolTradesClient(backend="http", concurrency=concurrency, requests_per_second=0,
+                                 page_delay=(0, 0), base_url=paginated_server)
+
+    raw = client._run_scraper("2025-01-01,2025-12-31")
+
+    expected = json.loads(TRADES_JSON.read_text(encoding="utf-8"))[:96]
+    assert len(raw) == 96
+    assert [r["politician_raw"] for r in raw] == [f"{t['politician']}\n{t['party_state']}" for t in expected]
+    assert [r["issuer_raw"] for r in raw] == [f"{t['issuer']}\n{t['ticker']}" for t in expected]
+    assert [r["trade_date_raw"] for r in raw] == [t["trade_date"] for t in expected]
+    assert [r["size_raw"] for r in raw] == [t["size"] for t in expected]
+
+
+def test_http_backend_output_normalizes(paginated_server):
+    client = CapitolTradesClient(backend="http", page_delay=(0, 0), base_url=paginated_server)
+
+    df = client._normalize_data(client._run_scraper("2025-01-01,2025-12-31"))
+
+    assert len(df) == 96
+    assert df.loc[0, "senator"] == "Tina Smith"
+    assert df.loc[0, "ticker"] == "HBAN"
+    assert df.loc[0, "amount_est"] == 175000.0
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_http_backend_stops_at_first_fully_known_page(paginated_server, concurrency):
+    from src.ingestion.trade_keys import raw_trade_key
+
+    client = CapitolTradesClient(backend="http", concurrency=concurrency, requests_per_second=0,
+                                 page_delay=(0, 0), base_url=paginated_server)
+    everything = client._run_scraper("2025-01-01,2025-12-31")
+    # Pretend the local store already holds pages 2 and 3
+    known = Counter(raw_trade_key(row) for row in everything[32:])
+
+    raw = client._run_scraper("2025-01-01,2025-12-31", known_keys=known)
+
+    assert raw == everything[:32]
+
+
+def test_fully_known_first_page_does_not_trigger_browser_fallback(paginated_server, monkeypatch):
+    from src.ingestion.trade_keys import raw_trade_key
+
+    client = CapitolTradesClient(backend="auto", page_delay=(0, 0), base_url=paginated_server)
+    known = Counter(raw_trade_key(row) for row in client._run_scraper("2025-01-01,2025-12-31"))
+    monkeypatch.setattr(client, "_run_browser_scraper", lambda *a, **k: pytest.fail("browser launched"))
+
+    assert client._run_scraper("2025-01-01,2025-12-31", known_keys=known) == []
+
+
+def test_known_trade_keys_match_scraped_rows():
+    import pandas as pd
+    from src.ingestion.trade_keys import known_trade_keys, raw_trade_key
+
+    row = {"politician_raw": "Tina Smith\nDemocratSenateMN", "issuer_raw": "Huntington Bancshares Inc\nHBAN:US",
+           "pub_date_raw": "23:45\nYesterday", "trade_date_raw": "20 Nov\n2025", "type_raw": "SELL",
+           "size_raw": "100K–250K"}
+    stored = pd.DataFrame([{**row, "pub_date_raw": "24 Nov\n2025", "senator": "Tina Smith"}])
+
+    assert known_trade_keys(stored)[raw_trade_key(row)] == 1
+    assert known_trade_keys(pd.concat([stored, stored]))[raw_trade_key(row)] == 2
+    assert raw_trade_key({**row, "size_raw": "1K–15K"}) not in known_trade_keys(stored)
+    assert not known_trade_keys(pd.DataFrame())
+
+
+def test_vectorized_keys_and_ids_match_the_row_at_a_time_ones():
+    import numpy as np
+    import pandas as pd
+    from src.ingestion.trade_keys import format_trade_ids, parse_trade_ids, raw_trade_key, raw_trade_keys
+
+    rows = [r | {"politician_raw": p} for r in _rows(1, n=2) for p in ("Tina Smith", " Tina Smith ", None)]
+    df = pd.DataFrame(rows).drop(columns=["size_raw"])
+
+    keys = raw_trade_keys(df)
+
+    assert keys.tolist() == [raw_trade_key(r) for r in df.to_dict("records")]
+    assert keys[0] == keys[1] != keys[2]
+    ids = np.array([0, 1, 2 ** 64 - 1, 0x0123456789ABCDEF], dtype=np.uint64)
+    assert format_trade_ids(ids).tolist() == [f"{v:016x}" for v in ids.tolist()]
+    assert parse_trade_ids(format_trade_ids(ids)).tolist() == ids.tolist()
+
+
+def test_rate_limiter_spaces_out_requests():
+    import asyncio
+    from src.utils.rate_limit import AsyncRateLimiter
+
+    async def run():
+        limiter = AsyncRateLimiter(rate=20)
+        loop = asyncio.get_running_loop()
+        stamps = []
+
+        async def hit():
+            await limiter.wait()
+            stamps.append(loop.time())
+
+        await asyncio.gather(*(hit() for _ in range(5)))
+        return stamps
+
+    stamps = sorted(asyncio.run(run()))
+    gaps = [b - a for a, b in zip(stamps, stamps[1:])]
+    assert all(gap >= 0.045 for gap in gaps)
@@ -0,0 +1,281 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import src.data_store as data_store
+
+LEGACY_CSV = Path(__file__).resolve().parent / "data" / "processed" / "senate_trades_history.csv"
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_store, "DATA_PATH", tmp_path / "history")
+    monkeypatch.setattr(data_store, "LEGACY_PARQUET_PATH", tmp_path / "history.parquet")
+    monkeypatch.setattr(data_store, "LEGACY_CSV_PATH", tmp_path / "history.csv")
+    return tmp_path
+
+
+def test_load_migrates_legacy_csv_once(store):
+    legacy = pd.read_csv(LEGACY_CSV)
+    legacy.to_csv(store / "history.csv", index=False)
+
+    df = data_store.load_local_data()
+
+    assert len(data_store._segment_files(store / "history")) == 1
+    assert len(df) == len(legacy)
+    assert str(df["senator"].dtype) == "category"
+    assert str(df["ticker"].dtype) == "category"
+    assert str(df["type"].dtype) == "category"
+    assert df["transaction_date"].dtype == "datetime64[ns]"
+    assert df["amount_est"].dtype == "float64"
+    assert df["amount_est"].sum() == pytest.approx(legacy["amount_est"].sum())
+
+
+def test_projection_and_date_pushdown(store):
+    pd.read_csv(LEGACY_CSV).to_csv(store / "history.csv", index=False)
+    full = data_store.load_local_data()
+
+    df = data_store.load_local_data(columns=["senator", "transaction_date"],
+                                    start_date="2025-11-01", end_date="2025-11-15")
+
+    assert list(df.columns) == ["senator", "transaction_date"]
+    expected = full[(full["transaction_date"] >= "2025-11-01") & (full["transaction_date"] <= "2025-11-15")]
+    assert len(df) == len(expected) > 0
+
+
+def test_save_round_trip_keeps_extra_columns(store):
+    df = pd.DataFrame({
+        "senator": ["Tina Smith", "Gary Peters"],
+        "ticker": ["HBAN", None],
+        "transaction_date": pd.to_datetime(["2025-11-20", "2025-10-06"]),
+        "amount_est": [175000.0, 8000.0],
+        "sector": [None, None],
+        "car_30d": [0.012, None],
+    })
+
+    data_store.save_local_data(df)
+    back = data_store.load_local_data()
+
+    assert back["ticker"].tolist()[0] == "HBAN" and pd.isna(back["ticker"].tolist()[1])
+    assert back["sector"].isna().all()
+    assert back["car_30d"].tolist()[0] == pytest.approx(0.012)
+
+
+def _trades(senators, amount=8000.0, date="2025-11-20"):
+    return pd.DataFrame({
+        "senator": senators,
+        "ticker": ["HBAN"] * len(senators),
+        "transaction_date": pd.to_datetime([date] * len(senators)),
+        "amount_est": [amount] * len(senators),
+        "type": ["Buy"] * len(senators),
+        "sector": [None] * len(senators),
+    })
+
+
+def test_segments_merge_with_newest_winning(store):
+    first = _trades(["A", "B"])
+    second = _trades(["B", "C"])
+    second["sector"] = ["Financials", "Financials"]
+
+    data_store.append_segment(first)
+    data_store.append_segment(second)
+    df = data_store.load_local_data()
+
+    assert len(data_store._segment_files()) == 2
+    assert sorted(df["senator"].tolist()) == ["A", "B", "C"]
+    assert df.set_index("senator").loc["B", "sector"] == "Financials"
+
+
+def test_compaction_folds_segments_without_changing_the_view(store, monkeypatch):
+    monkeypatch.setattr(data_store, "MAX_SEGMENTS", 2)
+    for i in range(4):
+        data_store.append_segment(_trades([f"S{i}", "shared"], date=f"2025-11-{10 + i}"))
+    before = data_store.load_local_data().sort_values(["senator", "transaction_date"]).reset_index(drop=True)
+
+    worker = data_store.compact_in_background()
+    worker.join()
+    after = data_store.load_local_data().sort_values(["senator", "transaction_date"]).reset_index(drop=True)
+
+    assert len(data_store._segment_files()) == 1
+    pd.testing.assert_frame_equal(before, after)
+    # Appends after compaction still layer on top
+    data_store.append_segment(_trades(["late"]))
+    assert "late" in data_store.load_local_data()["senator"].tolist()
+
+
+def test_compaction_below_threshold_is_a_no_op(store):
+    data_store.append_segment(_trades(["A"]))
+    data_store.append_segment(_trades(["B"]))
+
+    assert data_store.compact_in_background() is None
+    assert data_store.compact() is False
+    assert data_store.compact(force=True) is True
+    assert len(data_store._segment_files()) == 1
+
+
+def _raw_trades(rows):
+    from src.ingestion.capitol_client import CapitolTradesClient
+    return CapitolTradesClient()._normalize_data([{
+        "politician_raw": f"{p}\nDemocratSenateMN", "issuer_raw": f"{issuer}\n{ticker}:US",
+        "pub_date_raw": "24 Nov\n2025", "trade_date_raw": "20 Nov\n2025", "type_raw": "BUY", "size_raw": "1K–15K",
+    } for p, issuer, ticker in rows])
+
+
+def test_identical_same_day_trades_stay_distinct(store):
+    axp = ("Tina Smith", "American Express Co", "AXP")
+    df = _raw_trades([axp, axp, ("Tina Smith", "Organon & Co", "OGN")])
+
+    fresh = data_store.merge_new_trades(df)
+
+    assert len(fresh) == 3
+    assert df["trade_id"].is_unique
+    assert (data_store.load_local_data()["ticker"] == "AXP").sum() == 2
+
+
+def test_merge_only_appends_unseen_trades(store):
+    first = _raw_trades([("A", "Apple Inc", "AAPL"), ("B", "Microsoft Corp", "MSFT")])
+    overlap = _raw_trades([("B", "Microsoft Corp", "MSFT"), ("C", "Alphabet Inc", "GOOGL")])
+
+    data_store.merge_new_trades(first)
+    fresh = data_store.merge_new_trades(overlap)
+
+    assert fresh["senator"].tolist() == ["C"]
+    assert len(data_store._segment_files()) == 2
+    assert len(data_store.load_local_data()) == 3
+    # A fresh index object reads the same ids back from disk
+    assert len(data_store.TradeIdIndex(store / "history")) == 3
+
+
+def test_index_lookups_follow_compaction_by_another_handle(store):
+    reader = data_store.TradeIdIndex(store / "history")
+    reader.rebuild([3, 1, 2])
+    assert reader.contains([1, 4]).tolist() == [True, False]
+
+    writer = data_store.TradeIdIndex(store / "history")
+    writer.add([4, 5])
+    assert reader.contains([4, 6]).tolist() == [True, False]
+    writer.compact()
+
+    assert not writer.tail_path.exists()
+    assert reader.contains([1, 4, 5, 6]).tolist() == [True, True, True, False]
+    assert len(reader) == 5
+
+
+def test_store_without_ids_gets_them_stamped_once(store):
+    legacy = pd.read_csv(LEGACY_CSV)
+    data_store._write_segment(legacy, store / "history")
+    assert "trade_id" not in data_store.load_local_data().columns
+
+    index = data_store._trade_index()
+
+    stamped = data_store.load_local_data()
+    assert stamped["trade_id"].notna().all() and stamped["trade_id"].is_unique
+    assert len(index) == len(stamped) == len(legacy)
+
+
+def test_csv_migration_stamps_ids(store):
+    pd.read_csv(LEGACY_CSV).to_csv(store / "history.csv", index=False)
+
+    df = data_store.load_local_data()
+
+    assert df["trade_id"].is_unique
+    assert len(data_store.TradeIdIndex(store / "history")) == len(df)
+
+
+def test_query_matches_pandas_filters(store):
+    pd.read_csv(LEGACY_CSV).to_csv(store / "history.csv", index=False)
+    full = data_store.load_local_data()
+    senators = full["senator"].value_counts().index[:2].tolist()
+    ticker = full.loc[full["senator"] == senators[0], "ticker"].dropna().iloc[0]
+
+    df = data_store.query_trades(senators=senators, start_date="2025-10-01")
+    one = data_store.query_trades(columns=["trade_id", "amount_est"], senators=senators, tickers=ticker)
+
+    expected = full[full["senator"].isin(senators) & (full["transaction_date"] >= "2025-10-01")]
+    assert sorted(df["trade_id"]) == sorted(expected["trade_id"])
+    assert df["transaction_date"].dtype == "datetime64[ns]"
+    assert list(one.columns) == ["trade_id", "amount_est"]
+    assert len(one) == (full["senator"].isin(senators) & (full["ticker"] == ticker)).sum()
+
+
+def test_aggregates_match_pandas(store):
+    pd.read_csv(LEGACY_CSV).to_csv(store / "history.csv", index=False)
+    full = data_store.load_local_data()
+
+    totals = data_store.aggregate_trades(["trades", "volume", "buy_volume", "last_trade"])
+    top = data_store.aggregate_trades(["trades"], group_by="ticker", order_by="trades", limit=5)
+
+    assert totals["trades"][0] == len(full)
+    assert totals["volume"][0] == pytest.approx(full["amount_est"].sum())
+    buys = full["type"].astype(str).str.contains("Buy", case=False)
+    assert totals["buy_volume"][0] == pytest.approx(full.loc[buys, "amount_est"].sum())
+    assert totals["last_trade"][0] == full["transaction_date"].max()
+    assert top["trades"].tolist() == full["ticker"].value_counts().head(5).tolist()
+    with pytest.raises(ValueError):
+        data_store.aggregate_trades(["trades; DROP TABLE trades"])
+
+
+def test_query_mirror_follows_appends_and_compaction(store):
+    data_store.merge_new_trades(_raw_trades([("A", "Apple Inc", "AAPL")]))
+    assert data_store.distinct_values("senator") == ["A"]
+
+    data_store.merge_new_trades(_raw_trades([("B", "Microsoft Corp", "MSFT")]))
+    assert data_store.distinct_values("senator") == ["A", "B"]
+
+    data_store.compact(force=True)
+    data_store.merge_new_trades(_raw_trades([("C", "Alphabet Inc", "GOOGL")]))
+    assert data_store.aggregate_trades(["trades"])["trades"][0] == 3
+
+    data_store.save_local_data(_raw_trades([("D", "Apple Inc", "AAPL")]))
+    assert data_store.distinct_values("senator") == ["D"]
+
+
+def test_derived_results_join_and_survive_rebuild(store):
+    df = _raw_trades([("A", "Apple Inc", "AAPL"), ("B", "Microsoft Corp", "MSFT")])
+    data_store.merge_new_trades(df)
+
+    data_store.save_results("enrichment", df.assign(sector=["Technology", None]), version="1")
+    data_store.save_results("car", df.assign(car_30d=[0.08, 0.01]), version="1")
+    beaters = data_store.query_trades(columns=["senator", "car_30d"], min_values={"car_30d": 0.05})
+    assert beaters.to_dict("records") == [{"senator": "A", "car_30d": 0.08}]
+    assert data_store.query_trades(sectors=["Technology"])["senator"].tolist() == ["A"]
+
+    # Results live outside the mirror: even deleting it outright loses nothing
+    for suffix in ("", "-wal", "-shm"):
+        (store / "history" / (data_store.QUERY_DB_NAME + suffix)).unlink(missing_ok=True)
+    assert data_store.query_trades(sectors=["Technology"])["senator"].tolist() == ["A"]
+    assert data_store.query_trades(columns=["car_30d"], tickers=["MSFT"])["car_30d"].tolist() == [0.01]
+
+
+def test_missing_results_follow_version(store):
+    df = _raw_trades([("A", "Apple Inc", "AAPL"), ("B", "Microsoft Corp", "MSFT")])
+    data_store.merge_new_trades(df)
+    assert len(data_store.missing_results(df, "car", "1")) == 2
+
+    data_store.save_results("car", df.iloc[:1].assign(car_30d=0.02), version="1")
+
+    assert data_store.missing_results(df, "car", "1")["senator"].tolist() == ["B"]
+    # Bumping the computation's version makes everything stale again
+    assert len(data_store.missing_results(df, "car", "2")) == 2
+    joined = data_store.with_results(df)
+    assert joined["car_30d"].tolist()[0] == 0.02 and pd.isna(joined["car_30d"].tolist()[1])
+    with pytest.raises(ValueError):
+        data_store.save_results("nope", df, version="1")
+
+
+def test_every_event_study_horizon_is_stored(store):
+    from src.analysis.metrics import EventStudy
+
+    df = _raw_trades([("A", "Apple Inc", "AAPL")])
+    data_store.merge_new_trades(df)
+    *columns, status = EventStudy(prices=object()).result_columns
+    results = df.assign(**{c: 0.01 * i for i, c in enumerate(columns)}, **{status: "partial"})
+    data_store.save_results("car", results, version="1")
+
+    back = data_store.query_trades(columns=columns + [status])
+    assert back[columns].iloc[0].tolist() == pytest.approx([0.01 * i for i in range(len(columns))])
+    assert back[status].tolist() == ["partial"]
+    # Only final results count as done
+    assert len(data_store.missing_results(df, "car", "1", settled_by=("car_status", "final"))) == 1
+    assert data_store.missing_results(df, "car", "1").empty
@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import src.enrichment.entity_resolver as entity_resolver
+from src.enrichment.entity_resolver import EntityResolver, normalize_name
+
+MASTER = Path(__file__).resolve().parent / "fixtures" / "security_master.csv"
+
+
+@pytest.fixture(scope="module")
+def resolver():
+    return EntityResolver(pd.read_csv(MASTER))
+
+
+def test_normalize_name_drops_legal_noise():
+    assert normalize_name("The Goldman Sachs Group, Inc.") == "GOLDMAN SACHS GROUP"
+    assert normalize_name("Johnson & Johnson") == "JOHNSON AND JOHNSON"
+    assert normalize_name("PDD Holdings Inc - ADR") == normalize_name("PDD HOLDINGS INC")
+    assert normalize_name(None) == ""
+
+
+def test_exact_and_fuzzy_matches(resolver):
+    assert resolver.resolve("WSFS FINANCIAL CORP") == ("WSFS", "WSFS Financial Corp", 1.0)
+    fuzzy = resolver.resolve("CREDO TECH GROUP HOLDING LTD")
+    assert fuzzy.ticker == "CRDO" and 0.8 <= fuzzy.confidence < 1.0
+
+
+def test_low_confidence_is_not_a_match(resolver):
+    # Municipal bonds and private funds have no ticker; the nearest name is not good enough
+    assert resolver.resolve("CITY OF LAS VEGAS NEVADA") is None
+    assert resolver.resolve("APOLLO DEBT SOLUTIONS BDC") is None
+    assert resolver.resolve("") is None
+
+
+def test_batch_lookup_keeps_order_and_scores(resolver):
+    out = resolver.resolve_many(["Wynn Resorts Ltd", "STATE OF OHIO", None, "Wynn Resorts Ltd"])
+
+    assert out["ticker"].tolist() == ["WYNN", None, None, "WYNN"]
+    assert out["confidence"].tolist()[0] == 1.0
+    assert 0 < out["confidence"].tolist()[1] < 0.8
+    assert out["matched_name"].tolist()[1] is not None  # the rejected candidate is still reported
+
+
+def test_fill_unknown_only_touches_unresolved_rows(resolver):
+    df = pd.DataFrame({
+        "ticker": pd.Categorical(["UNKNOWN", "N/A", "AAPL", None]),
+        "asset_description": ["AEROVIRONMENT INC", "COUNTY OF HARRIS TEXAS", "AEROVIRONMENT INC", "Cavco Industries"],
+    })
+
+    out = resolver.fill_unknown(df)
+
+    assert out["ticker"].tolist() == ["AVAV", "N/A", "AAPL", "CVCO"]
+    assert out["ticker_confidence"].notna().tolist() == [True, False, False, True]
+
+
+def test_master_from_trades_and_index_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(entity_resolver, "INDEX_CACHE_DIR", tmp_path / "cache")
+    trades = pd.DataFrame({"ticker": ["HBAN", "UNKNOWN"], "asset_description": ["Huntington Bancshares Inc", "x"]})
+
+    first = EntityResolver.load(MASTER, extra=EntityResolver.master_from_trades(trades))
+    again = EntityResolver.load(MASTER, extra=EntityResolver.master_from_trades(trades))
+
+    assert len(first) == len(again) == len(pd.read_csv(MASTER)) + 1
+    assert len(list((tmp_path / "cache").glob("entity_index-*.pkl"))) == 1
+    assert again.resolve("Huntington Bancshares").ticker == "HBAN"
+
+    # New trades come on top of the cached index: no rebuild
+    cache = next((tmp_path / "cache").glob("entity_index-*.pkl"))
+    stamp = cache.stat().st_mtime_ns
+    more = pd.concat([trades, pd.DataFrame({"ticker": ["ZZQX"], "asset_description": ["Quixotic Widgetworks Holdings"]})])
+    grown = EntityResolver.load(MASTER, extra=EntityResolver.master_from_trades(more))
+
+    assert list((tmp_path / "cache").glob("entity_index-*.pkl")) == [cache] and cache.stat().st_mtime_ns == stamp
+    assert len(grown) == len(first) + 1
+    assert grown.resolve("Quixotic Widgetworks Holdings Inc").ticker == "ZZQX"
+    assert grown.resolve("Quixotic Widgetwork Holding").ticker == "ZZQX"
+
+
+def test_missing_master_matches_names_from_trades(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(entity_resolver, "INDEX_CACHE_DIR", tmp_path / "cache")
+    trades = pd.DataFrame({"ticker": ["HBAN"], "asset_description": ["Huntington Bancshares Inc"]})
+
+    resolver = EntityResolver.load(tmp_path / "missing.csv", extra=EntityResolver.master_from_trades(trades))
+
+    assert resolver.resolve("Huntington Bancshares").ticker == "HBAN"
+    assert "No security master" in caplog.text
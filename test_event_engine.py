@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis.event_engine import FINAL, PARTIAL, PENDING, batch_car, batch_event_returns
+from src.analysis.metrics import EventStudy
+from src.analysis.price_store import FixturePriceProvider, PriceStore
+from test_price_store import TODAY, synthetic_prices
+
+
+@pytest.fixture
+def prices(tmp_path):
+    frame = synthetic_prices(["AAPL", "MSFT", "XOM", "LATE", "HOLE"], start="2024-01-01", end="2025-11-28", seed=3)
+    # Listed mid-way, and a stretch of missing closes
+    frame.loc[:"2025-03-14", "LATE"] = np.nan
+    frame.loc["2025-05-05":"2025-06-20", "HOLE"] = np.nan
+    # Crypto trades every day, so its returns live on another calendar
+    days = pd.date_range("2024-01-01", "2025-11-28")
+    crypto = pd.Series(30000 * np.cumprod(1 + np.random.default_rng(1).normal(0, 0.03, len(days))), index=days)
+    frame = frame.reindex(days).assign(**{"BTC-USD": crypto})
+    return PriceStore(tmp_path / "prices", provider=FixturePriceProvider(frame), clock=lambda: TODAY)
+
+
+def _per_trade(study, symbols, dates, window_days=30):
+    return np.array([np.nan if (car := study.calculate_car(s, d, window_days)) is None else car
+                     for s, d in zip(symbols, dates)])
+
+
+def _bhar(prices, symbol, date, window_days):
+    # Straight from the definition: compound both return series over the event window, subtract
+    data = prices.get_many([symbol, "^GSPC"], date - pd.Timedelta(days=200), date + pd.Timedelta(days=window_days + 4))
+    returns = data.pct_change(fill_method=None).dropna().loc[date:date + pd.Timedelta(days=window_days)]
+    growth = (1 + returns).prod()
+    return growth[symbol] - growth["^GSPC"]
+
+
+def test_batch_matches_calculate_car(prices):
+    rng = np.random.default_rng(7)
+    symbols = list(rng.choice(["AAPL", "MSFT", "XOM", "LATE", "HOLE", "NOPE"], 300))
+    dates = list(pd.Timestamp("2024-03-01") + pd.to_timedelta(rng.integers(0, 640, 300), unit="D"))
+    # Relative scrape dates carry the time of day they were resolved at
+    dates[:20] = [d + pd.Timedelta(hours=13, minutes=54) for d in dates[:20]]
+    symbols[-3:], dates[-3:] = [None, "AAPL", "MSFT"], [pd.Timestamp("2025-05-01"), pd.NaT, pd.Timestamp("2024-01-15")]
+
+    car = batch_car(prices, symbols, dates)
+    expected = _per_trade(EventStudy(prices=prices), symbols, dates)
+
+    np.testing.assert_array_equal(np.isnan(car), np.isnan(expected))
+    np.testing.assert_allclose(car, expected, rtol=1e-9, atol=1e-12)
+    # Enough of every kind: scored, too little history, window still open
+    assert 150 < np.isfinite(car).sum() < 290
+
+
+def test_every_horizon_matches_calculate_car(prices):
+    rng = np.random.default_rng(11)
+    symbols = list(rng.choice(["AAPL", "MSFT", "LATE", "HOLE", "BTC-USD"], 120))
+    dates = list(pd.Timestamp("2024-06-01") + pd.to_timedelta(rng.integers(0, 520, 120), unit="D"))
+    study = EventStudy(prices=prices)
+
+    out = batch_event_returns(prices, symbols, dates, horizons=(5, 10, 30, 60, 90))
+
+    assert list(out.columns) == study.result_columns
+    for h in (5, 10, 60, 90):
+        expected = _per_trade(study, symbols, dates, window_days=h)
+        np.testing.assert_array_equal(out[f"car_{h}d"].isna(), np.isnan(expected))
+        np.testing.assert_allclose(out[f"car_{h}d"], expected, rtol=1e-9, atol=1e-12)
+    assert 80 < out["car_90d"].notna().sum() < 120
+
+
+def test_bhar_compounds_the_event_window(prices):
+    symbols = ["AAPL", "HOLE", "BTC-USD", "XOM"]
+    dates = pd.to_datetime(["2025-03-03", "2025-04-28", "2025-06-02", "2025-01-10"])
+
+    out = batch_event_returns(prices, symbols, dates, horizons=(10, 60))
+
+    for h in (10, 60):
+        expected = [_bhar(prices, s, d, h) for s, d in zip(symbols, dates)]
+        np.testing.assert_allclose(out[f"bhar_{h}d"], expected, rtol=1e-9)
+    assert out.notna().all().all()
+
+
+def test_off_calendar_symbols_use_their_own_calendar(prices):
+    dates = [pd.Timestamp("2025-06-02")] * 2
+    expected = _per_trade(EventStudy(prices=prices), ["BTC-USD", "AAPL"], dates)
+
+    car = batch_car(prices, ["BTC-USD", "AAPL"], dates)
+
+    assert np.isfinite(car).all()
+    np.testing.assert_allclose(car, expected, rtol=1e-9)
+
+
+def test_analyze_batch_adds_wide_columns_without_per_trade_calls(prices, monkeypatch):
+    study = EventStudy(prices=prices, horizons=(30, 10))
+    trades = pd.DataFrame({
+        "ticker": ["AAPL", "$BTC", "MSFT", "N/A"],
+        "asset_description": ["Apple Inc", "Bitcoin", "Microsoft Corp", "STATE OF OHIO"],
+        "transaction_date": pd.to_datetime(["2025-03-03", "2025-06-02", "2025-04-01", "2025-04-01"]),
+    })
+    expected = {h: _per_trade(study, ["AAPL", "BTC-USD", "MSFT", None], trades["transaction_date"], h) for h in (10, 30)}
+    monkeypatch.setattr(EventStudy, "calculate_car", lambda *a, **k: pytest.fail("per-trade path"))
+
+    out = study.analyze_batch(trades)
+
+    assert study.horizons == (10, 30)
+    assert list(out.columns[-5:]) == ["car_10d", "car_30d", "bhar_10d", "bhar_30d", "car_status"]
+    for h in (10, 30):
+        np.testing.assert_allclose(out[f"car_{h}d"].to_numpy(), expected[h], rtol=1e-9)
+    assert out["bhar_30d"].isna().tolist() == [False, False, False, True]
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_worker_count_does_not_change_results(prices, monkeypatch, workers):
+    monkeypatch.setattr("src.analysis.event_engine.SYMBOL_CHUNK", 2)
+    rng = np.random.default_rng(5)
+    symbols = list(rng.choice(["AAPL", "MSFT", "XOM", "LATE", "HOLE", "BTC-USD", "NOPE"], 200))
+    dates = list(pd.Timestamp("2024-06-01") + pd.to_timedelta(rng.integers(0, 500, 200), unit="D"))
+
+    serial = batch_event_returns(prices, symbols, dates, horizons=(5, 30, 90))
+    parallel = batch_event_returns(prices, symbols, dates, horizons=(5, 30, 90), workers=workers)
+
+    pd.testing.assert_frame_equal(parallel, serial, check_exact=True)
+    assert serial.notna().any().all()
+
+
+def test_status_follows_the_last_bar(prices):
+    # The fixture's last bar is 2025-11-28
+    symbols = ["AAPL", "AAPL", "AAPL", "NOPE", "NOPE", None]
+    dates = pd.to_datetime(["2025-08-01", "2025-11-10", "2025-12-15", "2025-01-10", "2025-11-10", "2025-01-10"])
+
+    out = batch_event_returns(prices, symbols, dates, horizons=(5, 90))
+
+    # Closed window, open window, not started, no prices for a window the provider has settled (delisted),
+    # no prices yet for an open one, nothing to price
+    assert out["car_status"].tolist() == [FINAL, PARTIAL, PENDING, FINAL, PENDING, FINAL]
+    assert out.loc[3:5, "car_90d"].isna().all()
+    # Partial: the short horizon is already complete, the long one is a partial sum
+    assert out.loc[1, ["car_5d", "car_90d"]].notna().all()
+
+
+def test_failed_fetch_stays_pending(tmp_path):
+    class Down(FixturePriceProvider):
+        def fetch(self, symbols, start, end):
+            if "DEAD" in symbols:
+                raise ConnectionError("timeout")
+            return super().fetch(symbols, start, end)
+
+    frame = synthetic_prices(["AAPL"], start="2024-01-01", end="2025-11-28")
+    prices = PriceStore(tmp_path / "prices", provider=Down(frame), clock=lambda: TODAY)
+    prices.get("AAPL", "2024-01-01", TODAY)
+
+    out = batch_event_returns(prices, ["AAPL", "DEAD"], pd.to_datetime(["2025-01-10", "2025-01-10"]), horizons=(90,))
+
+    # Same closed window: the symbol nobody answered for may still come
+    assert out["car_status"].tolist() == [FINAL, PENDING]
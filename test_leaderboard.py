@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.data_store as data_store
+from src.analysis.leaderboard import Leaderboard, _bootstrap, load_trades, parse_politicians
+from test_data_store import _raw_trades, store  # noqa: F401 (fixture)
+
+
+def _trades(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    members = [f"Member {i}\n{party}{chamber}{state}" for i, (party, chamber, state) in enumerate(
+        [("Democrat", "Senate", "MN"), ("Republican", "House", "SC"), ("Democrat", "House", "CA"),
+         ("Republican", "Senate", "TX"), ("Independent", "Senate", "VT"), ("Republican", "House", "FL")])]
+    return pd.DataFrame({
+        "politician_raw": rng.choice(members, n),
+        "type": rng.choice(["Buy", "Sell", "Exchange"], n, p=[0.6, 0.3, 0.1]),
+        "amount_est": rng.choice([8000.0, 32500.0, 75000.0, 175000.0], n),
+        "car_30d": rng.normal(0.002, 0.05, n),
+    })
+
+
+def test_parse_politicians_splits_party_chamber_and_state():
+    raw = pd.Series(["Tina Smith\nDemocratSenateMN", "Sheri Biggs\nRepublicanHouseSC",
+                     "Bernie Sanders\nIndependentSenateVT", "Tina Smith\nDemocratSenateMN", "Just A Name", None])
+
+    parsed = parse_politicians(raw)
+
+    assert parsed["politician"].tolist()[:5] == ["Tina Smith", "Sheri Biggs", "Bernie Sanders", "Tina Smith",
+                                                 "Just A Name"]
+    assert parsed["party"].tolist()[:3] == ["Democrat", "Republican", "Independent"]
+    assert parsed["chamber"].tolist()[:3] == ["Senate", "House", "Senate"]
+    assert parsed["state"].tolist()[:2] == ["MN", "SC"]
+    assert parsed.iloc[4][["party", "chamber"]].isna().all() and parsed.iloc[5].isna().all()
+
+
+def test_means_are_amount_weighted_with_sells_flipped(tmp_path):
+    df = _trades()
+
+    tables = Leaderboard(n_boot=200, path=tmp_path).compute(df)
+
+    # Straight from the definition with pandas
+    who = parse_politicians(df["politician_raw"])
+    side = df["type"].map({"Buy": 1, "Sell": -1})
+    signed = who.assign(num=df["car_30d"] * side * df["amount_est"], den=df["amount_est"])[side.notna()]
+    for level in ("politician", "party", "chamber"):
+        sums = signed.groupby(level)[["num", "den"]].sum()
+        table = tables[level].set_index(level)
+        np.testing.assert_allclose(table["mean"], (sums["num"] / sums["den"]).loc[table.index])
+        assert table["trades"].sum() == side.notna().sum()
+        spread = table.drop(index="Independent", errors="ignore")
+        assert (spread["ci_low"] < spread["mean"]).all() and (spread["mean"] < spread["ci_high"]).all()
+    # One senator is the whole party: nothing to resample
+    assert tables["party"].set_index("party").loc["Independent", ["ci_low", "ci_high"]].isna().all()
+    assert tables["politician"]["mean"].is_monotonic_decreasing
+    assert tables["party"].set_index("party")["politicians"].to_dict() == {"Democrat": 2, "Republican": 3,
+                                                                           "Independent": 1}
+    assert tables["politician"].set_index("politician").loc["Member 4", "party"] == "Independent"
+    assert tables["chamber"]["p_value"].between(0, 1).all()
+
+
+def test_bootstrap_matches_a_naive_resample():
+    rng = np.random.default_rng(5)
+    sizes = [7, 40, 300]
+    codes = np.r_[np.repeat([2, 0, 1], sizes), -1]
+    x, w = np.r_[rng.normal(0.01, 0.05, sum(sizes)), 9.0], np.r_[rng.choice([1.0, 5.0, 20.0], sum(sizes)), 1.0]
+
+    batched = _bootstrap(x * w, w, codes, 3, 20000, np.random.default_rng(0))
+
+    for g in range(3):
+        xs, ws = x[codes == g], w[codes == g]
+        i = rng.integers(0, len(xs), (20000, len(xs)))
+        naive = (xs[i] * ws[i]).sum(axis=1) / ws[i].sum(axis=1)
+        np.testing.assert_allclose(np.quantile(batched[:, g], [0.025, 0.5, 0.975]),
+                                   np.quantile(naive, [0.025, 0.5, 0.975]), atol=0.1 * naive.std())
+
+
+def test_permutation_p_value_finds_a_real_gap(tmp_path):
+    df = _trades(seed=1)
+    senate = df["politician_raw"].str.contains("Senate")
+    df.loc[senate, "car_30d"] += np.where(df.loc[senate, "type"] == "Sell", -0.1, 0.1)
+
+    chamber = Leaderboard(n_boot=500, path=tmp_path).compute(df)["chamber"].set_index("chamber")
+
+    # Three senators against three representatives: 20 ways to split them, the observed one is the most extreme
+    assert chamber.loc["Senate", "mean"] > chamber.loc["House", "ci_high"]
+    assert chamber["p_value"].tolist() == [pytest.approx(0.1, abs=0.05)] * 2
+
+
+def test_results_are_cached_until_the_data_changes(tmp_path, monkeypatch):
+    df = _trades()
+    board = Leaderboard(n_boot=100, path=tmp_path)
+    first = board.compute(df)
+
+    def boom(self, df):
+        raise AssertionError("recomputed")
+
+    with monkeypatch.context() as m:
+        m.setattr(Leaderboard, "_compute", boom)
+        # Same instance (memory), then a fresh one (disk)
+        again = board.compute(df.copy())
+        restarted = Leaderboard(n_boot=100, path=tmp_path).compute(df)
+    for level, table in first.items():
+        pd.testing.assert_frame_equal(again[level], table)
+        pd.testing.assert_frame_equal(restarted[level], table)
+
+    # A CAR restated: recomputed, and the old tables are dropped
+    df.loc[0, "car_30d"] += 1.0
+    changed = board.compute(df)
+    assert not changed["politician"].equals(first["politician"])
+    assert len(list(tmp_path.glob("*.parquet"))) == 3
+
+
+def test_load_trades_joins_stored_cars(store):
+    df = _raw_trades([("A", "Apple Inc", "AAPL"), ("B", "Microsoft Corp", "MSFT")])
+    data_store.merge_new_trades(df)
+    data_store.save_results("car", df.assign(car_30d=[0.1, -0.2], car_status="final"), version="2")
+
+    trades = load_trades()
+
+    tables = Leaderboard(n_boot=50, path=store / "leaderboard").compute(trades)
+    assert tables["politician"].set_index("politician")["mean"].to_dict() == {"A": pytest.approx(0.1),
+                                                                             "B": pytest.approx(-0.2)}
+    assert tables["chamber"]["chamber"].tolist() == ["Senate"]
+
+
+def test_no_scored_trades_gives_typed_empty_tables(tmp_path):
+    df = pd.DataFrame({"politician_raw": ["Tina Smith\nDemocratSenateMN"], "type": ["Buy"], "amount_est": [8000.0],
+                       "car_30d": [None]})
+
+    fresh = Leaderboard(n_boot=50, path=tmp_path).compute(df)
+    restarted = Leaderboard(n_boot=50, path=tmp_path).compute(df)
+
+    for tables in (fresh, restarted):
+        for level, table in tables.items():
+            assert table.empty
+            assert table["trades"].dtype == np.int64 and table["mean"].dtype == np.float64
+        # What the app formats
+        tables["party"]["p_value"].round(3)
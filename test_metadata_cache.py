@@ -0,0 +1,89 @@
+import pytest
+
+import src.enrichment.asset_metadata as asset_metadata
+from src.enrichment.asset_metadata import AssetEnricher
+from src.enrichment.metadata_cache import MetadataCache
+
+AAPL = {"name": "Apple Inc.", "sector": "Technology", "industry": "Consumer Electronics", "market_cap": 3e12}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_entries_expire_after_their_ttl(tmp_path, clock):
+    cache = MetadataCache(tmp_path / "c.sqlite", ttl=100, negative_ttl=10, clock=clock)
+    cache.put("AAPL", AAPL)
+    cache.put("DEAD", None)
+
+    assert cache.get("AAPL") == (True, AAPL)
+    assert cache.get("DEAD") == (True, None)
+
+    clock.now += 11
+    assert cache.get("DEAD") == (False, None)  # negative results go stale first
+    assert cache.get("AAPL") == (True, AAPL)
+
+    clock.now += 100
+    assert cache.get("AAPL") == (False, None)
+    assert cache.stats()["expired"] == 2
+
+
+def test_shared_across_instances(tmp_path, clock):
+    MetadataCache(tmp_path / "c.sqlite", clock=clock).put("AAPL", AAPL)
+
+    other = MetadataCache(tmp_path / "c.sqlite", clock=clock)
+
+    assert other.get_many(["AAPL", "MSFT"]) == {"AAPL": (True, AAPL), "MSFT": (False, None)}
+    stats = other.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["hit_rate"] == pytest.approx(0.5)
+
+
+def test_eviction_drops_least_recently_used(tmp_path, clock):
+    cache = MetadataCache(tmp_path / "c.sqlite", max_entries=2, clock=clock)
+    for ticker in ("A", "B", "C"):
+        cache.put(ticker, {"name": ticker})
+        clock.now += 1
+    cache.get("A")  # A is now the most recently used
+
+    cache.evict()
+
+    assert cache.get("B") == (False, None)
+    assert cache.get("A")[0] and cache.get("C")[0]
+    assert cache.stats()["evictions"] == 1
+
+
+class FakeTicker:
+    calls = []
+
+    def __init__(self, symbol):
+        self.calls.append(symbol)
+        self.info = {"shortName": "Apple Inc.", "sector": "Technology"} if symbol == "AAPL" else {}
+
+
+def test_enricher_reuses_cache_across_runs(tmp_path, monkeypatch):
+    FakeTicker.calls = []
+    monkeypatch.setattr(asset_metadata.yf, "Ticker", FakeTicker)
+    path = tmp_path / "c.sqlite"
+
+    first = AssetEnricher(cache=MetadataCache(path))
+    first.get_asset_info("AAPL")
+    first.get_asset_info("ZZZZ")
+    first.get_asset_info("ZZZZ")
+
+    # A new enricher (new app run) asks Yahoo for nothing, and remembers ZZZZ is dead
+    second = AssetEnricher(cache=MetadataCache(path))
+    assert second.get_asset_info("AAPL")["sector"] == "Technology"
+    assert second.get_asset_info("ZZZZ")["sector"] == "Unknown"
+    assert FakeTicker.calls == ["AAPL", "ZZZZ"]
+    stats = second.cache_stats()
+    assert (stats["hits"], stats["negative_hits"], stats["misses"]) == (1, 1, 0)
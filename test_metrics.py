@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis.event_engine import batch_event_returns
+from src.analysis.metrics import EventStudy, FamaFrenchModel, MarketModel, SectorModel, load_factors, make_model
+from src.analysis.price_store import FixturePriceProvider, PriceStore
+from test_price_store import TODAY, synthetic_prices
+
+FRENCH_CSV = """This file was created by CMPT_ME_BEME_RETS_DAILY using the 202509 CRSP database.
+The Tbill return is the simple daily rate that, over the number of trading days
+in the month, compounds to 1-month TBill rate from Ibbotson and Associates Inc.
+
+,Mkt-RF,SMB,HML,RF
+{rows}
+
+Copyright 2025 Eugene F. Fama and Kenneth R. French
+"""
+
+
+@pytest.fixture
+def prices(tmp_path):
+    frame = synthetic_prices(["AAPL", "MSFT", "XOM", "XLK", "XLE"], start="2024-01-01", end="2025-11-28", seed=9)
+    return PriceStore(tmp_path / "prices", provider=FixturePriceProvider(frame), clock=lambda: TODAY)
+
+
+@pytest.fixture
+def ff3(tmp_path, prices):
+    # Factors on the benchmark's calendar, as percent in the French format, minus a few days
+    days = prices.get("^GSPC", "2024-01-01", "2025-11-28").index
+    days = days.delete([40, 41, 300])
+    rng = np.random.default_rng(4)
+    values = rng.normal(0, 0.8, (len(days), 4))
+    values[:, 3] = 0.02
+    rows = "\n".join(f"{d:%Y%m%d},{','.join(f'{v:8.2f}' for v in row)}" for d, row in zip(days, values))
+    path = tmp_path / "ff3.CSV"
+    path.write_text(FRENCH_CSV.format(rows=rows))
+    return path
+
+
+def _ff_car(prices, factors, symbol, date, window_days, names):
+    # Straight from the definition, one trade at a time: OLS of excess return on the factors
+    data = prices.get_many([symbol, "^GSPC"], date - pd.Timedelta(days=200), date + pd.Timedelta(days=window_days + 4))
+    returns = data.pct_change(fill_method=None).dropna().join(factors, how="inner")
+    est = returns.loc[date - pd.Timedelta(days=200):date - pd.Timedelta(days=10)]
+    evt = returns.loc[date:date + pd.Timedelta(days=window_days)]
+    X = np.column_stack([np.ones(len(est)), est[names].to_numpy()])
+    coef = np.linalg.lstsq(X, (est[symbol] - est["RF"]).to_numpy(), rcond=None)[0]
+    expected = coef[0] + evt[names].to_numpy() @ coef[1:]
+    return float((evt[symbol] - evt["RF"] - expected).sum())
+
+
+def test_load_factors_reads_the_french_format(ff3):
+    factors = load_factors(ff3)
+
+    assert list(factors.columns) == ["Mkt-RF", "SMB", "HML", "RF"]
+    assert isinstance(factors.index, pd.DatetimeIndex) and factors.index.is_monotonic_increasing
+    assert factors["RF"].unique().tolist() == [pytest.approx(0.0002)]
+
+
+def test_load_factors_reads_plain_tables(tmp_path):
+    table = pd.DataFrame({"date": pd.to_datetime(["2025-01-02", "2025-01-03"]), "Mkt-RF": [0.01, -0.02], "RF": 0.0})
+    table.to_parquet(tmp_path / "f.parquet")
+    table.to_csv(tmp_path / "f.csv", index=False)
+
+    for name in ("f.parquet", "f.csv"):
+        assert load_factors(tmp_path / name)["Mkt-RF"].tolist() == [0.01, -0.02]
+    with pytest.raises(FileNotFoundError):
+        load_factors(tmp_path / "missing.CSV")
+
+
+def test_fama_french_matches_a_per_trade_regression(prices, ff3):
+    model = FamaFrenchModel("ff3", path=ff3)
+    rng = np.random.default_rng(2)
+    symbols = list(rng.choice(["AAPL", "MSFT", "XOM"], 60))
+    dates = list(pd.Timestamp("2024-08-01") + pd.to_timedelta(rng.integers(0, 420, 60), unit="D"))
+
+    out = batch_event_returns(prices, symbols, dates, horizons=(10, 30), model=model)
+
+    names = ["Mkt-RF", "SMB", "HML"]
+    for h in (10, 30):
+        expected = [_ff_car(prices, model.data, s, d, h, names) for s, d in zip(symbols, dates)]
+        np.testing.assert_allclose(out[f"car_{h}d"], expected, rtol=1e-8, atol=1e-12)
+    # BHAR doesn't depend on the model
+    market = batch_event_returns(prices, symbols, dates, horizons=(10, 30))
+    np.testing.assert_allclose(out["bhar_30d"], market["bhar_30d"])
+
+
+def test_sector_model_uses_the_sector_etf_as_the_market(prices):
+    trades = pd.DataFrame({
+        "ticker": ["AAPL", "XOM", "MSFT"],
+        "asset_description": ["Apple Inc", "Exxon Mobil Corp", "Microsoft Corp"],
+        "sector": ["Technology", "Energy", None],
+        "transaction_date": pd.to_datetime(["2025-03-03", "2025-04-01", "2025-05-01"]),
+    })
+
+    out = EventStudy(prices=prices, horizons=(30,), model="sector").analyze_batch(trades.copy())
+
+    expected = [EventStudy(benchmark, prices=prices).calculate_car(symbol, date)
+                for benchmark, symbol, date in zip(["XLK", "XLE", "^GSPC"], trades["ticker"], trades["transaction_date"])]
+    np.testing.assert_allclose(out["car_30d"], expected, rtol=1e-9)
+
+
+def test_model_is_part_of_the_results_version(prices, ff3):
+    market = EventStudy(prices=prices)
+    ff = EventStudy(prices=prices, model=FamaFrenchModel("ff3", path=ff3))
+
+    assert isinstance(market.model, MarketModel) and market.results_version.endswith(":market")
+    assert ff.results_version != market.results_version
+    assert isinstance(make_model("sector", prices), SectorModel)
+    with pytest.raises(ValueError):
+        make_model("capm-plus", prices)
@@ -0,0 +1,208 @@
+import pandas as pd
+import pytest
+
+import src.data_store as data_store
+from src.analysis.metrics import EventStudy
+from src.enrichment.asset_classifier import is_priceable
+from src.enrichment.asset_metadata import AssetEnricher
+from src.enrichment.entity_resolver import EntityResolver
+from src.enrichment.metadata_cache import MetadataCache
+from src.analysis.price_store import FixturePriceProvider, PriceStore
+from src.pipeline import refresh_derived
+from test_asset_metadata import StubProvider
+from test_data_store import _raw_trades, store  # noqa: F401 (fixture)
+from test_price_store import synthetic_prices
+
+
+class CountingEnricher(AssetEnricher):
+    def __init__(self, cache_dir):
+        super().__init__(cache=MetadataCache(cache_dir / "meta.sqlite"), provider=self)
+        self.calls = 0
+
+    def fetch(self, symbol):
+        self.calls += 1
+        return {"name": symbol, "sector": "Technology", "industry": "Software", "market_cap": 1}
+
+
+class CountingStudy(EventStudy):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def analyze_batch(self, df):
+        # Counts trades scored; skips the same unpriceable rows the real one does
+        priced = is_priceable(df)
+        self.calls += int(priced.sum())
+        self.calls_avoided += int((~priced).sum())
+        df['car_30d'] = priced.map({True: 0.1, False: None}).astype(float)
+        df['car_status'] = "final"
+        return df
+
+
+def test_second_run_only_computes_new_trades(store):
+    first = _raw_trades([("A", "Apple Inc", "AAPL"), ("B", "Microsoft Corp", "MSFT")])
+    data_store.merge_new_trades(first)
+    enricher, study = CountingEnricher(store), CountingStudy()
+
+    assert refresh_derived(first, enricher, study) == {"resolved": 0, "enrichment": 2, "car": 2, "calls_avoided": 0}
+
+    # Restart: fresh objects (empty in-memory caches), one new trade
+    both = pd.concat([first, _raw_trades([("C", "Alphabet Inc", "GOOGL")])], ignore_index=True)
+    data_store.merge_new_trades(both)
+    enricher, study = CountingEnricher(store), CountingStudy()
+
+    assert refresh_derived(both, enricher, study) == {"resolved": 0, "enrichment": 1, "car": 1, "calls_avoided": 0}
+    assert enricher.calls == study.calls == 1
+    table = data_store.query_trades(columns=["senator", "sector", "industry", "car_30d"])
+    assert table["sector"].tolist() == ["Technology"] * 3
+    assert table["car_30d"].tolist() == [pytest.approx(0.1)] * 3
+
+
+def test_version_bump_recomputes(store, monkeypatch):
+    df = _raw_trades([("A", "Apple Inc", "AAPL")])
+    data_store.merge_new_trades(df)
+    refresh_derived(df, CountingEnricher(store), CountingStudy())
+
+    monkeypatch.setattr(EventStudy, "RESULTS_VERSION", str(int(EventStudy.RESULTS_VERSION) + 1))
+    study = CountingStudy()
+
+    assert refresh_derived(df, CountingEnricher(store), study) == {"resolved": 0, "enrichment": 0, "car": 1, "calls_avoided": 0}
+    assert study.calls == 1
+
+
+def test_failed_metadata_lookup_is_retried_after_the_negative_ttl(store):
+    df = _raw_trades([("A", "Apple Inc", "AAPL")])
+    data_store.merge_new_trades(df)
+    provider = StubProvider({"AAPL": "Technology"}, failures={"AAPL": 1})
+    now = [0.0]
+
+    def run():
+        cache = MetadataCache(store / "meta.sqlite", negative_ttl=3600, clock=lambda: now[0])
+        enricher = AssetEnricher(cache=cache, provider=provider, retries=0, requests_per_second=0)
+        return refresh_derived(df, enricher, CountingStudy())["enrichment"]
+
+    def stored():
+        return tuple(data_store.query_trades(columns=["sector", "metadata_status"]).iloc[0])
+
+    assert run() == 1
+    assert stored() == ("Unknown", "pending")
+    # Still due, but the negative cache entry answers it: Yahoo isn't asked again yet
+    assert run() == 1
+    assert provider.calls == ["AAPL"]
+
+    now[0] += 3601
+    assert run() == 1
+    assert provider.calls == ["AAPL", "AAPL"]
+    assert stored() == ("Technology", "final")
+    assert run() == 0
+
+
+def test_newly_resolved_trades_get_recomputed(store):
+    df = _raw_trades([("A", "Apple Inc", "AAPL")])
+    df.loc[0, "ticker"] = "UNKNOWN"
+    data_store.merge_new_trades(df)
+    nobody = EntityResolver(pd.DataFrame(columns=["ticker", "name"]))
+    refresh_derived(df, CountingEnricher(store), CountingStudy(), resolver=nobody)
+
+    master = EntityResolver(pd.DataFrame({"ticker": ["AAPL"], "name": ["Apple Inc."]}))
+    study = CountingStudy()
+    counts = refresh_derived(df, CountingEnricher(store), study, resolver=master)
+
+    assert counts == {"resolved": 1, "enrichment": 1, "car": 1, "calls_avoided": 0}
+    row = data_store.query_trades(columns=["ticker", "resolved_ticker", "sector"]).iloc[0]
+    assert (row["ticker"], row["resolved_ticker"], row["sector"]) == ("UNKNOWN", "AAPL", "Technology")
+
+
+def test_unpriceable_assets_never_reach_the_network(store):
+    df = _raw_trades([("A", "Apple Inc", "AAPL"), ("A", "US TREASURY BILLS", "N/A"),
+                      ("B", "CITY OF CHICAGO", "N/A"), ("B", "Berry Corp", "BRY.1")])
+    data_store.merge_new_trades(df)
+    enricher, study = CountingEnricher(store), CountingStudy()
+    nobody = EntityResolver(pd.DataFrame(columns=["ticker", "name"]))
+
+    counts = refresh_derived(df, enricher, study, resolver=nobody)
+
+    # Metadata: BRY-1 would have been looked up (N/A has no symbol at all). Prices: the three non-stocks
+    assert counts["calls_avoided"] == 1 + 3
+    assert enricher.calls == study.calls == 1
+    table = data_store.query_trades(columns=["ticker", "sector"], order_by="ticker")
+    assert sorted(table["sector"]) == ["Bond", "Technology", "Treasury", "Unknown"]
+
+
+def test_open_event_windows_are_redone_until_final(store, tmp_path):
+    df = _raw_trades([("A", "Apple Inc", "AAPL")])
+    data_store.merge_new_trades(df)
+    bars = synthetic_prices(["AAPL"], start="2025-01-01", end="2026-06-30")
+    provider = FixturePriceProvider(bars)
+    now = {"today": pd.Timestamp("2025-12-05 18:00")}
+    prices = PriceStore(tmp_path / "prices", provider=provider, clock=lambda: now["today"])
+    nobody = EntityResolver(pd.DataFrame(columns=["ticker", "name"]))
+
+    def refresh():
+        counts = refresh_derived(df, CountingEnricher(store), EventStudy(prices=prices), resolver=nobody)
+        stored = data_store.query_trades(columns=["car_5d", "car_90d", "car_status"]).iloc[0]
+        return counts["car"], stored
+
+    # Two weeks in: the 5-day window is done, the 90-day one isn't
+    computed, partial = refresh()
+    assert computed == 1 and partial["car_status"] == "partial"
+    assert pd.notna(partial["car_5d"])
+
+    # Redone on every refresh while open, then final once a bar lands past the longest window
+    now["today"] = pd.Timestamp("2026-03-02 18:00")
+    computed, final = refresh()
+    assert computed == 1 and final["car_status"] == "final"
+    assert final["car_90d"] != partial["car_90d"]
+
+    # Frozen from then on: more bars, no recompute, no download for it
+    fetches = len(provider.calls)
+    now["today"] = pd.Timestamp("2026-04-01 18:00")
+    computed, frozen = refresh()
+    assert computed == 0 and frozen.tolist() == final.tolist()
+    assert len(provider.calls) == fetches
+
+
+def test_custom_horizons_are_stored(store, tmp_path, monkeypatch):
+    # Registering columns changes module state: keep it to this test
+    monkeypatch.setattr(data_store, "DERIVED_TABLES", {k: dict(v) for k, v in data_store.DERIVED_TABLES.items()})
+    monkeypatch.setattr(data_store, "VIEW_COLUMNS", list(data_store.VIEW_COLUMNS))
+    df = _raw_trades([("A", "Apple Inc", "AAPL")])
+    data_store.merge_new_trades(df)
+    prices = PriceStore(tmp_path / "prices", provider=FixturePriceProvider(
+        synthetic_prices(["AAPL"], start="2025-01-01", end="2026-06-30")), clock=lambda: pd.Timestamp("2026-03-02"))
+    study = EventStudy(prices=prices, horizons=(7, 120))
+
+    refresh_derived(df, CountingEnricher(store), study, resolver=EntityResolver(pd.DataFrame(columns=["ticker", "name"])))
+
+    stored = data_store.query_trades(columns=["car_7d", "bhar_120d", "car_status"]).iloc[0]
+    assert pd.notna(stored["car_7d"]) and pd.notna(stored["bhar_120d"])
+    assert stored["car_status"] == "partial"
+    assert "car_7d" in data_store.with_results(df).columns
+
+
+def test_delisted_symbol_is_final_once_its_window_is_settled(store, tmp_path):
+    df = _raw_trades([("A", "Apple Inc", "AAPL"), ("B", "Dead Co", "DEAD")])
+    data_store.merge_new_trades(df)
+    # The provider has nothing on DEAD, ever
+    provider = FixturePriceProvider(synthetic_prices(["AAPL"], start="2025-01-01", end="2026-06-30"))
+    now = {"today": pd.Timestamp("2025-12-05 18:00")}
+    prices = PriceStore(tmp_path / "prices", provider=provider, clock=lambda: now["today"])
+    nobody = EntityResolver(pd.DataFrame(columns=["ticker", "name"]))
+
+    def refresh():
+        counts = refresh_derived(df, CountingEnricher(store), EventStudy(prices=prices), resolver=nobody)
+        stored = data_store.query_trades(columns=["ticker", "car_30d", "car_status"], order_by="ticker")
+        return counts["car"], stored.set_index("ticker")
+
+    # Window still open: DEAD's prices may yet show up
+    computed, stored = refresh()
+    assert computed == 2 and stored.loc["DEAD", "car_status"] == "pending"
+
+    # Past both windows: the provider answered "nothing" for DEAD's whole window, so it's final too
+    now["today"] = pd.Timestamp("2026-03-02 18:00")
+    computed, stored = refresh()
+    assert computed == 2 and stored["car_status"].tolist() == ["final", "final"]
+    assert pd.isna(stored.loc["DEAD", "car_30d"])
+
+    now["today"] = pd.Timestamp("2026-03-09 18:00")
+    assert refresh()[0] == 0
@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+import pytest
+from yfinance.exceptions import YFPricesMissingError, YFRateLimitError
+
+import src.analysis.price_store as price_store
+from src.analysis.metrics import EventStudy
+from src.analysis.price_store import FixturePriceProvider, PriceStore, YahooPriceProvider
+
+TODAY = pd.Timestamp("2025-12-01 15:30")
+
+
+def synthetic_prices(symbols, start="2024-01-01", end="2025-12-01", seed=0, benchmark="^GSPC"):
+    """
+    Business-day closes: a market random walk plus, per symbol, beta x market + noise.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, end)
+    market = rng.normal(0.0004, 0.01, len(dates))
+    columns = {benchmark: 4000 * np.cumprod(1 + market)}
+    for symbol in symbols:
+        beta = rng.uniform(0.5, 1.5)
+        returns = 0.0002 + beta * market + rng.normal(0, 0.015, len(dates))
+        columns[symbol] = rng.uniform(20, 300) * np.cumprod(1 + returns)
+    return pd.DataFrame(columns, index=dates)
+
+
+@pytest.fixture
+def provider():
+    return FixturePriceProvider(synthetic_prices(["AAPL", "MSFT", "XOM"]))
+
+
+def _store(tmp_path, provider, now=TODAY):
+    return PriceStore(tmp_path / "prices", provider=provider, clock=lambda: now)
+
+
+def test_only_uncovered_gaps_are_fetched(tmp_path, provider):
+    store = _store(tmp_path, provider)
+
+    first = store.get("AAPL", "2025-01-01", "2025-03-31")
+    store.get("AAPL", "2025-02-01", "2025-03-01")
+    wider = store.get("AAPL", "2024-12-01", "2025-04-30")
+
+    assert [(lo, hi) for _, lo, hi in provider.calls] == [
+        (pd.Timestamp("2025-01-01"), pd.Timestamp("2025-03-31")),
+        (pd.Timestamp("2024-12-01"), pd.Timestamp("2024-12-31")),
+        (pd.Timestamp("2025-04-01"), pd.Timestamp("2025-04-30")),
+    ]
+    assert store.covered("AAPL") == [(pd.Timestamp("2024-12-01"), pd.Timestamp("2025-04-30"))]
+    pd.testing.assert_series_equal(wider.loc["2025-01-01":"2025-03-31"], first, check_names=False)
+    pd.testing.assert_series_equal(wider, provider.prices.loc["2024-12-01":"2025-04-30", "AAPL"],
+                                   check_names=False, check_freq=False)
+
+
+def test_store_persists_across_instances(tmp_path, provider):
+    _store(tmp_path, provider).get_many(["AAPL", "^GSPC"], "2025-01-01", "2025-06-30")
+    provider.calls.clear()
+
+    again = _store(tmp_path, provider).get_many(["AAPL", "^GSPC"], "2025-03-01", "2025-03-31")
+
+    assert provider.calls == []
+    assert list(again.columns) == ["AAPL", "^GSPC"]
+    assert len(again) == len(pd.bdate_range("2025-03-01", "2025-03-31"))
+
+
+def test_symbols_with_the_same_gap_share_a_request(tmp_path, provider):
+    store = _store(tmp_path, provider)
+    store.get("AAPL", "2025-01-01", "2025-06-30")
+    provider.calls.clear()
+
+    store.get_many(["AAPL", "MSFT", "XOM"], "2025-01-01", "2025-07-31")
+
+    requests = sorted((symbols, lo) for symbols, lo, _ in provider.calls)
+    assert requests == [(("AAPL",), pd.Timestamp("2025-07-01")),
+                        (("MSFT", "XOM"), pd.Timestamp("2025-01-01"))]
+
+
+def test_unknown_symbols_are_remembered(tmp_path, provider):
+    store = _store(tmp_path, provider)
+
+    assert store.get("DEAD", "2025-01-01", "2025-01-31").empty
+    assert _store(tmp_path, provider).get("DEAD", "2025-01-01", "2025-01-31").empty
+    assert len(provider.calls) == 1
+
+
+def test_today_is_not_covered_for_good(tmp_path, provider):
+    store = _store(tmp_path, provider)
+    store.get("AAPL", "2025-11-01", "2025-12-31")
+    # Within the TTL the same instance doesn't ask again
+    store.get("AAPL", "2025-11-15", "2025-12-31")
+    assert len(provider.calls) == 1
+    assert store.covered("AAPL") == [(pd.Timestamp("2025-11-01"), pd.Timestamp("2025-11-30"))]
+
+    # Next run: only today goes out again
+    _store(tmp_path, provider).get("AAPL", "2025-11-15", "2025-12-31")
+    assert provider.calls[-1][1:] == (pd.Timestamp("2025-12-01"), pd.Timestamp("2025-12-01"))
+
+
+def test_failed_fetch_is_retried_next_time(tmp_path, provider):
+    class Flaky(FixturePriceProvider):
+        def fetch(self, symbols, start, end):
+            if not self.calls:
+                self.calls.append(None)
+                raise ConnectionError("timeout")
+            return super().fetch(symbols, start, end)
+
+    flaky = Flaky(provider.prices)
+    store = _store(tmp_path, flaky)
+
+    assert store.get("AAPL", "2025-01-01", "2025-01-31").empty
+    assert not store.get("AAPL", "2025-01-01", "2025-01-31").empty
+
+
+def test_symbol_dropped_from_a_batch_is_not_covered(tmp_path, provider):
+    class Lossy(FixturePriceProvider):
+        # First answer leaves MSFT out without saying why, like a ticker failing inside yf.download
+        def fetch(self, symbols, start, end):
+            frame = super().fetch(symbols, start, end)
+            if len(self.calls) == 1:
+                frame = frame.drop(columns="MSFT")
+            return frame
+
+    lossy = Lossy(provider.prices)
+    store = _store(tmp_path, lossy)
+
+    first = store.get_many(["AAPL", "MSFT", "DEAD"], "2025-01-01", "2025-01-31")
+    assert list(first.columns) == ["AAPL"]
+    assert store.covered("MSFT") == []
+    assert store.covered("DEAD") == [(pd.Timestamp("2025-01-01"), pd.Timestamp("2025-01-31"))]
+
+    again = store.get_many(["AAPL", "MSFT", "DEAD"], "2025-01-01", "2025-01-31")
+    assert lossy.calls[-1][0] == ("MSFT",)
+    assert list(again.columns) == ["AAPL", "MSFT"]
+
+
+def test_yahoo_only_reports_symbols_it_has_no_data_for(monkeypatch):
+    dates = pd.bdate_range("2025-01-02", "2025-01-10")
+    columns = pd.MultiIndex.from_product([["Adj Close", "Close"], ["AAPL", "DEAD", "BUSY"]])
+    data = pd.DataFrame(np.nan, index=dates, columns=columns)
+    data[("Adj Close", "AAPL")] = data[("Close", "AAPL")] = 100.0
+    errors = {"DEAD": YFPricesMissingError("DEAD", ""), "BUSY": YFRateLimitError()}
+
+    class Ticker:
+        def __init__(self, symbol):
+            self.symbol = symbol
+
+        def history(self, **kwargs):
+            raise errors[self.symbol]
+
+    monkeypatch.setattr(price_store.yf, "download", lambda *args, **kwargs: data)
+    monkeypatch.setattr(price_store.yf, "Ticker", Ticker)
+
+    frame = YahooPriceProvider().fetch(["AAPL", "DEAD", "BUSY"], dates[0], dates[-1])
+
+    assert list(frame.columns) == ["AAPL"]
+    assert frame.attrs["no_data"] == ["DEAD"]
+
+
+def test_event_study_batch_fetches_once(tmp_path, provider):
+    study = EventStudy(prices=_store(tmp_path, provider))
+    trades = pd.DataFrame({
+        "ticker": ["AAPL", "MSFT", "XOM", "AAPL", "N/A"],
+        "asset_description": ["Apple Inc", "Microsoft Corp", "Exxon Mobil Corp", "Apple Inc", "CITY OF CHICAGO"],
+        "transaction_date": pd.to_datetime(["2025-03-03", "2025-04-01", "2025-06-02", "2025-08-01", "2025-05-01"]),
+    })
+
+    out = study.analyze_batch(trades)
+
+    # Everyone's window (and the benchmark) in one request; every trade after that reads memory
+    assert len(provider.calls) == 1
+    assert out["car_30d"].notna().tolist() == [True, True, True, True, False]
+    assert study.calculate_car("AAPL", pd.Timestamp("2025-03-03")) == pytest.approx(out["car_30d"].iloc[0])
+    assert len(provider.calls) == 1
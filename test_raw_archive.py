@@ -0,0 +1,72 @@
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from src.data_store import renormalize
+from src.ingestion.raw_archive import RawPageArchive
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "trades_page.html"
+
+
+def test_identical_pages_are_stored_once(tmp_path):
+    archive = RawPageArchive(tmp_path)
+    html = FIXTURE.read_text(encoding="utf-8")
+
+    first = archive.put(html, "https://example/trades?page=1", 1)
+    second = archive.put(html, "https://example/trades?page=1", 1)
+
+    assert first == second
+    assert len(archive) == 1
+    assert len(list((tmp_path / "pages").rglob("*.html.gz"))) == 1
+    assert archive.get(first) == html
+
+
+def test_renormalize_rebuilds_from_archive_offline(tmp_path):
+    archive = RawPageArchive(tmp_path / "raw")
+    html = FIXTURE.read_text(encoding="utf-8")
+    fetched = datetime(2025, 12, 5, 13, 54)
+    archive.put(html, "https://example/trades?page=1", 1, fetched_at=fetched)
+    # A later snapshot that lists the first 10 trades again plus nothing new
+    head, rest = html.split("<tbody>", 1)
+    body, tail = rest.split("</tbody>", 1)
+    rows = ["<tr" + chunk for chunk in body.split("<tr")[1:]]
+    archive.put(head + "<tbody>" + "".join(rows[:10]) + "</tbody>" + tail, "https://example/trades?page=1", 1,
+                fetched_at=datetime(2025, 12, 6, 9, 0))
+
+    out = tmp_path / "history"
+    count = renormalize(archive=archive, output_path=out, batch_pages=1)
+
+    segments = list(out.glob("seg-*.parquet"))
+    assert len(segments) == 1
+    df = pd.read_parquet(segments[0])
+    assert count == len(df) == 96
+    assert "fetched_at" not in df.columns
+    # Row 0 was published "Yesterday" relative to the newest snapshot that lists it
+    tina = df[df["senator"] == "Tina Smith"].iloc[0]
+    assert tina["disclosure_date"] == pd.Timestamp("2025-12-05 09:00")
+    assert tina["ticker"] == "HBAN"
+
+
+def test_renormalize_ids_do_not_depend_on_the_batch_size(tmp_path):
+    archive = RawPageArchive(tmp_path / "raw")
+    html = FIXTURE.read_text(encoding="utf-8")
+    head, rest = html.split("<tbody>", 1)
+    body, tail = rest.split("</tbody>", 1)
+    rows = ["<tr" + chunk for chunk in body.split("<tr")[1:]]
+    # Newest first: the latest snapshot lists a trade once, an older one lists it twice (a genuine
+    # repeat), so the second copy only turns up in the second batch
+    archive.put(head + "<tbody>" + rows[0] + rows[0] + rows[2] + "</tbody>" + tail, "https://example/trades?page=1",
+                1, fetched_at=datetime(2025, 12, 6, 9, 0))
+    archive.put(head + "<tbody>" + rows[0] + rows[1] + "</tbody>" + tail, "https://example/trades?page=1", 1,
+                fetched_at=datetime(2025, 12, 7, 9, 0))
+
+    def rebuild(batch_pages):
+        out = tmp_path / f"history-{batch_pages}"
+        renormalize(archive=archive, output_path=out, batch_pages=batch_pages)
+        return pd.read_parquet(next(out.glob("seg-*.parquet")))["trade_id"]
+
+    one_by_one, together = rebuild(1), rebuild(200)
+
+    assert len(one_by_one) == 4 and one_by_one.is_unique
+    assert one_by_one.tolist() == together.tolist()
@@ -0,0 +1,33 @@
+import json
+
+from scrape_capitolTrades import cells_to_trade, iter_trades, load_checkpoint, save_checkpoint
+
+
+def test_checkpoint_round_trip(tmp_path):
+    path = str(tmp_path / "cp.json")
+
+    assert load_checkpoint(path) == {"next_page": 1, "offset": 0}
+    save_checkpoint(4, 1234, path)
+    assert load_checkpoint(path) == {"next_page": 4, "offset": 1234}
+
+
+def test_iter_trades_is_lazy_and_skips_blank_lines(tmp_path):
+    path = tmp_path / "out.jsonl"
+    path.write_text(json.dumps({"ticker": "HBAN"}) + "\n\n" + json.dumps({"ticker": "OGN"}) + "\n")
+
+    trades = iter_trades(str(path))
+
+    assert next(trades) == {"ticker": "HBAN"}
+    assert [t["ticker"] for t in trades] == ["OGN"]
+
+
+def test_cells_to_trade_matches_saved_schema():
+    cells = ["Tina Smith\nDemocratSenateMN", "Huntington Bancshares Inc\nHBAN:US", "23:45\nYesterday",
+             "20 Nov\n2025", "days 5", "Spouse", "SELL", "100K–250K", "$15.88", ""]
+
+    assert cells_to_trade(cells) == {
+        "politician": "Tina Smith", "party_state": "DemocratSenateMN",
+        "issuer": "Huntington Bancshares Inc", "ticker": "HBAN:US",
+        "pub_date": "23:45\nYesterday", "trade_date": "20 Nov\n2025", "filed_after": "5",
+        "owner": "Spouse", "type": "SELL", "size": "100K–250K", "price": "$15.88",
+    }